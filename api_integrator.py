@@ -4,12 +4,119 @@ Handles multiple API calls and data aggregation
 """
 
 import requests
+from requests.adapters import HTTPAdapter
 import json
+import random
+import threading
 from datetime import datetime
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Callable, List, Tuple
 import logging
-from functools import lru_cache
-from time import time
+from time import time, monotonic, sleep
+from urllib.parse import urlsplit
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+from config import (API_MAX_WORKERS, BULK_MAX_WORKERS, SOURCE_QUEUE_WAIT, SOURCE_DEADLINES, DEFAULT_SOURCE_DEADLINE,
+                    PROVIDER_TTLS, DEFAULT_PROVIDER_TTL, NEGATIVE_CACHE_TTL,
+                    RESPONSE_CACHE_MAX_ENTRIES, RESPONSE_CACHE_MAX_BYTES,
+                    CACHE_BACKEND, CACHE_DB_PATH, CACHE_DB_MAX_ENTRIES, CACHE_DB_MAX_BYTES,
+                    HTTP_TIMEOUT, HTTP_POOL_CONNECTIONS, HTTP_POOL_MAXSIZE, HTTP_POOL_BLOCK,
+                    HTTP_MAX_RETRIES, HTTP_BACKOFF_BASE, HTTP_BACKOFF_MAX, HTTP_RETRY_STATUSES,
+                    FRED_HISTORY_LIMIT, FRED_SERIES_STORE_TTL,
+                    BREAKER_FAILURE_THRESHOLD, BREAKER_OPEN_SECONDS, BREAKER_WINDOW,
+                    PROVIDER_LATENCY_SLOS, DEFAULT_LATENCY_SLO, BREAKER_FALLBACK_TTL,
+                    LOCATION_INDEX_PATH, PREFETCH_LOCATIONS,
+                    PROVIDER_BASE_URLS, UPSTREAM_BASE_URL_OVERRIDE, UPSTREAM_MODE, FIXTURE_DIR,
+                    REPLAY_LATENCY_MS, REPLAY_JITTER_MS, REPLAY_ERROR_RATE, REPLAY_STRICT)
+from circuit_breaker import CircuitBreaker
+from location_index import LocationIndex
+from upstream_replay import FixtureStore, UpstreamRecorder, UpstreamReplayer
+from response_cache import ResponseCache, SQLiteResponseCache, TieredResponseCache, SingleFlight
+from metrics import UPSTREAM_LATENCY, UPSTREAM_ERRORS, UPSTREAM_RETRIES
+
+def _pick(data: Dict, *keys: str) -> Dict:
+    """Copy only the given keys that are present in data."""
+    return {k: data[k] for k in keys if k in data}
+
+
+# Projections keep only the fields consumed by the feature builder and the
+# dashboards, so the cache holds a few hundred bytes per response instead of
+# the full upstream payload.
+def _project_openaq(data: Dict) -> Dict:
+    return {'results': [_pick(r, 'id', 'name', 'locality', 'coordinates')
+                        for r in data.get('results', [])[:1]]}
+
+
+def _project_waqi(data: Dict) -> Dict:
+    payload = data.get('data')
+    if not isinstance(payload, dict):
+        return _pick(data, 'status')
+    return {
+        'status': data.get('status'),
+        'data': {
+            **_pick(payload, 'aqi', 'dominentpol'),
+            'iaqi': {k: _pick(v, 'v') for k, v in payload.get('iaqi', {}).items()},
+            'city': _pick(payload.get('city', {}), 'name', 'geo'),
+            'time': _pick(payload.get('time', {}), 'iso')
+        }
+    }
+
+
+def _project_weatherapi(data: Dict) -> Dict:
+    return {
+        'location': _pick(data.get('location', {}), 'name', 'lat', 'lon'),
+        'current': _pick(data.get('current', {}), 'temp_c', 'humidity', 'wind_kph',
+                         'pressure_mb', 'precip_mm')
+    }
+
+
+def _project_openweather(data: Dict) -> Dict:
+    return {
+        'main': _pick(data.get('main', {}), 'temp', 'humidity', 'pressure'),
+        'wind': _pick(data.get('wind', {}), 'speed', 'deg')
+    }
+
+
+def _project_tomtom(data: Dict) -> Dict:
+    if 'flowSegmentData' not in data:
+        return {}
+    return {'flowSegmentData': _pick(data['flowSegmentData'], 'currentSpeed', 'freeFlowSpeed',
+                                     'currentTravelTime', 'freeFlowTravelTime',
+                                     'confidence', 'roadClosure', 'vehicleCount')}
+
+
+def _project_geoapify(data: Dict) -> Dict:
+    return {'features': [{'properties': _pick(f.get('properties', {}), 'distance', 'time')}
+                         for f in data.get('features', [])[:1]]}
+
+
+def _project_fred(data: Dict) -> Dict:
+    observations = []
+    for obs in data.get('observations', []):
+        try:
+            observations.append({'date': obs['date'], 'value': float(obs['value'])})
+        except (KeyError, ValueError):
+            continue  # FRED reports missing values as '.'
+    return {'observations': observations}
+
+
+def _project_opencage(data: Dict) -> Dict:
+    return {'results': [{
+        **_pick(r, 'geometry', 'bounds', 'formatted', 'confidence'),
+        'components': _pick(r.get('components', {}), 'city', 'state', 'country', 'country_code', '_type')
+    } for r in data.get('results', [])[:1]]}
+
+
+PROJECTIONS = {
+    'openaq': _project_openaq,
+    'waqi': _project_waqi,
+    'weatherapi': _project_weatherapi,
+    'openweather': _project_openweather,
+    'tomtom': _project_tomtom,
+    'geoapify': _project_geoapify,
+    'stlouisfed': _project_fred,
+    'opencage': _project_opencage
+}
+
 
 class APIIntegrator:
     def __init__(self):
@@ -24,35 +131,272 @@ class APIIntegrator:
             'stlouisfed': 'df3cf23f3fa98f8e1def72ee02ccd085',
             'opencage': 'f618b3db4e9a4d77b76a5248bd51e821'
         }
-        
-    @lru_cache(maxsize=128)
-    def _cached_request(self, url: str, headers: Optional[Dict] = None) -> Dict:
-        """Make a cached API request."""
+        # Every provider can be pointed at a local stand-in server
+        self.base_urls = {provider: UPSTREAM_BASE_URL_OVERRIDE or base
+                          for provider, base in PROVIDER_BASE_URLS.items()}
+        self.recorder, self.replayer = self._build_transport(UPSTREAM_MODE)
+        # Shared pool used to fan out aggregated fetches
+        self._executor = ThreadPoolExecutor(max_workers=API_MAX_WORKERS,
+                                            thread_name_prefix='api-fetch')
+        # Bulk requests fan out 4 sources per city; their own pool keeps
+        # them (and their timed-out stragglers) off the shared one
+        self._bulk_executor = ThreadPoolExecutor(max_workers=BULK_MAX_WORKERS,
+                                                 thread_name_prefix='api-bulk')
+        self.cache = self._build_cache(CACHE_BACKEND)
+        # Last good response per key, served while a provider's circuit is open
+        self._fallback_cache = ResponseCache(max_entries=RESPONSE_CACHE_MAX_ENTRIES,
+                                             max_bytes=RESPONSE_CACHE_MAX_BYTES)
+        self.breakers = {
+            provider: CircuitBreaker(provider,
+                                     failure_threshold=BREAKER_FAILURE_THRESHOLD,
+                                     latency_slo=PROVIDER_LATENCY_SLOS.get(provider, DEFAULT_LATENCY_SLO),
+                                     open_seconds=BREAKER_OPEN_SECONDS,
+                                     window=BREAKER_WINDOW)
+            for provider in self.api_keys
+        }
+        # Concurrent misses for the same upstream key share one fetch
+        self._inflight = SingleFlight()
+        # City -> coordinates, geocoded once and persisted
+        self.locations = LocationIndex(LOCATION_INDEX_PATH, geocoder=self._geocode,
+                                       seed=PREFETCH_LOCATIONS)
+        # One pooled keep-alive session per upstream host
+        self._sessions = {}
+        self._sessions_lock = threading.Lock()
+
+    def _build_transport(self, mode: str):
+        """Create the recorder/replayer for 'live', 'record' or 'replay' mode."""
+        if mode == 'live':
+            return None, None
+        store = FixtureStore(FIXTURE_DIR)
+        if mode == 'record':
+            self.logger.info(f"Recording upstream responses to {FIXTURE_DIR}")
+            return UpstreamRecorder(store), None
+        if mode == 'replay':
+            self.logger.info(f"Replaying upstream responses from {FIXTURE_DIR}")
+            return None, UpstreamReplayer(store, latency_ms=REPLAY_LATENCY_MS,
+                                          jitter_ms=REPLAY_JITTER_MS,
+                                          error_rate=REPLAY_ERROR_RATE,
+                                          strict=REPLAY_STRICT)
+        raise ValueError(f"Unknown upstream mode: {mode}")
+
+    def _get_session(self, url: str) -> requests.Session:
+        """Get the pooled session for the URL's host, creating it on first use."""
+        host = urlsplit(url).netloc
+        session = self._sessions.get(host)
+        if session is not None:
+            return session
+
+        with self._sessions_lock:
+            session = self._sessions.get(host)
+            if session is None:
+                # Retries are handled in _fetch so they can be jittered
+                adapter = HTTPAdapter(pool_connections=HTTP_POOL_CONNECTIONS,
+                                      pool_maxsize=HTTP_POOL_MAXSIZE,
+                                      pool_block=HTTP_POOL_BLOCK,
+                                      max_retries=0)
+                session = requests.Session()
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                self._sessions[host] = session
+            return session
+
+    def _fetch(self, provider: str, url: str, headers: Optional[Dict] = None) -> requests.Response:
+        """
+        GET a URL over the host's pooled session with bounded retries.
+
+        Connection errors, timeouts and retryable status codes are retried up
+        to HTTP_MAX_RETRIES times with full-jitter exponential backoff. Other
+        HTTP errors are raised immediately.
+        """
+        for attempt in range(HTTP_MAX_RETRIES + 1):
+            try:
+                response = self._send(provider, url, headers)
+                if response.status_code not in HTTP_RETRY_STATUSES:
+                    response.raise_for_status()
+                    return response
+                error = requests.HTTPError(f"{response.status_code} from {provider}", response=response)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = e
+
+            if attempt == HTTP_MAX_RETRIES:
+                raise error
+            UPSTREAM_RETRIES.inc(provider=provider)
+            delay = random.uniform(0, min(HTTP_BACKOFF_MAX, HTTP_BACKOFF_BASE * 2 ** attempt))
+            self.logger.warning(f"Retrying {provider} in {delay:.2f}s after: {str(error)}")
+            sleep(delay)
+
+    def _send(self, provider: str, url: str, headers: Optional[Dict] = None):
+        """Send one GET, or replay it from fixtures in replay mode."""
+        if self.replayer is not None:
+            return self.replayer.get(provider, url)
+
+        response = self._get_session(url).get(url, headers=headers, timeout=HTTP_TIMEOUT)
+        if self.recorder is not None and response.ok:
+            self.recorder.record(provider, url, response)
+        return response
+
+    def close(self):
+        """Close pooled sessions and stop the fetch pool."""
+        with self._sessions_lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+        self._executor.shutdown(wait=False)
+        self._bulk_executor.shutdown(wait=False)
+
+    def _build_cache(self, backend: str):
+        """Create the response cache for the configured backend."""
+        memory = ResponseCache(max_entries=RESPONSE_CACHE_MAX_ENTRIES,
+                               max_bytes=RESPONSE_CACHE_MAX_BYTES)
+        if backend == 'memory':
+            return memory
+        if backend == 'sqlite':
+            try:
+                shared = SQLiteResponseCache(CACHE_DB_PATH, max_entries=CACHE_DB_MAX_ENTRIES,
+                                             max_bytes=CACHE_DB_MAX_BYTES)
+                return TieredResponseCache(memory, shared)
+            except Exception as e:
+                self.logger.error(f"Shared cache unavailable, using memory only: {str(e)}")
+                return memory
+        raise ValueError(f"Unknown cache backend: {backend}")
+
+    @staticmethod
+    def _cache_key(url: str, headers: Optional[Dict] = None) -> str:
+        """Build a cache key from the request URL and headers."""
+        if not headers:
+            return url
+        return url + '|' + json.dumps(headers, sort_keys=True)
+
+    def _cached_request(self, provider: str, url: str, headers: Optional[Dict] = None) -> Dict:
+        """
+        Make a cached API request.
+
+        Successful responses are kept for the provider's TTL; failures are
+        cached as empty results for a short negative TTL so a failing
+        provider is not hammered on every request. Concurrent misses for
+        the same key wait on a single upstream fetch.
+        """
+        key = self._cache_key(url, headers)
+        entry = self.cache.get(key)
+        if entry is not None:
+            return entry.value
+
+        def fill() -> Dict:
+            # A flight for this key may have stored it since the lookup above
+            entry = self.cache.get(key)
+            if entry is not None:
+                return entry.value
+            return self._fetch_and_store(provider, key, url, headers)
+
+        return self._inflight.do(key, fill)
+
+    def _open_circuit_fallback(self, provider: str, key: str) -> Optional[Dict]:
+        """
+        Return the fallback for key if the provider's circuit is open, else None.
+
+        While open the upstream is not contacted; the last good response
+        for the key is served instead, or {} if there is none.
+        """
+        breaker = self.breakers.get(provider)
+        if breaker is None or breaker.allow():
+            return None
+        self.logger.warning(f"Circuit open for {provider}, serving fallback")
+        fallback = self._fallback_cache.get(key)
+        return fallback.value if fallback is not None else {}
+
+    @staticmethod
+    def _project(provider: str, body: Any) -> Dict:
+        """Reduce an upstream payload to the fields we use."""
+        project = PROJECTIONS.get(provider)
+        return project(body) if project is not None else body
+
+    def _store_success(self, provider: str, key: str, data: Dict, started: float) -> Dict:
+        """Record a successful fetch and cache its projected data."""
+        elapsed = monotonic() - started
+        UPSTREAM_LATENCY.observe(elapsed, provider=provider)
+        breaker = self.breakers.get(provider)
+        if breaker is not None:
+            breaker.record(True, elapsed)
+        ttl = PROVIDER_TTLS.get(provider, DEFAULT_PROVIDER_TTL)
+        size = len(json.dumps(data))
+        self.cache.set(key, data, ttl, size=size)
+        self._fallback_cache.set(key, data, BREAKER_FALLBACK_TTL, size=size)
+        return data
+
+    def _store_failure(self, provider: str, key: str, error: Exception, started: float) -> Dict:
+        """Record a failed fetch and negatively cache it."""
+        elapsed = monotonic() - started
+        UPSTREAM_LATENCY.observe(elapsed, provider=provider)
+        UPSTREAM_ERRORS.inc(provider=provider)
+        breaker = self.breakers.get(provider)
+        if breaker is not None:
+            breaker.record(False, elapsed)
+        self.logger.error(f"API request to {provider} failed: {str(error)}")
+        self.cache.set(key, {}, NEGATIVE_CACHE_TTL, negative=True)
+        return {}
+
+    def _fetch_and_store(self, provider: str, key: str, url: str, headers: Optional[Dict] = None) -> Dict:
+        """Fetch a URL, project it down to the fields we use and cache the result under key."""
+        fallback = self._open_circuit_fallback(provider, key)
+        if fallback is not None:
+            return fallback
+
+        started = monotonic()
         try:
-            response = requests.get(url, headers=headers)
-            response.raise_for_status()
-            return response.json()
+            data = self._project(provider, self._fetch(provider, url, headers).json())
         except Exception as e:
-            self.logger.error(f"API request failed: {str(e)}")
-            return {}
+            return self._store_failure(provider, key, e, started)
+        return self._store_success(provider, key, data, started)
 
-    def get_air_quality(self, city: str) -> Dict[str, Any]:
-        """Get air quality data from multiple sources."""
-        try:
-            # OpenAQ API
-            openaq_headers = {'X-API-Key': self.api_keys['openaq']}
-            openaq_url = f"https://api.openaq.org/v3/locations?city={city}&limit=1"
-            openaq_data = self._cached_request(openaq_url, headers=openaq_headers)
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Get hit/miss/eviction counters for the response cache."""
+        stats = self.cache.stats()
+        stats['single_flight'] = self._inflight.stats()
+        return stats
+
+    def get_provider_health(self) -> Dict[str, Any]:
+        """Get circuit state, error rate and latency percentiles per provider."""
+        return {provider: breaker.snapshot() for provider, breaker in self.breakers.items()}
 
+    def _air_quality_requests(self, city: str) -> Dict[str, Tuple[str, str, Optional[Dict]]]:
+        """Upstream requests behind get_air_quality as name -> (provider, url, headers)."""
+        return {
+            # OpenAQ API
+            'openaq': ('openaq', f"{self.base_urls['openaq']}/v3/locations?city={city}&limit=1",
+                       {'X-API-Key': self.api_keys['openaq']}),
             # WAQI API
-            waqi_url = f"https://api.waqi.info/feed/{city}/?token={self.api_keys['waqi']}"
-            waqi_data = self._cached_request(waqi_url)
+            'waqi': ('waqi', f"{self.base_urls['waqi']}/feed/{city}/?token={self.api_keys['waqi']}", None)
+        }
 
-            return {
-                'openaq': openaq_data,
-                'waqi': waqi_data,
-                'timestamp': datetime.utcnow().isoformat()
-            }
+    def _weather_requests(self, city: str) -> Dict[str, Tuple[str, str, Optional[Dict]]]:
+        """Upstream requests behind get_weather as name -> (provider, url, headers)."""
+        return {
+            # WeatherAPI
+            'weatherapi': ('weatherapi', f"{self.base_urls['weatherapi']}/v1/current.json?key={self.api_keys['weatherapi']}&q={city}", None),
+            # OpenWeatherMap
+            'openweather': ('openweather', f"{self.base_urls['openweather']}/data/2.5/weather?q={city}&appid={self.api_keys['openweather']}&units=metric", None)
+        }
+
+    def _traffic_requests(self, lat: float, lon: float) -> Dict[str, Tuple[str, str, Optional[Dict]]]:
+        """Upstream requests behind get_traffic as name -> (provider, url, headers)."""
+        return {
+            # TomTom Traffic
+            'tomtom': ('tomtom', f"{self.base_urls['tomtom']}/traffic/services/4/flowSegmentData/absolute/10/json?point={lat},{lon}&key={self.api_keys['tomtom']}", None),
+            # Geoapify
+            'geoapify': ('geoapify', f"{self.base_urls['geoapify']}/v1/routing?waypoints={lat},{lon}|{lat+0.1},{lon+0.1}&mode=drive&traffic=approximated&apiKey={self.api_keys['geoapify']}", None)
+        }
+
+    def _request_all(self, requests_by_name: Dict[str, Tuple[str, str, Optional[Dict]]]) -> Dict[str, Any]:
+        """Run a group of cached requests and stamp the result."""
+        data = {name: self._cached_request(provider, url, headers=headers)
+                for name, (provider, url, headers) in requests_by_name.items()}
+        data['timestamp'] = datetime.utcnow().isoformat()
+        return data
+
+    def get_air_quality(self, city: str) -> Dict[str, Any]:
+        """Get air quality data from multiple sources."""
+        try:
+            return self._request_all(self._air_quality_requests(city))
         except Exception as e:
             self.logger.error(f"Error getting air quality data: {str(e)}")
             return {}
@@ -60,19 +404,7 @@ class APIIntegrator:
     def get_weather(self, city: str) -> Dict[str, Any]:
         """Get weather data from multiple sources."""
         try:
-            # WeatherAPI
-            weather_url = f"http://api.weatherapi.com/v1/current.json?key={self.api_keys['weatherapi']}&q={city}"
-            weather_data = self._cached_request(weather_url)
-
-            # OpenWeatherMap
-            openweather_url = f"https://api.openweathermap.org/data/2.5/weather?q={city}&appid={self.api_keys['openweather']}&units=metric"
-            openweather_data = self._cached_request(openweather_url)
-
-            return {
-                'weatherapi': weather_data,
-                'openweather': openweather_data,
-                'timestamp': datetime.utcnow().isoformat()
-            }
+            return self._request_all(self._weather_requests(city))
         except Exception as e:
             self.logger.error(f"Error getting weather data: {str(e)}")
             return {}
@@ -80,60 +412,290 @@ class APIIntegrator:
     def get_traffic(self, lat: float, lon: float) -> Dict[str, Any]:
         """Get traffic data from multiple sources."""
         try:
-            # TomTom Traffic
-            tomtom_url = f"https://api.tomtom.com/traffic/services/4/flowSegmentData/absolute/10/json?point={lat},{lon}&key={self.api_keys['tomtom']}"
-            tomtom_data = self._cached_request(tomtom_url)
-
-            # Geoapify
-            geoapify_url = f"https://api.geoapify.com/v1/routing?waypoints={lat},{lon}|{lat+0.1},{lon+0.1}&mode=drive&traffic=approximated&apiKey={self.api_keys['geoapify']}"
-            geoapify_data = self._cached_request(geoapify_url)
-
-            return {
-                'tomtom': tomtom_data,
-                'geoapify': geoapify_data,
-                'timestamp': datetime.utcnow().isoformat()
-            }
+            return self._request_all(self._traffic_requests(lat, lon))
         except Exception as e:
             self.logger.error(f"Error getting traffic data: {str(e)}")
             return {}
 
+    def _get_fred_series(self, series_id: str) -> List[Dict[str, Any]]:
+        """
+        Get the recent observations of a FRED series, fetching incrementally.
+
+        The merged series is kept in the response cache. Once it is older
+        than the provider TTL, only observations since the last known date
+        are requested; the first fetch asks for the newest
+        FRED_HISTORY_LIMIT observations instead of the full history.
+        """
+        key = f"series:{series_id}"
+        entry = self.cache.get(key)
+        known = entry.value if entry is not None else {'observations': [], 'checked_at': 0}
+        if known['checked_at'] + PROVIDER_TTLS.get('stlouisfed', DEFAULT_PROVIDER_TTL) > time():
+            return known['observations']
+
+        def refresh():
+            fred_url = (f"{self.base_urls['stlouisfed']}/fred/series/observations?series_id={series_id}"
+                        f"&api_key={self.api_keys['stlouisfed']}&file_type=json")
+            if known['observations']:
+                fred_url += f"&observation_start={known['observations'][-1]['date']}"
+            else:
+                fred_url += f"&sort_order=desc&limit={FRED_HISTORY_LIMIT}"
+
+            delta = self._cached_request('stlouisfed', fred_url).get('observations')
+            if not delta:
+                # Keep serving what we have; retry after the negative TTL
+                return known['observations']
+
+            # Newer observations replace revised values for the same date
+            merged = {obs['date']: obs for obs in known['observations']}
+            merged.update((obs['date'], obs) for obs in delta)
+            observations = [merged[d] for d in sorted(merged)][-FRED_HISTORY_LIMIT:]
+            self.cache.set(key, {'observations': observations, 'checked_at': time()},
+                           FRED_SERIES_STORE_TTL, size=len(json.dumps(observations)))
+            return observations
+
+        return self._inflight.do(key, refresh)
+
     def get_industrial_activity(self) -> Dict[str, Any]:
         """Get industrial activity data."""
         try:
             # St. Louis FED Industrial Production
-            fred_url = f"https://api.stlouisfed.org/fred/series/observations?series_id=INDPRO&api_key={self.api_keys['stlouisfed']}&file_type=json"
-            fred_data = self._cached_request(fred_url)
+            observations = self._get_fred_series('INDPRO')
+            latest = observations[-1] if observations else {}
 
             return {
-                'industrial_production': fred_data,
+                'industrial_production': {
+                    'series_id': 'INDPRO',
+                    'date': latest.get('date'),
+                    'value': latest.get('value'),
+                    'observations': observations
+                } if latest else {},
                 'timestamp': datetime.utcnow().isoformat()
             }
         except Exception as e:
             self.logger.error(f"Error getting industrial data: {str(e)}")
             return {}
 
+    def _geocode(self, location: str) -> Optional[Dict[str, Any]]:
+        """Geocode a place name through OpenCage."""
+        # OpenCage Geocoding
+        opencage_url = f"{self.base_urls['opencage']}/geocode/v1/json?q={location}&key={self.api_keys['opencage']}"
+        results = self._cached_request('opencage', opencage_url).get('results')
+        if not results:
+            return None
+
+        result = results[0]
+        bounds = result.get('bounds')
+        bbox = None
+        if bounds:
+            # [south, west, north, east]
+            bbox = [bounds['southwest']['lat'], bounds['southwest']['lng'],
+                    bounds['northeast']['lat'], bounds['northeast']['lng']]
+        return {
+            'lat': result['geometry']['lat'],
+            'lon': result['geometry']['lng'],
+            'bbox': bbox,
+            'metadata': {
+                'formatted': result.get('formatted'),
+                'confidence': result.get('confidence'),
+                **result.get('components', {})
+            }
+        }
+
+    def resolve_location(self, city: str) -> Optional[Dict[str, Any]]:
+        """Resolve a city to coordinates, geocoding only the first time it is seen."""
+        return self.locations.resolve(city)
+
     def get_urban_development(self, location: str) -> Dict[str, Any]:
         """Get urban development data."""
         try:
-            # OpenCage Geocoding
-            opencage_url = f"https://api.opencagedata.com/geocode/v1/json?q={location}&key={self.api_keys['opencage']}"
-            opencage_data = self._cached_request(opencage_url)
+            # Served from the location index; OpenCage is only hit for new places
+            urban_data = self.resolve_location(location)
 
             return {
-                'urban_data': opencage_data,
+                'urban_data': urban_data or {},
                 'timestamp': datetime.utcnow().isoformat()
             }
         except Exception as e:
             self.logger.error(f"Error getting urban data: {str(e)}")
             return {}
 
-    def get_aggregated_data(self, city: str, lat: float, lon: float) -> Dict[str, Any]:
-        """Get aggregated data from all sources."""
+    def _aggregated_sources(self, city: str, lat: float, lon: float) -> Dict[str, Callable[[], Dict[str, Any]]]:
+        """Map each aggregated source name to the call that fetches it."""
         return {
-            'air_quality': self.get_air_quality(city),
-            'weather': self.get_weather(city),
-            'traffic': self.get_traffic(lat, lon),
-            'industrial': self.get_industrial_activity(),
-            'urban': self.get_urban_development(city),
+            'air_quality': lambda: self.get_air_quality(city),
+            'weather': lambda: self.get_weather(city),
+            'traffic': lambda: self.get_traffic(lat, lon),
+            'industrial': self.get_industrial_activity,
+            'urban': lambda: self.get_urban_development(city)
+        }
+
+    def _fetch_sources_concurrently(self, sources: Dict[str, Callable[[], Dict[str, Any]]],
+                                    deadlines: Optional[Dict[str, float]] = None,
+                                    executor: Optional[ThreadPoolExecutor] = None) -> Dict[str, Any]:
+        """
+        Fire every source at once and collect whatever finishes in time.
+
+        Deadlines run from submission, so the whole fetch is bounded by the
+        slowest allowed source. On the bulk pool, where many more sources
+        than workers are queued, each deadline instead runs from the moment
+        a worker picks the source up, and a source still queued after
+        SOURCE_QUEUE_WAIT is cancelled. Sources that miss their deadline
+        are reported as 'timeout' and left to finish in the background.
+        """
+        deadlines = {**SOURCE_DEADLINES, **(deadlines or {})}
+        executor = executor or self._executor
+        from_start = executor is self._bulk_executor
+        submitted = monotonic()
+        started_at = {}
+        started = {name: threading.Event() for name in sources}
+        finished_at = {}
+        futures = {}
+
+        def run(name: str, fetch: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+            started_at[name] = monotonic()
+            started[name].set()
+            return fetch()
+
+        for name, fetch in sources.items():
+            futures[name] = executor.submit(run, name, fetch)
+            futures[name].add_done_callback(
+                lambda _, name=name: finished_at.setdefault(name, monotonic()))
+
+        results = {}
+        status = {}
+        # Wait on the tightest deadlines first so slower sources keep running meanwhile
+        for name in sorted(futures, key=lambda n: deadlines.get(n, DEFAULT_SOURCE_DEADLINE)):
+            deadline = deadlines.get(name, DEFAULT_SOURCE_DEADLINE)
+            try:
+                if from_start:
+                    if not started[name].wait(max(0.0, submitted + SOURCE_QUEUE_WAIT - monotonic())):
+                        if futures[name].cancel():
+                            raise FutureTimeoutError()
+                        # Picked up just now; its deadline has only begun
+                        started[name].wait()
+                    remaining = max(0.0, started_at[name] + deadline - monotonic())
+                else:
+                    remaining = max(0.0, submitted + deadline - monotonic())
+                results[name] = futures[name].result(timeout=remaining)
+                state = 'ok' if results[name] else 'empty'
+            except FutureTimeoutError:
+                results[name] = {}
+                state = 'timeout'
+                self.logger.warning(f"Source '{name}' missed its {deadline}s deadline")
+            except Exception as e:
+                results[name] = {}
+                state = 'error'
+                self.logger.error(f"Source '{name}' failed: {str(e)}")
+            elapsed = finished_at.get(name, monotonic()) - (started_at.get(name, submitted) if from_start else submitted)
+            status[name] = {
+                'status': state,
+                'elapsed_ms': round(elapsed * 1000, 1),
+                'deadline_ms': round(deadline * 1000)
+            }
+
+        # Keep the response layout in source order regardless of completion order
+        data = {name: results[name] for name in sources}
+        data['sources'] = {name: status[name] for name in sources}
+        return data
+
+    # Sources that depend on the city; everything else is fetched once per bulk request
+    CITY_SOURCES = ('air_quality', 'weather', 'traffic', 'urban')
+
+    @staticmethod
+    def _unique_cities(cities: List[str]) -> List[str]:
+        """Drop blanks and repeats (by normalized name), keeping the first spelling."""
+        unique = {}
+        for city in cities:
+            name = city.strip()
+            if name:
+                unique.setdefault(LocationIndex.normalize(name), name)
+        return list(unique.values())
+
+    def _traffic_for_city(self, city: str) -> Dict[str, Any]:
+        """Traffic around a city's indexed coordinates."""
+        location = self.resolve_location(city)
+        return self.get_traffic(location['lat'], location['lon']) if location else {}
+
+    def _bulk_sources(self, cities: List[str]) -> Dict[str, Callable[[], Dict[str, Any]]]:
+        """One 'industrial' source plus '<city>/<source>' for every per-city source."""
+        sources = {'industrial': self.get_industrial_activity}
+        for city in cities:
+            sources.update({
+                f"{city}/air_quality": lambda city=city: self.get_air_quality(city),
+                f"{city}/weather": lambda city=city: self.get_weather(city),
+                f"{city}/traffic": lambda city=city: self._traffic_for_city(city),
+                f"{city}/urban": lambda city=city: self.get_urban_development(city)
+            })
+        return sources
+
+    def _bulk_deadlines(self, cities: List[str], deadlines: Optional[Dict[str, float]] = None) -> Dict[str, float]:
+        """Apply the per-source deadlines to every city's copy of the source."""
+        deadlines = {**SOURCE_DEADLINES, **(deadlines or {})}
+        bulk = {'industrial': deadlines.get('industrial', DEFAULT_SOURCE_DEADLINE)}
+        for city in cities:
+            for source in self.CITY_SOURCES:
+                bulk[f"{city}/{source}"] = deadlines.get(source, DEFAULT_SOURCE_DEADLINE)
+        return bulk
+
+    def _bulk_layout(self, cities: List[str], data: Dict[str, Any]) -> Dict[str, Any]:
+        """Regroup flat '<city>/<source>' results into one entry per city."""
+        result = {
+            'industrial': data['industrial'],
+            'cities': {},
+            'sources': {'industrial': data['sources']['industrial']},
             'timestamp': datetime.utcnow().isoformat()
         }
+        for city in cities:
+            entry = {source: data[f"{city}/{source}"] for source in self.CITY_SOURCES}
+            entry['sources'] = {source: data['sources'][f"{city}/{source}"] for source in self.CITY_SOURCES}
+            result['cities'][city] = entry
+        return result
+
+    def get_bulk_aggregated_data(self, cities: List[str],
+                                 deadlines: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
+        """
+        Get aggregated data for several cities in one pass.
+
+        City-independent sources (the national industrial series) are
+        fetched once and returned at the top level. Repeated cities are
+        dropped, and every remaining per-city source runs on the bounded
+        bulk pool under the usual per-source deadlines, each starting when
+        the source does; coordinates come from the location index.
+
+        Returns:
+            Dictionary with 'industrial', 'cities' (city -> the per-city
+            sources plus their 'sources' status) and a top-level 'sources'
+            status for the shared sources.
+        """
+        cities = self._unique_cities(cities)
+        data = self._fetch_sources_concurrently(self._bulk_sources(cities),
+                                                self._bulk_deadlines(cities, deadlines),
+                                                executor=self._bulk_executor)
+        return self._bulk_layout(cities, data)
+
+    def get_aggregated_data(self, city: str, lat: float, lon: float,
+                            concurrent: bool = True,
+                            deadlines: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
+        """
+        Get aggregated data from all sources.
+
+        Args:
+            city: City name used by the city-based providers
+            lat: Latitude used by the traffic providers
+            lon: Longitude used by the traffic providers
+            concurrent: Fetch all sources in parallel with per-source deadlines
+            deadlines: Optional per-source deadline overrides in seconds
+
+        Returns:
+            Dictionary keyed by source name, plus a 'sources' entry with the
+            per-source status ('ok', 'empty', 'timeout' or 'error').
+        """
+        sources = self._aggregated_sources(city, lat, lon)
+        if concurrent:
+            data = self._fetch_sources_concurrently(sources, deadlines)
+        else:
+            data = {name: fetch() for name, fetch in sources.items()}
+            data['sources'] = {name: {'status': 'ok' if data[name] else 'empty'}
+                               for name in sources}
+        data['timestamp'] = datetime.utcnow().isoformat()
+        return data
@@ -4,18 +4,29 @@ Handles ML model predictions and serves them to the frontend
 Integrates multiple data sources for comprehensive analysis
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, g, Response
 from flask_cors import CORS
 import logging
-from predict import AQIPredictor
-from datetime import datetime
+from time import perf_counter
+from predict import AQIPredictor, ModelNotReady
 from api_integrator import APIIntegrator
+from feature_builder import build_features
+from prefetcher import SnapshotPrefetcher
+from micro_batcher import MicroBatcher
+from prediction_cache import PredictionCache
+from live_feed import LiveFeed
+from http_caching import json_etag, conditional_json_body, accepts_gzip, gzip_body
+from metrics import (REGISTRY, HTTP_REQUESTS, HTTP_LATENCY, HTTP_IN_FLIGHT,
+                     PREDICT_STAGE_LATENCY, cache_collector)
+from config import (PREFETCH_ENABLED, MAX_BATCH_SIZE, MICRO_BATCH_ENABLED, PREDICTION_CACHE_ENABLED,
+                    STREAM_HEARTBEAT, BULK_MAX_CITIES, FORECAST_MAX_HOURS)
 
 # Initialize Flask app
 app = Flask(__name__)
 CORS(app, resources={
     r"/api/*": {"origins": ["http://localhost:3000"]},
-    r"/predict": {"origins": ["http://localhost:3000"]}
+    r"/predict": {"origins": ["http://localhost:3000"]},
+    r"/forecast": {"origins": ["http://localhost:3000"]}
 })
 
 # Configure logging
@@ -25,18 +36,100 @@ logger = logging.getLogger(__name__)
 # Initialize components
 try:
     predictor = AQIPredictor()
+    # Concurrent single predictions share model calls when micro-batching is on
+    inference = MicroBatcher(predictor) if MICRO_BATCH_ENABLED else predictor
     api_integrator = APIIntegrator()
+    prefetcher = SnapshotPrefetcher(api_integrator)
+    prediction_cache = PredictionCache() if PREDICTION_CACHE_ENABLED else None
+    if PREFETCH_ENABLED:
+        prefetcher.start()
+    # Cache counters are read from the caches' own stats at scrape time
+    REGISTRY.register_collector(cache_collector('upstream', api_integrator.get_cache_stats))
+    if prediction_cache is not None:
+        REGISTRY.register_collector(cache_collector('predictions', prediction_cache.stats))
+    # One publisher per city feeds every open dashboard
+    live_feed = LiveFeed(prefetcher.get_aggregated_data,
+                         lambda city, lat, lon: predict_for_location(city, lat, lon, {'city': city}),
+                         forecast=lambda city, lat, lon: forecast_for_location(city, lat, lon, {'city': city}))
+    live_feed.start()
     logger.info("ML model and API integrator loaded successfully")
 except Exception as e:
     logger.error(f"Initialization error: {str(e)}")
     raise
 
+# Used only when neither coordinates nor a resolvable city are given
+DEFAULT_COORDINATES = (28.6139, 77.2090)
+
+def resolve_coordinates(city, lat=None, lon=None):
+    """Use explicit coordinates when given, otherwise look the city up in the location index."""
+    if lat is not None and lon is not None:
+        return float(lat), float(lon)
+    location = api_integrator.resolve_location(city) if city else None
+    if location:
+        return location['lat'], location['lon']
+    return DEFAULT_COORDINATES
+
+@app.before_request
+def start_request_metrics():
+    g.metrics_route = request.endpoint or 'unmatched'
+    g.metrics_started = perf_counter()
+    HTTP_IN_FLIGHT.inc(route=g.metrics_route)
+
+@app.after_request
+def record_request_metrics(response):
+    route = g.get('metrics_route', 'unmatched')
+    HTTP_REQUESTS.inc(route=route, method=request.method, status=response.status_code)
+    HTTP_LATENCY.observe(perf_counter() - g.get('metrics_started', perf_counter()), route=route)
+    return response
+
+@app.teardown_request
+def finish_request_metrics(exc):
+    if 'metrics_route' in g:
+        HTTP_IN_FLIGHT.dec(route=g.metrics_route)
+
+@app.after_request
+def compress_response(response):
+    """Gzip JSON responses for clients that accept it."""
+    if (response.status_code != 200 or response.direct_passthrough or response.is_streamed
+            or response.mimetype != 'application/json' or 'Content-Encoding' in response.headers):
+        return response
+    response.vary.add('Accept-Encoding')
+    if not accepts_gzip(request.headers.get('Accept-Encoding')):
+        return response
+    compressed = gzip_body(response.get_data())
+    if compressed is not None:
+        response.set_data(compressed)
+        response.headers['Content-Encoding'] = 'gzip'
+    return response
+
+def conditional_json(payload):
+    """JSON response with a weak ETag over the data; 304 when the client already has it."""
+    response = jsonify(payload)
+    body, headers = conditional_json_body(json_etag(payload), response.get_data(),
+                                          request.headers.get('Accept-Encoding'),
+                                          request.headers.get('If-None-Match'))
+    if body is None:
+        return Response(status=304, headers=headers)
+    response.set_data(body)
+    response.headers.update(headers)
+    return response
+
+@app.route('/health', methods=['GET'])
+def health():
+    """Readiness probe: 503 until the model has loaded."""
+    status = predictor.get_status()
+    return jsonify(status), 200 if status['ready'] else 503
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    return Response(REGISTRY.render(), content_type=REGISTRY.CONTENT_TYPE)
+
 # New routes for API data
 @app.route('/api/weather/<city>', methods=['GET'])
 def get_weather(city):
     try:
         weather_data = api_integrator.get_weather(city)
-        return jsonify(weather_data)
+        return conditional_json(weather_data)
     except Exception as e:
         logger.error(f"Weather API error: {str(e)}")
         return jsonify({'error': str(e)}), 500
@@ -45,7 +138,7 @@ def get_weather(city):
 def get_air_quality(city):
     try:
         aqi_data = api_integrator.get_air_quality(city)
-        return jsonify(aqi_data)
+        return conditional_json(aqi_data)
     except Exception as e:
         logger.error(f"AQI API error: {str(e)}")
         return jsonify({'error': str(e)}), 500
@@ -53,10 +146,10 @@ def get_air_quality(city):
 @app.route('/api/traffic', methods=['GET'])
 def get_traffic():
     try:
-        lat = float(request.args.get('lat', '28.6139'))
-        lon = float(request.args.get('lon', '77.2090'))
+        lat, lon = resolve_coordinates(request.args.get('city'),
+                                       request.args.get('lat'), request.args.get('lon'))
         traffic_data = api_integrator.get_traffic(lat, lon)
-        return jsonify(traffic_data)
+        return conditional_json(traffic_data)
     except Exception as e:
         logger.error(f"Traffic API error: {str(e)}")
         return jsonify({'error': str(e)}), 500
@@ -65,7 +158,7 @@ def get_traffic():
 def get_industrial():
     try:
         industrial_data = api_integrator.get_industrial_activity()
-        return jsonify(industrial_data)
+        return conditional_json(industrial_data)
     except Exception as e:
         logger.error(f"Industrial API error: {str(e)}")
         return jsonify({'error': str(e)}), 500
@@ -74,7 +167,7 @@ def get_industrial():
 def get_urban(location):
     try:
         urban_data = api_integrator.get_urban_development(location)
-        return jsonify(urban_data)
+        return conditional_json(urban_data)
     except Exception as e:
         logger.error(f"Urban API error: {str(e)}")
         return jsonify({'error': str(e)}), 500
@@ -82,92 +175,121 @@ def get_urban(location):
 @app.route('/api/aggregated/<city>', methods=['GET'])
 def get_aggregated(city):
     try:
-        lat = float(request.args.get('lat', '28.6139'))
-        lon = float(request.args.get('lon', '77.2090'))
-        data = api_integrator.get_aggregated_data(city, lat, lon)
-        return jsonify(data)
+        lat, lon = resolve_coordinates(city, request.args.get('lat'), request.args.get('lon'))
+        data = prefetcher.get_aggregated_data(city, lat, lon)
+        return conditional_json(data)
     except Exception as e:
         logger.error(f"Aggregated API error: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
-@app.route('/predict', methods=['POST'])
-def predict():
+@app.route('/api/aggregated', methods=['GET'])
+def get_bulk_aggregated():
     try:
-        # Get features from request
-        features = request.json
-        city = features.get('city', 'Delhi')
-        lat = float(features.get('lat', '28.6139'))
-        lon = float(features.get('lon', '77.2090'))
-        
+        cities = [c for c in request.args.get('cities', '').split(',') if c.strip()]
+        if not cities:
+            return jsonify({'error': 'Expected ?cities=City1,City2,...'}), 400
+        if len(cities) > BULK_MAX_CITIES:
+            return jsonify({'error': f'Request exceeds {BULK_MAX_CITIES} cities'}), 413
+        return conditional_json(api_integrator.get_bulk_aggregated_data(cities))
+    except Exception as e:
+        logger.error(f"Bulk aggregated API error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/cache/stats', methods=['GET'])
+def get_cache_stats():
+    try:
+        stats = api_integrator.get_cache_stats()
+        if prediction_cache is not None:
+            stats['predictions'] = prediction_cache.stats()
+        return jsonify(stats)
+    except Exception as e:
+        logger.error(f"Cache stats error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/providers/health', methods=['GET'])
+def get_provider_health():
+    try:
+        return jsonify(api_integrator.get_provider_health())
+    except Exception as e:
+        logger.error(f"Provider health error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/prefetch/status', methods=['GET'])
+def get_prefetch_status():
+    try:
+        return jsonify(prefetcher.get_status())
+    except Exception as e:
+        logger.error(f"Prefetch status error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/stream', methods=['GET'])
+def stream():
+    """Server-sent events with the snapshot, prediction and alerts for one city."""
+    city = request.args.get('city', 'Delhi')
+    lat, lon = resolve_coordinates(city, request.args.get('lat'), request.args.get('lon'))
+    subscription = live_feed.subscribe(city, lat, lon)
+    
+    def events():
+        try:
+            # Tell EventSource how long to wait before reconnecting
+            yield 'retry: 5000\n\n'
+            while True:
+                message = subscription.get(timeout=STREAM_HEARTBEAT)
+                yield message if message is not None else ': keep-alive\n\n'
+        finally:
+            live_feed.unsubscribe(subscription)
+    
+    return Response(events(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/api/stream/status', methods=['GET'])
+def get_stream_status():
+    try:
+        return jsonify(live_feed.get_status())
+    except Exception as e:
+        logger.error(f"Stream status error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+def predict_for_location(city, lat, lon, features):
+    """Predict for a location from its aggregated snapshot plus user input, through the prediction cache."""
+    def compute():
         # Get real-time data from APIs
-        api_data = api_integrator.get_aggregated_data(city, lat, lon)
-        
-        # Extract weather data
-        weather = api_data['weather'].get('openweather', {}).get('main', {})
-        
-        # Extract air quality data
-        air = api_data['air_quality'].get('waqi', {}).get('data', {})
-        
-        # Extract traffic data
-        traffic = api_data['traffic'].get('tomtom', {})
-        
-        # Extract industrial data
-        industrial = api_data['industrial'].get('industrial_production', {})
+        with PREDICT_STAGE_LATENCY.time(stage='aggregate'):
+            api_data = prefetcher.get_aggregated_data(city, lat, lon)
         
         # Combine API data with user input
-        enhanced_features = {
-            # Air Quality Parameters
-            'pm25': float(air.get('iaqi', {}).get('pm25', {}).get('v', 0)),
-            'pm10': float(air.get('iaqi', {}).get('pm10', {}).get('v', 0)),
-            'co': float(air.get('iaqi', {}).get('co', {}).get('v', 0)),
-            'no2': float(air.get('iaqi', {}).get('no2', {}).get('v', 0)),
-            
-            # Weather Parameters
-            'temperature': float(weather.get('temp', 25)),
-            'humidity': float(weather.get('humidity', 50)),
-            'wind_speed': float(weather.get('wind_speed', 10)),
-            
-            # Time-based Parameters
-            'season_type': features.get('season_type', 1),
-            'day_of_week': datetime.now().weekday(),
-            'month': datetime.now().month,
-            
-            # Urban Parameters
-            'green_cover_percentage': features.get('green_cover_percentage', 30),
-            'urban_density': features.get('urban_density', 50),
-            
-            # Traffic Parameters
-            'daily_vehicle_count': float(traffic.get('flowSegmentData', {}).get('vehicleCount', 1000)),
-            'peak_hour_density': features.get('peak_hour_density', 70),
-            
-            # Industrial Parameters
-            'emission_levels': features.get('emission_levels', 50),
-            'industrial_activity_index': float(industrial.get('value', 50)),
-            'power_demand': features.get('power_demand', 1000),
-            'production_index': features.get('production_index', 80),
-            'energy_price_index': features.get('energy_price_index', 100),
-            'industrial_consumption': features.get('industrial_consumption', 800),
-            
-            # Safety Parameters
-            'severity_index': features.get('severity_index', 50),
-            'compliance_score': features.get('compliance_score', 80),
-            'violation_index': features.get('violation_index', 20),
-            'pollen_level': features.get('pollen_level', 30)
-        }
+        with PREDICT_STAGE_LATENCY.time(stage='features'):
+            enhanced_features, data_sources = build_features(api_data, features)
         
         # Make prediction with enhanced features
-        result = predictor.predict(enhanced_features)
+        with PREDICT_STAGE_LATENCY.time(stage='inference'):
+            result = inference.predict(enhanced_features)
         
         # Add API data sources to result
-        result['data_sources'] = {
-            'weather': bool(weather),
-            'air_quality': bool(air),
-            'traffic': bool(traffic),
-            'industrial': bool(industrial)
-        }
+        result['data_sources'] = data_sources
+        result['source_status'] = api_data.get('sources', {})
+        return result
+    
+    if prediction_cache is None:
+        return compute()
+    
+    # Viewers of the same location share one prediction per window
+    key = prediction_cache.key(city, lat, lon, features, predictor.model_version)
+    return prediction_cache.get_or_compute(
+        key, lambda: prefetcher.snapshot_version(city, lat, lon), compute)
+
+@app.route('/predict', methods=['POST'])
+def predict():
+    try:
+        # Get features from request
+        features = request.json
+        city = features.get('city', 'Delhi')
+        lat, lon = resolve_coordinates(city, features.get('lat'), features.get('lon'))
         
-        return jsonify(result)
+        return jsonify(predict_for_location(city, lat, lon, features))
     
+    except ModelNotReady as e:
+        return jsonify({'error': 'Model not ready', 'message': str(e)}), 503, {'Retry-After': '5'}
     except Exception as e:
         logger.error(f"Prediction error: {str(e)}")
         return jsonify({
@@ -175,5 +297,73 @@ def predict():
             'message': str(e)
         }), 500
 
+def forecast_for_location(city, lat, lon, features):
+    """Multi-horizon forecast for a location, built from the same snapshot and inputs as predictions."""
+    def compute():
+        api_data = prefetcher.get_aggregated_data(city, lat, lon)
+        enhanced_features, data_sources = build_features(api_data, features)
+        result = predictor.forecast(enhanced_features)
+        result['data_sources'] = data_sources
+        return result
+
+    if prediction_cache is None:
+        return compute()
+
+    # Shares the prediction cache; the marker keeps forecasts apart from single predictions
+    key = prediction_cache.key(city, lat, lon, {**features, 'forecast': FORECAST_MAX_HOURS}, predictor.model_version)
+    return prediction_cache.get_or_compute(
+        key, lambda: prefetcher.snapshot_version(city, lat, lon), compute)
+
+@app.route('/forecast', methods=['POST'])
+def forecast():
+    try:
+        # Same body as /predict: location plus optional overrides
+        features = request.json or {}
+        city = features.get('city', 'Delhi')
+        lat, lon = resolve_coordinates(city, features.get('lat'), features.get('lon'))
+
+        return jsonify(forecast_for_location(city, lat, lon, features))
+
+    except ModelNotReady as e:
+        return jsonify({'error': 'Model not ready', 'message': str(e)}), 503, {'Retry-After': '5'}
+    except Exception as e:
+        logger.error(f"Forecast error: {str(e)}")
+        return jsonify({
+            'error': 'Forecast failed',
+            'message': str(e)
+        }), 500
+
+@app.route('/predict/batch', methods=['POST'])
+def predict_batch():
+    try:
+        # None for a missing or malformed body, which is rejected below
+        payload = request.get_json(silent=True)
+        # Accept either a bare list of feature sets or {"features": [...], "hours": n}
+        if isinstance(payload, list):
+            features_list, hours = payload, 1
+        elif isinstance(payload, dict):
+            features_list, hours = payload.get('features'), payload.get('hours', 1)
+        else:
+            return jsonify({'error': 'Expected a list of feature objects or {"features": [...], "hours": n}'}), 400
+
+        if not isinstance(features_list, list) or not all(isinstance(f, dict) for f in features_list):
+            return jsonify({'error': 'Expected a list of feature objects'}), 400
+        if isinstance(hours, bool) or not isinstance(hours, int) or hours < 1:
+            return jsonify({'error': 'hours must be a positive integer'}), 400
+        if len(features_list) > MAX_BATCH_SIZE:
+            return jsonify({'error': f'Batch exceeds {MAX_BATCH_SIZE} feature sets'}), 413
+
+        predictions = predictor.batch_predict(features_list, hours=hours)
+        return jsonify({'count': len(predictions), 'predictions': predictions})
+
+    except ModelNotReady as e:
+        return jsonify({'error': 'Model not ready', 'message': str(e)}), 503, {'Retry-After': '5'}
+    except Exception as e:
+        logger.error(f"Batch prediction error: {str(e)}")
+        return jsonify({
+            'error': 'Batch prediction failed',
+            'message': str(e)
+        }), 500
+
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5000, debug=True)
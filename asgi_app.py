@@ -0,0 +1,433 @@
+"""
+Async backend API for Smart AQI Guardian
+Serves the same routes as app.py on an event loop, so in-flight requests wait
+on upstream providers without holding a thread each
+
+Usage:
+    uvicorn asgi_app:app --host 0.0.0.0 --port 5000
+"""
+
+import asyncio
+import contextlib
+import logging
+from time import perf_counter
+
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route, Match
+
+from predict import AQIPredictor, ModelNotReady
+from async_integrator import AsyncAPIIntegrator
+from feature_builder import build_features
+from prefetcher import SnapshotPrefetcher
+from micro_batcher import MicroBatcher
+from prediction_cache import PredictionCache
+from live_feed import LiveFeed, AsyncSubscription
+from http_caching import json_etag, conditional_json_body
+from metrics import (REGISTRY, HTTP_REQUESTS, HTTP_LATENCY, HTTP_IN_FLIGHT,
+                     PREDICT_STAGE_LATENCY, cache_collector)
+from config import (PREFETCH_ENABLED, MAX_BATCH_SIZE, MICRO_BATCH_ENABLED, PREDICTION_CACHE_ENABLED,
+                    STREAM_HEARTBEAT, BULK_MAX_CITIES, GZIP_MIN_SIZE, GZIP_LEVEL, FORECAST_MAX_HOURS)
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Initialize components
+try:
+    predictor = AQIPredictor()
+    # Concurrent single predictions share model calls when micro-batching is on
+    inference = MicroBatcher(predictor) if MICRO_BATCH_ENABLED else predictor
+    api_integrator = AsyncAPIIntegrator()
+    prefetcher = SnapshotPrefetcher(api_integrator)
+    prediction_cache = PredictionCache() if PREDICTION_CACHE_ENABLED else None
+    # Cache counters are read from the caches' own stats at scrape time
+    REGISTRY.register_collector(cache_collector('upstream', api_integrator.get_cache_stats))
+    if prediction_cache is not None:
+        REGISTRY.register_collector(cache_collector('predictions', prediction_cache.stats))
+    # One publisher per city feeds every open dashboard; it runs in threads
+    live_feed = LiveFeed(prefetcher.get_aggregated_data, lambda city, lat, lon: feed_prediction(city, lat, lon),
+                         forecast=lambda city, lat, lon: feed_forecast(city, lat, lon))
+    logger.info("ML model and async API integrator loaded successfully")
+except Exception as e:
+    logger.error(f"Initialization error: {str(e)}")
+    raise
+
+# Used only when neither coordinates nor a resolvable city are given
+DEFAULT_COORDINATES = (28.6139, 77.2090)
+
+async def resolve_coordinates(city, lat=None, lon=None):
+    """Use explicit coordinates when given, otherwise look the city up in the location index."""
+    if lat is not None and lon is not None:
+        return float(lat), float(lon)
+    location = await api_integrator.aresolve_location(city) if city else None
+    if location:
+        return location['lat'], location['lon']
+    return DEFAULT_COORDINATES
+
+async def aggregated_data(city, lat, lon):
+    """Serve the prefetcher's snapshot, fetching concurrently on a miss."""
+    data = prefetcher.peek(city, lat, lon)
+    if data is not None:
+        return data
+    fresh = await api_integrator.aget_aggregated_data(city, lat, lon)
+    return prefetcher.store(city, lat, lon, fresh)
+
+def feed_prediction(city, lat, lon):
+    """Blocking prediction for the live feed, sharing the /predict cache entry for the city."""
+    features = {'city': city}
+
+    def compute():
+        api_data = prefetcher.get_aggregated_data(city, lat, lon)
+        enhanced_features, data_sources = build_features(api_data, features)
+        result = inference.predict(enhanced_features)
+        result['data_sources'] = data_sources
+        result['source_status'] = api_data.get('sources', {})
+        return result
+
+    if prediction_cache is None:
+        return compute()
+    key = prediction_cache.key(city, lat, lon, features, predictor.model_version)
+    return prediction_cache.get_or_compute(
+        key, lambda: prefetcher.snapshot_version(city, lat, lon), compute)
+
+def feed_forecast(city, lat, lon):
+    """Blocking forecast for the live feed, sharing the /forecast cache entry for the city."""
+    features = {'city': city}
+
+    def compute():
+        api_data = prefetcher.get_aggregated_data(city, lat, lon)
+        enhanced_features, data_sources = build_features(api_data, features)
+        result = predictor.forecast(enhanced_features)
+        result['data_sources'] = data_sources
+        return result
+
+    if prediction_cache is None:
+        return compute()
+    key = prediction_cache.key(city, lat, lon, {**features, 'forecast': FORECAST_MAX_HOURS},
+                               predictor.model_version)
+    return prediction_cache.get_or_compute(
+        key, lambda: prefetcher.snapshot_version(city, lat, lon), compute)
+
+def error_response(message, e, status_code=500):
+    logger.error(f"{message}: {str(e)}")
+    return JSONResponse({'error': str(e)}, status_code=status_code)
+
+def conditional_json(request, payload):
+    """JSON response with a weak ETag over the data; 304 when the client already has it."""
+    # Compressed here, like the Flask app, so the gzip variant gets its own tag;
+    # GZipMiddleware passes responses with a Content-Encoding through untouched
+    body, headers = conditional_json_body(json_etag(payload), JSONResponse(payload).body,
+                                          request.headers.get('accept-encoding'),
+                                          request.headers.get('if-none-match'))
+    if body is None:
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type='application/json', headers=headers)
+
+def not_ready_response(e):
+    return JSONResponse({'error': 'Model not ready', 'message': str(e)},
+                        status_code=503, headers={'Retry-After': '5'})
+
+async def health(request: Request):
+    """Readiness probe: 503 until the model has loaded."""
+    status = predictor.get_status()
+    return JSONResponse(status, status_code=200 if status['ready'] else 503)
+
+async def get_metrics(request: Request):
+    return Response(REGISTRY.render(), headers={'Content-Type': REGISTRY.CONTENT_TYPE})
+
+async def get_weather(request: Request):
+    try:
+        return conditional_json(request, await api_integrator.aget_weather(request.path_params['city']))
+    except Exception as e:
+        return error_response("Weather API error", e)
+
+async def get_air_quality(request: Request):
+    try:
+        return conditional_json(request, await api_integrator.aget_air_quality(request.path_params['city']))
+    except Exception as e:
+        return error_response("AQI API error", e)
+
+async def get_traffic(request: Request):
+    try:
+        lat, lon = await resolve_coordinates(request.query_params.get('city'),
+                                             request.query_params.get('lat'),
+                                             request.query_params.get('lon'))
+        return conditional_json(request, await api_integrator.aget_traffic(lat, lon))
+    except Exception as e:
+        return error_response("Traffic API error", e)
+
+async def get_industrial(request: Request):
+    try:
+        return conditional_json(request, await api_integrator.aget_industrial_activity())
+    except Exception as e:
+        return error_response("Industrial API error", e)
+
+async def get_urban(request: Request):
+    try:
+        return conditional_json(request, await api_integrator.aget_urban_development(request.path_params['location']))
+    except Exception as e:
+        return error_response("Urban API error", e)
+
+async def get_aggregated(request: Request):
+    try:
+        city = request.path_params['city']
+        lat, lon = await resolve_coordinates(city, request.query_params.get('lat'),
+                                             request.query_params.get('lon'))
+        return conditional_json(request, await aggregated_data(city, lat, lon))
+    except Exception as e:
+        return error_response("Aggregated API error", e)
+
+async def get_bulk_aggregated(request: Request):
+    try:
+        cities = [c for c in request.query_params.get('cities', '').split(',') if c.strip()]
+        if not cities:
+            return JSONResponse({'error': 'Expected ?cities=City1,City2,...'}, status_code=400)
+        if len(cities) > BULK_MAX_CITIES:
+            return JSONResponse({'error': f'Request exceeds {BULK_MAX_CITIES} cities'}, status_code=413)
+        return conditional_json(request, await api_integrator.aget_bulk_aggregated_data(cities))
+    except Exception as e:
+        return error_response("Bulk aggregated API error", e)
+
+async def get_cache_stats(request: Request):
+    try:
+        stats = api_integrator.get_cache_stats()
+        if prediction_cache is not None:
+            stats['predictions'] = prediction_cache.stats()
+        return JSONResponse(stats)
+    except Exception as e:
+        return error_response("Cache stats error", e)
+
+async def get_provider_health(request: Request):
+    try:
+        return JSONResponse(api_integrator.get_provider_health())
+    except Exception as e:
+        return error_response("Provider health error", e)
+
+async def get_prefetch_status(request: Request):
+    try:
+        return JSONResponse(prefetcher.get_status())
+    except Exception as e:
+        return error_response("Prefetch status error", e)
+
+async def stream(request: Request):
+    """Server-sent events with the snapshot, prediction and alerts for one city."""
+    city = request.query_params.get('city', 'Delhi')
+    lat, lon = await resolve_coordinates(city, request.query_params.get('lat'),
+                                         request.query_params.get('lon'))
+    subscription = live_feed.subscribe(
+        city, lat, lon, AsyncSubscription(LiveFeed.topic(city, lat, lon), asyncio.get_running_loop()))
+
+    async def events():
+        try:
+            # Tell EventSource how long to wait before reconnecting
+            yield 'retry: 5000\n\n'
+            while True:
+                message = await subscription.aget(timeout=STREAM_HEARTBEAT)
+                yield message if message is not None else ': keep-alive\n\n'
+        finally:
+            live_feed.unsubscribe(subscription)
+
+    return StreamingResponse(events(), media_type='text/event-stream',
+                             headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+async def get_stream_status(request: Request):
+    try:
+        return JSONResponse(live_feed.get_status())
+    except Exception as e:
+        return error_response("Stream status error", e)
+
+async def predict(request: Request):
+    try:
+        # Get features from request
+        features = await request.json()
+        city = features.get('city', 'Delhi')
+        lat, lon = await resolve_coordinates(city, features.get('lat'), features.get('lon'))
+
+        async def compute():
+            # Get real-time data from APIs
+            with PREDICT_STAGE_LATENCY.time(stage='aggregate'):
+                api_data = await aggregated_data(city, lat, lon)
+
+            # Combine API data with user input
+            with PREDICT_STAGE_LATENCY.time(stage='features'):
+                enhanced_features, data_sources = build_features(api_data, features)
+
+            # Model inference is CPU-bound; keep it off the event loop
+            with PREDICT_STAGE_LATENCY.time(stage='inference'):
+                result = await run_in_threadpool(inference.predict, enhanced_features)
+
+            # Add API data sources to result
+            result['data_sources'] = data_sources
+            result['source_status'] = api_data.get('sources', {})
+            return result
+
+        if prediction_cache is None:
+            return JSONResponse(await compute())
+        # Viewers of the same location share one prediction per window, and
+        # concurrent misses share one computation
+        key = prediction_cache.key(city, lat, lon, features, predictor.model_version)
+        return JSONResponse(await prediction_cache.aget_or_compute(
+            key, lambda: prefetcher.snapshot_version(city, lat, lon), compute))
+
+    except ModelNotReady as e:
+        return not_ready_response(e)
+    except Exception as e:
+        logger.error(f"Prediction error: {str(e)}")
+        return JSONResponse({
+            'error': 'Prediction failed',
+            'message': str(e)
+        }, status_code=500)
+
+async def forecast(request: Request):
+    try:
+        # Same body as /predict: location plus optional overrides
+        features = await request.json()
+        city = features.get('city', 'Delhi')
+        lat, lon = await resolve_coordinates(city, features.get('lat'), features.get('lon'))
+
+        async def compute():
+            api_data = await aggregated_data(city, lat, lon)
+            enhanced_features, data_sources = build_features(api_data, features)
+            # All horizons are scored in one batched call, off the event loop
+            result = await run_in_threadpool(predictor.forecast, enhanced_features)
+            result['data_sources'] = data_sources
+            return result
+
+        if prediction_cache is None:
+            return JSONResponse(await compute())
+        # Shares the prediction cache; the marker keeps forecasts apart from single predictions
+        key = prediction_cache.key(city, lat, lon, {**features, 'forecast': FORECAST_MAX_HOURS},
+                                   predictor.model_version)
+        return JSONResponse(await prediction_cache.aget_or_compute(
+            key, lambda: prefetcher.snapshot_version(city, lat, lon), compute))
+
+    except ModelNotReady as e:
+        return not_ready_response(e)
+    except Exception as e:
+        logger.error(f"Forecast error: {str(e)}")
+        return JSONResponse({
+            'error': 'Forecast failed',
+            'message': str(e)
+        }, status_code=500)
+
+async def predict_batch(request: Request):
+    try:
+        try:
+            payload = await request.json()
+        except ValueError:
+            # Missing or malformed body, rejected below
+            payload = None
+        # Accept either a bare list of feature sets or {"features": [...], "hours": n}
+        if isinstance(payload, list):
+            features_list, hours = payload, 1
+        elif isinstance(payload, dict):
+            features_list, hours = payload.get('features'), payload.get('hours', 1)
+        else:
+            return JSONResponse({'error': 'Expected a list of feature objects or {"features": [...], "hours": n}'},
+                                status_code=400)
+
+        if not isinstance(features_list, list) or not all(isinstance(f, dict) for f in features_list):
+            return JSONResponse({'error': 'Expected a list of feature objects'}, status_code=400)
+        if isinstance(hours, bool) or not isinstance(hours, int) or hours < 1:
+            return JSONResponse({'error': 'hours must be a positive integer'}, status_code=400)
+        if len(features_list) > MAX_BATCH_SIZE:
+            return JSONResponse({'error': f'Batch exceeds {MAX_BATCH_SIZE} feature sets'}, status_code=413)
+
+        predictions = await run_in_threadpool(predictor.batch_predict, features_list, hours=hours)
+        return JSONResponse({'count': len(predictions), 'predictions': predictions})
+
+    except ModelNotReady as e:
+        return not_ready_response(e)
+    except Exception as e:
+        logger.error(f"Batch prediction error: {str(e)}")
+        return JSONResponse({
+            'error': 'Batch prediction failed',
+            'message': str(e)
+        }, status_code=500)
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    if PREFETCH_ENABLED:
+        prefetcher.start()
+    live_feed.start()
+    yield
+    live_feed.stop()
+    prefetcher.stop()
+    if MICRO_BATCH_ENABLED:
+        inference.close()
+    await api_integrator.aclose()
+
+routes = [
+    Route('/health', health, methods=['GET']),
+    Route('/metrics', get_metrics, methods=['GET']),
+    Route('/api/weather/{city}', get_weather, methods=['GET']),
+    Route('/api/air-quality/{city}', get_air_quality, methods=['GET']),
+    Route('/api/traffic', get_traffic, methods=['GET']),
+    Route('/api/industrial', get_industrial, methods=['GET']),
+    Route('/api/urban/{location}', get_urban, methods=['GET']),
+    Route('/api/aggregated', get_bulk_aggregated, methods=['GET']),
+    Route('/api/aggregated/{city}', get_aggregated, methods=['GET']),
+    Route('/api/cache/stats', get_cache_stats, methods=['GET']),
+    Route('/api/providers/health', get_provider_health, methods=['GET']),
+    Route('/api/prefetch/status', get_prefetch_status, methods=['GET']),
+    Route('/api/stream', stream, methods=['GET']),
+    Route('/api/stream/status', get_stream_status, methods=['GET']),
+    Route('/predict', predict, methods=['POST']),
+    Route('/predict/batch', predict_batch, methods=['POST']),
+    Route('/forecast', forecast, methods=['POST'])
+]
+
+class MetricsMiddleware:
+    """Records per-route request counts, latency and in-flight gauges."""
+
+    def __init__(self, app):
+        self.app = app
+
+    @staticmethod
+    def _route_name(scope):
+        for route in routes:
+            match, _ = route.matches(scope)
+            if match != Match.NONE:
+                return route.endpoint.__name__
+        return 'unmatched'
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        route = self._route_name(scope)
+        status = [500]
+
+        async def send_with_status(message):
+            if message['type'] == 'http.response.start':
+                status[0] = message['status']
+            await send(message)
+
+        started = perf_counter()
+        try:
+            with HTTP_IN_FLIGHT.track(route=route):
+                await self.app(scope, receive, send_with_status)
+        finally:
+            HTTP_REQUESTS.inc(route=route, method=scope['method'], status=status[0])
+            HTTP_LATENCY.observe(perf_counter() - started, route=route)
+
+app = Starlette(
+    routes=routes,
+    middleware=[Middleware(MetricsMiddleware),
+                # Event streams are left uncompressed by the middleware (Starlette >= 0.46)
+                Middleware(GZipMiddleware, minimum_size=GZIP_MIN_SIZE, compresslevel=GZIP_LEVEL),
+                Middleware(CORSMiddleware, allow_origins=["http://localhost:3000"],
+                           allow_methods=['GET', 'POST'], allow_headers=['Content-Type'])],
+    lifespan=lifespan
+)
+
+if __name__ == '__main__':
+    import uvicorn
+    uvicorn.run(app, host='0.0.0.0', port=5000)
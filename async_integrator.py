@@ -0,0 +1,288 @@
+"""
+Async API Integration Layer for Smart AQI Guardian
+Awaits upstream calls on an event loop instead of holding a thread per request
+"""
+
+import asyncio
+import random
+from datetime import datetime
+from time import monotonic
+from typing import Dict, Any, Optional, Callable, Awaitable, Tuple, List
+import logging
+
+import httpx
+import requests
+
+from config import (SOURCE_DEADLINES, DEFAULT_SOURCE_DEADLINE, HTTP_TIMEOUT,
+                    HTTP_MAX_RETRIES, HTTP_BACKOFF_BASE, HTTP_BACKOFF_MAX, HTTP_RETRY_STATUSES,
+                    ASYNC_HTTP_MAX_CONNECTIONS, ASYNC_HTTP_MAX_KEEPALIVE)
+from api_integrator import APIIntegrator
+from response_cache import ResponseCache, TieredResponseCache
+from metrics import UPSTREAM_RETRIES
+
+# Transport failures worth retrying, from the live client and from the replayer
+RETRYABLE_ERRORS = (httpx.TransportError, requests.ConnectionError, requests.Timeout)
+
+
+class AsyncAPIIntegrator(APIIntegrator):
+    """
+    APIIntegrator with awaitable getters for the ASGI app.
+
+    The async getters share the response cache, circuit breakers, fallback
+    cache and location index with the synchronous ones, so the snapshot
+    prefetcher can keep refreshing through the inherited thread-based path.
+    Upstream requests go through one pooled httpx.AsyncClient; the FRED
+    series merge, first-time geocoding and any response cache access that
+    reaches SQLite run in worker threads.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.logger = logging.getLogger('AsyncAPIIntegrator')
+        # Created on first use so it binds to the serving event loop
+        self._client = None
+        self._ainflight = {}
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """Get the shared async client, creating it on first use."""
+        if self._client is None:
+            connect, read = HTTP_TIMEOUT
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(read, connect=connect),
+                limits=httpx.Limits(max_connections=ASYNC_HTTP_MAX_CONNECTIONS,
+                                    max_keepalive_connections=ASYNC_HTTP_MAX_KEEPALIVE))
+        return self._client
+
+    async def aclose(self):
+        """Close the async client, then the pooled sessions and fetch pool."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        self.close()
+
+    async def _asend(self, provider: str, url: str, headers: Optional[Dict] = None):
+        """Send one GET, or replay it from fixtures in replay mode."""
+        if self.replayer is not None:
+            return await asyncio.to_thread(self.replayer.get, provider, url)
+
+        response = await self._get_client().get(url, headers=headers)
+        if self.recorder is not None and response.is_success:
+            self.recorder.record(provider, url, response)
+        return response
+
+    async def _afetch(self, provider: str, url: str, headers: Optional[Dict] = None):
+        """Async counterpart of _fetch with the same retry and backoff policy."""
+        for attempt in range(HTTP_MAX_RETRIES + 1):
+            try:
+                response = await self._asend(provider, url, headers)
+                if response.status_code not in HTTP_RETRY_STATUSES:
+                    response.raise_for_status()
+                    return response
+                error = requests.HTTPError(f"{response.status_code} from {provider}")
+            except RETRYABLE_ERRORS as e:
+                error = e
+
+            if attempt == HTTP_MAX_RETRIES:
+                raise error
+            UPSTREAM_RETRIES.inc(provider=provider)
+            delay = random.uniform(0, min(HTTP_BACKOFF_MAX, HTTP_BACKOFF_BASE * 2 ** attempt))
+            self.logger.warning(f"Retrying {provider} in {delay:.2f}s after: {str(error)}")
+            await asyncio.sleep(delay)
+
+    async def _acache_get(self, key: str):
+        """
+        Look key up without blocking the event loop. Memory-tier hits are
+        answered inline; lookups that reach the SQLite tier, which writes
+        hit counts even on reads, run in a worker thread.
+        """
+        if isinstance(self.cache, ResponseCache):
+            return self.cache.get(key)
+        if isinstance(self.cache, TieredResponseCache):
+            entry = self.cache.memory.get(key)
+            if entry is not None:
+                return entry
+        return await asyncio.to_thread(self.cache.get, key)
+
+    async def _astore(self, store: Callable[..., Dict], *args) -> Dict:
+        """Run _store_success or _store_failure, in a worker thread unless the cache is memory only."""
+        if isinstance(self.cache, ResponseCache):
+            return store(*args)
+        return await asyncio.to_thread(store, *args)
+
+    async def _afetch_and_store(self, provider: str, key: str, url: str,
+                                headers: Optional[Dict] = None) -> Dict:
+        """Async counterpart of _fetch_and_store."""
+        fallback = self._open_circuit_fallback(provider, key)
+        if fallback is not None:
+            return fallback
+
+        started = monotonic()
+        try:
+            response = await self._afetch(provider, url, headers)
+            data = self._project(provider, response.json())
+        except Exception as e:
+            return await self._astore(self._store_failure, provider, key, e, started)
+        return await self._astore(self._store_success, provider, key, data, started)
+
+    async def _afill(self, provider: str, key: str, url: str, headers: Optional[Dict] = None) -> Dict:
+        """Fetch and store key, unless a flight that finished during the lookup already stored it."""
+        entry = await self._acache_get(key)
+        if entry is not None:
+            return entry.value
+        return await self._afetch_and_store(provider, key, url, headers)
+
+    async def _acached_request(self, provider: str, url: str, headers: Optional[Dict] = None) -> Dict:
+        """
+        Make a cached API request without blocking the event loop.
+
+        Concurrent misses for the same key await one shared task, which is
+        shielded so a cancelled caller does not abort it for the others.
+        """
+        key = self._cache_key(url, headers)
+        entry = await self._acache_get(key)
+        if entry is not None:
+            return entry.value
+
+        task = self._ainflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._afill(provider, key, url, headers))
+            self._ainflight[key] = task
+            task.add_done_callback(lambda _: self._ainflight.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def _arequest_all(self, requests_by_name: Dict[str, Tuple[str, str, Optional[Dict]]]) -> Dict[str, Any]:
+        """Run a group of cached requests concurrently and stamp the result."""
+        names = list(requests_by_name)
+        results = await asyncio.gather(*(self._acached_request(provider, url, headers=headers)
+                                         for provider, url, headers in requests_by_name.values()))
+        data = dict(zip(names, results))
+        data['timestamp'] = datetime.utcnow().isoformat()
+        return data
+
+    async def aget_air_quality(self, city: str) -> Dict[str, Any]:
+        """Get air quality data from multiple sources."""
+        try:
+            return await self._arequest_all(self._air_quality_requests(city))
+        except Exception as e:
+            self.logger.error(f"Error getting air quality data: {str(e)}")
+            return {}
+
+    async def aget_weather(self, city: str) -> Dict[str, Any]:
+        """Get weather data from multiple sources."""
+        try:
+            return await self._arequest_all(self._weather_requests(city))
+        except Exception as e:
+            self.logger.error(f"Error getting weather data: {str(e)}")
+            return {}
+
+    async def aget_traffic(self, lat: float, lon: float) -> Dict[str, Any]:
+        """Get traffic data from multiple sources."""
+        try:
+            return await self._arequest_all(self._traffic_requests(lat, lon))
+        except Exception as e:
+            self.logger.error(f"Error getting traffic data: {str(e)}")
+            return {}
+
+    async def aget_industrial_activity(self) -> Dict[str, Any]:
+        """Get industrial activity data; the series merge runs in a worker thread."""
+        return await asyncio.to_thread(self.get_industrial_activity)
+
+    async def aresolve_location(self, city: str) -> Optional[Dict[str, Any]]:
+        """Resolve a city, leaving the loop only when it has to be geocoded."""
+        location = self.locations.get(city)
+        if location is not None:
+            return location
+        return await asyncio.to_thread(self.resolve_location, city)
+
+    async def aget_urban_development(self, location: str) -> Dict[str, Any]:
+        """Get urban development data."""
+        try:
+            urban_data = await self.aresolve_location(location)
+            return {
+                'urban_data': urban_data or {},
+                'timestamp': datetime.utcnow().isoformat()
+            }
+        except Exception as e:
+            self.logger.error(f"Error getting urban data: {str(e)}")
+            return {}
+
+    def _aaggregated_sources(self, city: str, lat: float, lon: float) -> Dict[str, Callable[[], Awaitable[Dict[str, Any]]]]:
+        """Map each aggregated source name to the coroutine function that fetches it."""
+        return {
+            'air_quality': lambda: self.aget_air_quality(city),
+            'weather': lambda: self.aget_weather(city),
+            'traffic': lambda: self.aget_traffic(lat, lon),
+            'industrial': self.aget_industrial_activity,
+            'urban': lambda: self.aget_urban_development(city)
+        }
+
+    async def _afetch_sources_concurrently(self, sources: Dict[str, Callable[[], Awaitable[Dict[str, Any]]]],
+                                           deadlines: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
+        """
+        Async counterpart of _fetch_sources_concurrently.
+
+        Sources that miss their deadline are reported as 'timeout' and keep
+        running so their results still reach the cache.
+        """
+        deadlines = {**SOURCE_DEADLINES, **(deadlines or {})}
+        started = monotonic()
+        finished_at = {}
+        tasks = {}
+        for name, fetch in sources.items():
+            tasks[name] = asyncio.ensure_future(fetch())
+            tasks[name].add_done_callback(
+                lambda _, name=name: finished_at.setdefault(name, monotonic()))
+
+        async def collect(name: str) -> Tuple[Dict[str, Any], str]:
+            deadline = deadlines.get(name, DEFAULT_SOURCE_DEADLINE)
+            try:
+                result = await asyncio.wait_for(asyncio.shield(tasks[name]), deadline)
+                return result, 'ok' if result else 'empty'
+            except asyncio.TimeoutError:
+                self.logger.warning(f"Source '{name}' missed its {deadline}s deadline")
+                return {}, 'timeout'
+            except Exception as e:
+                self.logger.error(f"Source '{name}' failed: {str(e)}")
+                return {}, 'error'
+
+        collected = await asyncio.gather(*(collect(name) for name in sources))
+
+        data = {}
+        status = {}
+        for name, (result, state) in zip(sources, collected):
+            data[name] = result
+            elapsed = finished_at.get(name, monotonic()) - started
+            status[name] = {
+                'status': state,
+                'elapsed_ms': round(elapsed * 1000, 1),
+                'deadline_ms': round(deadlines.get(name, DEFAULT_SOURCE_DEADLINE) * 1000)
+            }
+        data['sources'] = status
+        return data
+
+    async def aget_aggregated_data(self, city: str, lat: float, lon: float,
+                                   deadlines: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
+        """Get aggregated data from all sources concurrently; same layout as get_aggregated_data."""
+        data = await self._afetch_sources_concurrently(self._aaggregated_sources(city, lat, lon), deadlines)
+        data['timestamp'] = datetime.utcnow().isoformat()
+        return data
+
+    async def _atraffic_for_city(self, city: str) -> Dict[str, Any]:
+        """Traffic around a city's indexed coordinates."""
+        location = await self.aresolve_location(city)
+        return await self.aget_traffic(location['lat'], location['lon']) if location else {}
+
+    async def aget_bulk_aggregated_data(self, cities: List[str],
+                                        deadlines: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
+        """Get aggregated data for several cities; same layout as get_bulk_aggregated_data."""
+        cities = self._unique_cities(cities)
+        sources = {'industrial': self.aget_industrial_activity}
+        for city in cities:
+            sources.update({
+                f"{city}/air_quality": lambda city=city: self.aget_air_quality(city),
+                f"{city}/weather": lambda city=city: self.aget_weather(city),
+                f"{city}/traffic": lambda city=city: self._atraffic_for_city(city),
+                f"{city}/urban": lambda city=city: self.aget_urban_development(city)
+            })
+        data = await self._afetch_sources_concurrently(sources, self._bulk_deadlines(cities, deadlines))
+        return self._bulk_layout(cities, data)
@@ -0,0 +1,80 @@
+"""
+Inference parallelism benchmark for the Smart AQI Guardian model
+Compares the pickled n_jobs=-1 setting, serial scoring and InferencePolicy
+across batch sizes to find where parallel scoring starts to pay off.
+
+Usage:
+    python bench_inference.py
+    python bench_inference.py --sizes 1,16,256,1024,4096 --threads 4 --repeat 20
+"""
+
+import argparse
+import copy
+import warnings
+from time import perf_counter
+
+import joblib
+import numpy as np
+
+from config import MODEL_PATH
+from inference_policy import InferencePolicy
+
+
+def _best_of(fn, matrix, repeat: int) -> float:
+    fn(matrix)  # warm up
+    timings = []
+    for _ in range(repeat):
+        started = perf_counter()
+        fn(matrix)
+        timings.append(perf_counter() - started)
+    return min(timings)
+
+
+def run(sizes, threads: int, repeat: int):
+    # The model was fitted on a DataFrame; serving scores plain arrays
+    warnings.filterwarnings('ignore', message='X does not have valid feature names')
+    model = joblib.load(MODEL_PATH)
+    n_features = model.n_features_in_
+    all_cores = copy.deepcopy(model)
+    all_cores.n_jobs = -1
+    serial = copy.deepcopy(model)
+    serial.n_jobs = 1
+    rng = np.random.default_rng(42)
+
+    print(f"\n=== {model.n_estimators} trees, {n_features} features, {threads} thread budget ===")
+    print(f"{'rows':>7} {'n_jobs=-1':>12} {'serial':>12} {'chunked':>12}  faster")
+    crossover = None
+    for rows in sizes:
+        matrix = rng.standard_normal((rows, n_features))
+        # Force the chunked path at every size to measure it on its own
+        chunked = InferencePolicy(copy.deepcopy(model), min_parallel_rows=1, max_threads=threads)
+        results = {
+            'n_jobs=-1': _best_of(all_cores.predict, matrix, repeat),
+            'serial': _best_of(serial.predict, matrix, repeat),
+            'chunked': _best_of(chunked.predict, matrix, repeat) if rows > 1 else float('nan')
+        }
+        faster = 'chunked' if results['chunked'] < results['serial'] else 'serial'
+        if faster == 'chunked' and crossover is None:
+            crossover = rows
+        print(f"{rows:>7} " + ' '.join(f"{results[k] * 1000:>10.2f}ms" for k in results) + f"  {faster}")
+
+    if crossover is None:
+        print("\nSerial was fastest at every size; keep INFERENCE_PARALLEL_MIN_ROWS above the largest batch")
+    else:
+        print(f"\nChunked scoring first wins at {crossover} rows; "
+              f"set INFERENCE_PARALLEL_MIN_ROWS (AQI_INFERENCE_PARALLEL_MIN_ROWS) near it")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark serial vs parallel model inference')
+    parser.add_argument('--sizes', default='1,8,32,128,512,2048,8192',
+                        help='Comma-separated batch sizes')
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    run([int(s) for s in args.sizes.split(',')], args.threads, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
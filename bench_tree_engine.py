@@ -0,0 +1,66 @@
+"""
+Tree engine benchmark for the Smart AQI Guardian model
+Compares sklearn's RandomForestRegressor.predict with the flat-array
+TreeEngine on single rows and batches, and checks that they agree.
+
+Usage:
+    python bench_tree_engine.py
+    python bench_tree_engine.py --sizes 1,4,16,64,256,1024 --repeat 50
+"""
+
+import argparse
+import warnings
+from time import perf_counter
+
+import joblib
+import numpy as np
+
+from config import MODEL_PATH, SCALER_PATH
+from tree_engine import TreeEngine
+
+
+def _best_of(fn, matrix, repeat: int) -> float:
+    fn(matrix)  # warm up
+    timings = []
+    for _ in range(repeat):
+        started = perf_counter()
+        fn(matrix)
+        timings.append(perf_counter() - started)
+    return min(timings)
+
+
+def run(sizes, repeat: int):
+    # The model was fitted on a DataFrame; serving scores plain arrays
+    warnings.filterwarnings('ignore', message='X does not have valid feature names')
+    model = joblib.load(MODEL_PATH)
+    model.n_jobs = 1
+    scaler = joblib.load(SCALER_PATH)
+    engine = TreeEngine.compile(model, scaler.mean_, scaler.scale_)
+    rng = np.random.default_rng(42)
+
+    print(f"\n=== {engine.n_trees} trees, {engine.meta['n_nodes']} nodes, depth {engine.depth} ===")
+    print(f"{'rows':>7} {'sklearn':>12} {'engine':>12} {'speedup':>9} {'max diff':>10}")
+    for rows in sizes:
+        # Whole-number rows, like the calendar features, sit right on split boundaries
+        raw = np.round(rng.normal(0.0, 2.0, size=(rows, engine.n_features)) * scaler.scale_ + scaler.mean_)
+        scaled = scaler.transform(raw)
+        sklearn_time = _best_of(model.predict, scaled, repeat)
+        # The engine takes raw rows; scaling is folded into its thresholds
+        engine_time = _best_of(engine.predict, raw, repeat)
+        diff = np.max(np.abs(engine.predict(raw) - model.predict(scaled)))
+        print(f"{rows:>7} {sklearn_time * 1000:>10.2f}ms {engine_time * 1000:>10.2f}ms "
+              f"{sklearn_time / engine_time:>8.1f}x {diff:>10.1e}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark sklearn vs flat-array tree inference')
+    parser.add_argument('--sizes', default='1,8,32,128,512,2048',
+                        help='Comma-separated batch sizes')
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    run([int(s) for s in args.sizes.split(',')], args.repeat)
+
+
+if __name__ == '__main__':
+    main()
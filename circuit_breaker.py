@@ -0,0 +1,122 @@
+"""
+Circuit breaker for upstream providers
+Fast-fails calls to a provider that keeps failing or breaching its latency SLO
+"""
+
+import math
+import threading
+from collections import deque
+from time import monotonic
+from typing import Dict, Any, List
+import logging
+
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, math.ceil(pct / 100 * len(sorted_values)) - 1)
+    return sorted_values[rank]
+
+
+class CircuitBreaker:
+    """
+    Per-provider circuit breaker with rolling health metrics.
+
+    The breaker opens after failure_threshold consecutive bad calls, where
+    a call is bad if it raised or took longer than latency_slo seconds.
+    While open, calls are rejected. After open_seconds one probe call is let
+    through (half-open); its outcome closes the breaker or re-opens it.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name: str, failure_threshold: int = 5, latency_slo: float = 2.0,
+                 open_seconds: float = 30.0, window: int = 200):
+        self.logger = logging.getLogger('CircuitBreaker')
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.latency_slo = latency_slo
+        self.open_seconds = open_seconds
+        self._state = self.CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._latencies = deque(maxlen=window)
+        self._outcomes = deque(maxlen=window)
+        self._counters = {'calls': 0, 'failures': 0, 'slow_calls': 0, 'rejected': 0, 'trips': 0}
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state
+
+    def allow(self) -> bool:
+        """Return True if a call may go through now."""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+
+            if self._state == self.OPEN and monotonic() - self._opened_at >= self.open_seconds:
+                self._state = self.HALF_OPEN
+                self._probe_in_flight = False
+
+            if self._state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+
+            self._counters['rejected'] += 1
+            return False
+
+    def record(self, success: bool, latency: float):
+        """Record the outcome and latency (seconds) of a call that was allowed."""
+        slow = latency > self.latency_slo
+        bad = not success or slow
+        with self._lock:
+            self._counters['calls'] += 1
+            self._counters['failures'] += not success
+            self._counters['slow_calls'] += slow
+            self._latencies.append(latency)
+            self._outcomes.append(success)
+
+            if self._state == self.HALF_OPEN:
+                self._probe_in_flight = False
+                if bad:
+                    self._trip()
+                else:
+                    self._state = self.CLOSED
+                    self._consecutive_failures = 0
+                    self.logger.info(f"Circuit for {self.name} closed after successful probe")
+                return
+
+            if not bad:
+                self._consecutive_failures = 0
+                return
+
+            self._consecutive_failures += 1
+            if self._state == self.CLOSED and self._consecutive_failures >= self.failure_threshold:
+                self._trip()
+
+    def _trip(self):
+        """Open the breaker; caller must hold the lock."""
+        self._state = self.OPEN
+        self._opened_at = monotonic()
+        self._counters['trips'] += 1
+        self.logger.warning(f"Circuit for {self.name} opened for {self.open_seconds}s")
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return state, error rate and latency percentiles over the rolling window."""
+        with self._lock:
+            latencies = sorted(self._latencies)
+            outcomes = list(self._outcomes)
+            snapshot = {'state': self._state, **self._counters}
+
+        snapshot['window'] = len(outcomes)
+        snapshot['error_rate'] = round(outcomes.count(False) / len(outcomes), 4) if outcomes else 0.0
+        snapshot['latency_ms'] = {
+            f'p{pct}': round(_percentile(latencies, pct) * 1000, 1) for pct in (50, 90, 99)
+        }
+        return snapshot
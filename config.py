@@ -82,6 +82,181 @@ TARGET_COLUMN = 'aqi'
 TEST_SIZE = 0.2
 RANDOM_STATE = 42
 
+# Largest number of feature sets accepted by /predict/batch
+MAX_BATCH_SIZE = 10000
+
+# Optional micro-batching of concurrent /predict calls into one model call
+MICRO_BATCH_ENABLED = os.environ.get('AQI_MICRO_BATCH', '0') == '1'
+MICRO_BATCH_MAX_SIZE = 64
+MICRO_BATCH_MAX_WAIT_MS = 2.0
+
+# API integration settings
+API_MAX_WORKERS = 16
+
+# Per-source deadlines (seconds) for the concurrent aggregated fetch, counted from
+# submission; for bulk requests they count from when each source starts, and a
+# source still queued after SOURCE_QUEUE_WAIT times out
+SOURCE_QUEUE_WAIT = 10.0
+DEFAULT_SOURCE_DEADLINE = 4.0
+SOURCE_DEADLINES = {
+    'air_quality': 4.0,
+    'weather': 3.0,
+    'traffic': 3.0,
+    'industrial': 5.0,
+    'urban': 4.0
+}
+
+# Response cache TTLs (seconds) per upstream provider
+DEFAULT_PROVIDER_TTL = 600
+PROVIDER_TTLS = {
+    'openaq': 600,
+    'waqi': 600,
+    'weatherapi': 600,
+    'openweather': 600,
+    'tomtom': 120,
+    'geoapify': 300,
+    'stlouisfed': 12 * 3600,
+    'opencage': 30 * 24 * 3600
+}
+
+# Incremental FRED series: observations kept per series, and how long the
+# merged series is retained between incremental refreshes
+FRED_HISTORY_LIMIT = 24
+FRED_SERIES_STORE_TTL = 90 * 24 * 3600
+
+# Failed requests are cached briefly so a failing provider is not hammered
+NEGATIVE_CACHE_TTL = 30
+
+# Memory bounds for the in-process response cache
+RESPONSE_CACHE_MAX_ENTRIES = 1024
+RESPONSE_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+# Response cache backend: 'memory' (per process) or 'sqlite' (memory in front of
+# a database shared by all workers and kept across restarts)
+CACHE_BACKEND = os.environ.get('AQI_CACHE_BACKEND', 'memory')
+CACHE_DB_PATH = os.path.join(DATA_DIR, 'upstream_cache.sqlite3')
+CACHE_DB_MAX_ENTRIES = 20000
+CACHE_DB_MAX_BYTES = 256 * 1024 * 1024
+
+# Upstream HTTP settings: (connect, read) timeouts in seconds and pool sizes
+HTTP_TIMEOUT = (3.05, 10)
+HTTP_POOL_CONNECTIONS = 4
+HTTP_POOL_MAXSIZE = 16
+# Threads past HTTP_POOL_MAXSIZE for a host wait for a pooled connection instead of
+# opening throwaway ones; the wait is bounded by the HTTP_TIMEOUT of the requests
+# holding the connections
+HTTP_POOL_BLOCK = True
+
+# Connection limits for the async client used by asgi_app.py
+ASYNC_HTTP_MAX_CONNECTIONS = 200
+ASYNC_HTTP_MAX_KEEPALIVE = 64
+
+# Bounded retries with full-jitter exponential backoff
+HTTP_MAX_RETRIES = 2
+HTTP_BACKOFF_BASE = 0.25
+HTTP_BACKOFF_MAX = 2.0
+HTTP_RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# Upstream endpoints; AQI_UPSTREAM_BASE_URL points every provider at one
+# stand-in server (see stub_server.py)
+PROVIDER_BASE_URLS = {
+    'openaq': 'https://api.openaq.org',
+    'waqi': 'https://api.waqi.info',
+    'weatherapi': 'http://api.weatherapi.com',
+    'openweather': 'https://api.openweathermap.org',
+    'tomtom': 'https://api.tomtom.com',
+    'geoapify': 'https://api.geoapify.com',
+    'stlouisfed': 'https://api.stlouisfed.org',
+    'opencage': 'https://api.opencagedata.com'
+}
+UPSTREAM_BASE_URL_OVERRIDE = os.environ.get('AQI_UPSTREAM_BASE_URL')
+
+# Upstream mode: 'live', 'record' (live + save fixtures) or 'replay' (fixtures only)
+UPSTREAM_MODE = os.environ.get('AQI_UPSTREAM_MODE', 'live')
+FIXTURE_DIR = os.environ.get('AQI_FIXTURE_DIR', os.path.join(DATA_DIR, 'fixtures'))
+REPLAY_LATENCY_MS = float(os.environ.get('AQI_REPLAY_LATENCY_MS', 0))
+REPLAY_JITTER_MS = float(os.environ.get('AQI_REPLAY_JITTER_MS', 0))
+REPLAY_ERROR_RATE = float(os.environ.get('AQI_REPLAY_ERROR_RATE', 0))
+REPLAY_STRICT = os.environ.get('AQI_REPLAY_STRICT', '0') == '1'
+
+# Per-provider circuit breakers: consecutive failures or SLO breaches (seconds)
+# before opening, how long to stay open before a probe, and the metrics window
+BREAKER_FAILURE_THRESHOLD = 5
+BREAKER_OPEN_SECONDS = 30
+BREAKER_WINDOW = 200
+DEFAULT_LATENCY_SLO = 2.0
+PROVIDER_LATENCY_SLOS = {
+    'tomtom': 1.5,
+    'opencage': 1.5,
+    'stlouisfed': 4.0
+}
+# How long the last good response is kept to serve while a circuit is open
+BREAKER_FALLBACK_TTL = 6 * 3600
+
+# Background stale-while-revalidate prefetching of aggregated data
+PREFETCH_ENABLED = True
+PREFETCH_LOCATIONS = [
+    {'city': 'Delhi', 'lat': 28.6139, 'lon': 77.2090}
+]
+PREFETCH_INTERVAL = 240   # seconds between background refresh rounds
+PREFETCH_SOFT_TTL = 300   # serve and refresh in the background after this age
+PREFETCH_HARD_TTL = 3600  # refetch on the request path after this age
+PREFETCH_WORKERS = 2
+PREFETCH_MAX_SNAPSHOTS = 256  # snapshots held for request-supplied locations, least recently used evicted
+
+# Most cities accepted by one /api/aggregated?cities= request
+BULK_MAX_CITIES = 25
+BULK_MAX_WORKERS = 8  # dedicated pool for bulk fan-out, separate from API_MAX_WORKERS
+
+# HTTP compression and caching for API and static responses
+GZIP_MIN_SIZE = 1024          # bytes; smaller bodies are sent as-is
+GZIP_LEVEL = 6                # API responses, compressed per request
+STATIC_GZIP_LEVEL = 9         # static assets, compressed once and kept in memory
+STATIC_MAX_AGE = 86400        # seconds browsers may reuse CSS/JS without revalidating
+
+# Model loading: 'eager' at startup, 'lazy' on first prediction or 'background' with a readiness flag
+MODEL_LOAD_MODE = os.environ.get('AQI_MODEL_LOAD', 'eager')
+MODEL_LOAD_WAIT = 5.0  # seconds a prediction waits for a background load before failing with 503
+# joblib mmap_mode for the model file ('r' maps uncompressed arrays; empty disables)
+MODEL_MMAP_MODE = os.environ.get('AQI_MODEL_MMAP', 'r') or None
+
+# Flat-array RandomForest engine (tree_engine.py), compiled from the model and memory-mapped
+TREE_ENGINE_ENABLED = os.environ.get('AQI_TREE_ENGINE', '1') == '1'
+TREE_ENGINE_DIR = os.path.join(MODEL_DIR, 'engine')
+TREE_ENGINE_TOLERANCE = 1e-6  # largest difference from sklearn accepted before falling back
+ATTRIBUTION_MAX_ROWS = 1024   # larger batches skip per-feature attribution and report global factors
+
+# Prediction intervals from the spread of the individual tree outputs
+INTERVAL_LEVEL = 0.9          # central coverage of the reported interval
+INTERVAL_MIN_SPREAD = 1.0     # AQI; floor on the tree spread so unanimous trees still get a width
+INTERVAL_CONFIDENCE_SCALE = 50  # AQI; one category band, the smallest width confidence is judged against
+CALIBRATION_PATH = os.path.join(MODEL_DIR, 'calibration.json')  # written by training.py
+
+# Serving-side inference parallelism, independent of MODEL_CONFIG['n_jobs'] used for training
+INFERENCE_PARALLEL_MIN_ROWS = int(os.environ.get('AQI_INFERENCE_PARALLEL_MIN_ROWS', 512))  # see bench_inference.py
+INFERENCE_MAX_THREADS = int(os.environ.get('AQI_INFERENCE_THREADS', min(4, os.cpu_count() or 1)))  # process-wide
+
+# Multi-horizon forecast: AQI now and every FORECAST_STEP_HOURS up to FORECAST_MAX_HOURS
+FORECAST_STEP_HOURS = 2
+FORECAST_MAX_HOURS = 24
+
+# Prediction result cache: one prediction per location, input set and window
+PREDICTION_CACHE_ENABLED = os.environ.get('AQI_PREDICTION_CACHE', '1') == '1'
+PREDICTION_CACHE_WINDOW = 300        # seconds per time bucket, matching the dashboard refresh
+PREDICTION_CACHE_COORD_PRECISION = 2  # decimal places of lat/lon per bucket (~1 km)
+PREDICTION_CACHE_MAX_ENTRIES = 4096
+
+# Server-sent live feed: one snapshot/prediction/alerts event per city per interval
+STREAM_INTERVAL = 300        # seconds between published events, matching the dashboard refresh
+STREAM_HEARTBEAT = 15        # seconds between keep-alive comments on idle streams
+STREAM_QUEUE_SIZE = 8        # events buffered per subscriber before the oldest is dropped
+STREAM_ALERT_AQI = 150       # current or predicted AQI at or above this raises an alert
+STREAM_WORKERS = 4
+
+# Persisted city -> coordinates index (seeded with PREFETCH_LOCATIONS)
+LOCATION_INDEX_PATH = os.path.join(DATA_DIR, 'locations.json')
+LOCATION_INDEX_MAX_ENTRIES = 1000  # request-supplied cities kept; the oldest geocoded ones are dropped
+
 # Logging configuration
 LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
 LOG_LEVEL = 'INFO'
\ No newline at end of file
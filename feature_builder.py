@@ -0,0 +1,88 @@
+"""
+Feature builder for Smart AQI Guardian
+Turns aggregated upstream data plus user input into model features
+"""
+
+from datetime import datetime
+from typing import Dict, Any, Tuple
+
+
+def time_features(moment: datetime) -> Dict[str, int]:
+    """Calendar features the model expects for a point in time."""
+    return {
+        'day': moment.day,
+        'hour': moment.hour,
+        'month': moment.month,
+        'day_of_week': moment.weekday(),
+        'is_weekend': int(moment.weekday() >= 5)
+    }
+
+
+def build_features(api_data: Dict[str, Any], features: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, bool]]:
+    """
+    Combine aggregated API data with user-supplied features.
+
+    Returns the enhanced feature dictionary and, per data source, whether
+    it contributed real data.
+    """
+    # Extract weather data
+    openweather = api_data['weather'].get('openweather', {})
+    weather = openweather.get('main', {})
+    wind = openweather.get('wind', {})
+    
+    # Extract air quality data
+    air = api_data['air_quality'].get('waqi', {}).get('data', {})
+    
+    # Extract traffic data
+    traffic = api_data['traffic'].get('tomtom', {})
+    
+    # Extract industrial data
+    industrial = api_data['industrial'].get('industrial_production', {})
+    
+    # Combine API data with user input
+    enhanced_features = {
+        # Air Quality Parameters
+        'pm25': float(air.get('iaqi', {}).get('pm25', {}).get('v', 0)),
+        'pm10': float(air.get('iaqi', {}).get('pm10', {}).get('v', 0)),
+        'co': float(air.get('iaqi', {}).get('co', {}).get('v', 0)),
+        'no2': float(air.get('iaqi', {}).get('no2', {}).get('v', 0)),
+        
+        # Weather Parameters
+        'temperature': float(weather.get('temp', 25)),
+        'humidity': float(weather.get('humidity', 50)),
+        'wind_speed': float(wind.get('speed', 10)),
+        
+        # Time-based Parameters
+        'season_type': features.get('season_type', 1),
+        **time_features(datetime.now()),
+        
+        # Urban Parameters
+        'green_cover_percentage': features.get('green_cover_percentage', 30),
+        'urban_density': features.get('urban_density', 50),
+        
+        # Traffic Parameters
+        'daily_vehicle_count': float(traffic.get('flowSegmentData', {}).get('vehicleCount', 1000)),
+        'peak_hour_density': features.get('peak_hour_density', 70),
+        
+        # Industrial Parameters
+        'emission_levels': features.get('emission_levels', 50),
+        'industrial_activity_index': float(industrial.get('value') or 50),
+        'power_demand': features.get('power_demand', 1000),
+        'production_index': features.get('production_index', 80),
+        'energy_price_index': features.get('energy_price_index', 100),
+        'industrial_consumption': features.get('industrial_consumption', 800),
+        
+        # Safety Parameters
+        'severity_index': features.get('severity_index', 50),
+        'compliance_score': features.get('compliance_score', 80),
+        'violation_index': features.get('violation_index', 20),
+        'pollen_level': features.get('pollen_level', 30)
+    }
+    
+    data_sources = {
+        'weather': bool(weather),
+        'air_quality': bool(air),
+        'traffic': bool(traffic),
+        'industrial': bool(industrial)
+    }
+    return enhanced_features, data_sources
@@ -0,0 +1,194 @@
+"""
+HTTP caching helpers for Smart AQI Guardian
+ETags, conditional GETs and gzip for API snapshots and static files
+"""
+
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import threading
+from collections import namedtuple
+from typing import Dict, Any, Optional, Tuple
+import logging
+
+from config import GZIP_MIN_SIZE, GZIP_LEVEL, STATIC_GZIP_LEVEL, STATIC_MAX_AGE
+
+# Fields that change on every response without the data changing
+VOLATILE_FIELDS = {'timestamp', 'snapshot', 'elapsed_ms'}
+
+# Front-end files served from memory; data files (.json, .txt, ...) never are
+COMPRESSIBLE_EXTENSIONS = {'.html', '.css', '.js', '.svg'}
+
+# A static file held in memory with its precompressed variant
+StaticAsset = namedtuple('StaticAsset', ['body', 'gzipped', 'etag', 'content_type',
+                                         'cache_control', 'mtime_ns', 'size'])
+
+
+def _strip_volatile(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {k: _strip_volatile(v) for k, v in value.items() if k not in VOLATILE_FIELDS}
+    if isinstance(value, list):
+        return [_strip_volatile(v) for v in value]
+    return value
+
+
+def json_etag(payload: Any) -> str:
+    """
+    Weak ETag for an API payload.
+
+    Timestamps, snapshot ages and fetch timings are left out, so the tag
+    only changes when the data itself does. Responses that differ only in
+    those fields share it, which is why it is weak rather than strong.
+    """
+    canonical = json.dumps(_strip_volatile(payload), sort_keys=True, separators=(',', ':'), default=str)
+    return 'W/"' + hashlib.sha1(canonical.encode('utf-8')).hexdigest()[:20] + '"'
+
+
+def gzip_etag(etag: str) -> str:
+    """The tag for an entity's gzip variant, keeping a weak prefix."""
+    return etag[:-1] + '-gz"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header covers etag, including its -gz variant (weak comparison)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    base = (etag[2:] if etag.startswith('W/') else etag).strip('"')
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if candidate.startswith('W/'):
+            candidate = candidate[2:]
+        if candidate.strip('"') in (base, base + '-gz'):
+            return True
+    return False
+
+
+def accepts_gzip(accept_encoding: Optional[str]) -> bool:
+    """Whether the client accepts gzip (and has not given it q=0)."""
+    for coding in (accept_encoding or '').lower().split(','):
+        name, _, params = coding.strip().partition(';')
+        if name.strip() in ('gzip', '*'):
+            return params.replace(' ', '') not in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000')
+    return False
+
+
+def gzip_body(body: bytes, level: int = GZIP_LEVEL) -> Optional[bytes]:
+    """Compress a response body, or None if it is too small to be worth it."""
+    if len(body) < GZIP_MIN_SIZE:
+        return None
+    compressed = gzip.compress(body, compresslevel=level, mtime=0)
+    return compressed if len(compressed) < len(body) else None
+
+
+def conditional_json_body(etag: str, body: bytes, accept_encoding: Optional[str],
+                          if_none_match: Optional[str]) -> Tuple[Optional[bytes], Dict[str, str]]:
+    """
+    Negotiate a JSON API response shared by the Flask and ASGI apps.
+
+    Gzips the body for clients that accept it, giving that variant the
+    -gz tag. Returns (None, headers) when If-None-Match already covers the
+    entity, so the caller sends a 304 carrying the same tag the full
+    response would have had; otherwise (body to send, headers).
+    """
+    headers = {'ETag': etag, 'Cache-Control': 'no-cache', 'Vary': 'Accept-Encoding'}
+    compressed = gzip_body(body) if accepts_gzip(accept_encoding) else None
+    if compressed is not None:
+        headers['ETag'] = gzip_etag(etag)
+    if etag_matches(if_none_match, etag):
+        return None, headers
+    if compressed is not None:
+        headers['Content-Encoding'] = 'gzip'
+        return compressed, headers
+    return body, headers
+
+
+class StaticAssets:
+    """
+    In-memory static files with strong ETags and gzip variants.
+
+    Text assets are read and compressed once, then served from memory
+    until the file's size or mtime changes. HTML is revalidated on every
+    load so new deploys show up; other assets may be reused for
+    STATIC_MAX_AGE seconds.
+    """
+
+    def __init__(self, root: str, max_age: int = STATIC_MAX_AGE):
+        self.logger = logging.getLogger('StaticAssets')
+        self.root = os.path.abspath(root)
+        self.max_age = max_age
+        self._assets = {}
+        self._lock = threading.Lock()
+
+    def precompress(self):
+        """Load and compress the front-end files directly in root (subdirectories hold data, not pages)."""
+        count = 0
+        for entry in os.scandir(self.root):
+            if entry.is_file() and os.path.splitext(entry.name)[1].lower() in COMPRESSIBLE_EXTENSIONS:
+                if self.get(entry.name) is not None:
+                    count += 1
+        self.logger.info(f"Precompressed {count} static asset(s) from {self.root}")
+
+    def _resolve(self, path: str) -> Optional[str]:
+        """Absolute path for a request path, refusing anything outside root."""
+        full_path = os.path.abspath(os.path.join(self.root, path))
+        if os.path.commonpath([full_path, self.root]) != self.root:
+            return None
+        return full_path
+
+    def get(self, path: str) -> Optional[StaticAsset]:
+        """Return the asset for a compressible file, or None to fall back to plain file serving."""
+        if os.path.splitext(path)[1].lower() not in COMPRESSIBLE_EXTENSIONS:
+            return None
+        full_path = self._resolve(path)
+        if full_path is None:
+            return None
+        try:
+            stat = os.stat(full_path)
+        except OSError:
+            return None
+
+        with self._lock:
+            asset = self._assets.get(full_path)
+        if asset is not None and asset.mtime_ns == stat.st_mtime_ns and asset.size == stat.st_size:
+            return asset
+
+        try:
+            with open(full_path, 'rb') as f:
+                body = f.read()
+        except OSError as e:
+            self.logger.error(f"Could not read {path}: {str(e)}")
+            return None
+        content_type = mimetypes.guess_type(full_path)[0] or 'application/octet-stream'
+        if content_type.startswith('text/') or content_type in ('application/javascript', 'application/json'):
+            content_type += '; charset=utf-8'
+        asset = StaticAsset(
+            body=body,
+            gzipped=gzip_body(body, level=STATIC_GZIP_LEVEL),
+            etag='"' + hashlib.sha1(body).hexdigest()[:20] + '"',
+            content_type=content_type,
+            cache_control='no-cache' if full_path.endswith('.html') else f'public, max-age={self.max_age}',
+            mtime_ns=stat.st_mtime_ns,
+            size=stat.st_size
+        )
+        with self._lock:
+            self._assets[full_path] = asset
+        return asset
+
+    @staticmethod
+    def variant(asset: StaticAsset, accept_encoding: Optional[str]) -> Dict[str, Any]:
+        """Pick the body and headers to send for an asset."""
+        headers = {
+            'Content-Type': asset.content_type,
+            'Cache-Control': asset.cache_control,
+            'Vary': 'Accept-Encoding'
+        }
+        if asset.gzipped is not None and accepts_gzip(accept_encoding):
+            headers['Content-Encoding'] = 'gzip'
+            headers['ETag'] = gzip_etag(asset.etag)
+            return {'body': asset.gzipped, 'headers': headers}
+        headers['ETag'] = asset.etag
+        return {'body': asset.body, 'headers': headers}
@@ -0,0 +1,92 @@
+"""
+Serving-side inference parallelism for Smart AQI Guardian
+Scores small batches serially and splits large ones across a shared,
+process-wide thread budget
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Callable
+import logging
+
+import numpy as np
+
+from config import INFERENCE_PARALLEL_MIN_ROWS, INFERENCE_MAX_THREADS
+
+# One pool for the whole process, so concurrent requests share the budget
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _shared_executor(max_threads: int) -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=max_threads, thread_name_prefix='inference')
+        return _executor
+
+
+class InferencePolicy:
+    """
+    Decides how much parallelism one model call gets.
+
+    The forest is trained with n_jobs=-1, and that setting is pickled with
+    it; left alone, every single-row predict would fan out over all cores,
+    and concurrent request threads would oversubscribe them. The policy
+    pins the loaded model to n_jobs=1, runs batches below min_parallel_rows
+    on the calling thread and splits larger ones into row chunks scored on
+    a process-wide pool of max_threads workers (the caller scores the
+    first chunk itself). Tree prediction releases the GIL, so chunks run
+    in parallel and rows come back in their original order.
+    """
+
+    def __init__(self, model, min_parallel_rows: int = INFERENCE_PARALLEL_MIN_ROWS,
+                 max_threads: int = INFERENCE_MAX_THREADS):
+        self.logger = logging.getLogger('InferencePolicy')
+        self.model = model
+        self.min_parallel_rows = max(1, int(min_parallel_rows))
+        self.max_threads = max(1, int(max_threads))
+        if hasattr(model, 'n_jobs'):
+            # Training parallelism must not leak into serving
+            model.n_jobs = 1
+        self._lock = threading.Lock()
+        self._stats = {'serial_calls': 0, 'parallel_calls': 0, 'chunks': 0}
+
+    def chunks_for(self, rows: int) -> int:
+        """Number of chunks a batch of rows is split into (1 means serial)."""
+        if self.max_threads <= 1 or rows < self.min_parallel_rows:
+            return 1
+        return min(self.max_threads, max(2, rows // self.min_parallel_rows))
+
+    def apply(self, fn: Callable[[np.ndarray], Any], matrix: np.ndarray) -> List[Any]:
+        """Run fn over row chunks of matrix under the policy, returning the per-chunk results in order."""
+        chunks = self.chunks_for(len(matrix))
+        if chunks == 1:
+            with self._lock:
+                self._stats['serial_calls'] += 1
+            return [fn(matrix)]
+
+        with self._lock:
+            self._stats['parallel_calls'] += 1
+            self._stats['chunks'] += chunks
+        parts = np.array_split(matrix, chunks)
+        executor = _shared_executor(self.max_threads)
+        futures = [executor.submit(fn, part) for part in parts[1:]]
+        results = [fn(parts[0])]
+        results.extend(future.result() for future in futures)
+        return results
+
+    def predict(self, matrix: np.ndarray) -> np.ndarray:
+        """Score a (rows, n) matrix with the model."""
+        results = self.apply(self.model.predict, matrix)
+        return results[0] if len(results) == 1 else np.concatenate(results)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Policy settings and how many calls took each path."""
+        with self._lock:
+            stats = dict(self._stats)
+        return {
+            'min_parallel_rows': self.min_parallel_rows,
+            'max_threads': self.max_threads,
+            **stats
+        }
@@ -0,0 +1,252 @@
+"""
+Live AQI feed for Smart AQI Guardian
+Publishes one snapshot/prediction/alerts event per city and fans it out to
+every subscribed dashboard as server-sent events
+"""
+
+import asyncio
+import json
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from time import monotonic
+from typing import Dict, Any, List, Optional, Callable, Tuple
+import logging
+
+from config import (STREAM_INTERVAL, STREAM_QUEUE_SIZE, STREAM_ALERT_AQI, STREAM_WORKERS)
+
+
+def format_sse(data: str, event: Optional[str] = None) -> str:
+    """Frame a payload as one server-sent event."""
+    lines = [f"event: {event}"] if event else []
+    lines.extend(f"data: {line}" for line in data.splitlines() or [''])
+    return '\n'.join(lines) + '\n\n'
+
+
+class Subscription:
+    """A subscriber's bounded inbox; when it is full the oldest event is dropped."""
+
+    def __init__(self, topic: Tuple[str, float, float], maxsize: int = STREAM_QUEUE_SIZE):
+        self.topic = topic
+        self._queue = queue.Queue(maxsize=maxsize)
+
+    def put(self, message: str):
+        while True:
+            try:
+                self._queue.put_nowait(message)
+                return
+            except queue.Full:
+                try:
+                    self._queue.get_nowait()
+                except queue.Empty:
+                    pass
+
+    def get(self, timeout: Optional[float] = None) -> Optional[str]:
+        """Next event, or None if nothing arrived within timeout."""
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class AsyncSubscription(Subscription):
+    """Subscription read from an event loop while events are published from threads."""
+
+    def __init__(self, topic: Tuple[str, float, float], loop: asyncio.AbstractEventLoop,
+                 maxsize: int = STREAM_QUEUE_SIZE):
+        self.topic = topic
+        self._loop = loop
+        self._queue = asyncio.Queue(maxsize=maxsize)
+
+    def put(self, message: str):
+        self._loop.call_soon_threadsafe(self._put, message)
+
+    def _put(self, message: str):
+        if self._queue.full():
+            self._queue.get_nowait()
+        self._queue.put_nowait(message)
+
+    async def aget(self, timeout: Optional[float] = None) -> Optional[str]:
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class LiveFeed:
+    """
+    Per-city publisher behind the streaming endpoint.
+
+    A single background thread builds one event per subscribed city every
+    interval: the aggregated snapshot, the prediction and (if a forecast
+    function is given) the forecast for it, and any alerts. The event is serialized once and copied into each subscriber's
+    inbox, so server work grows with the number of cities watched rather
+    than the number of open tabs. A city's first subscriber gets an event
+    right away; later ones get the last event published for it.
+    """
+
+    def __init__(self, fetch_snapshot: Callable[[str, float, float], Dict[str, Any]],
+                 predict: Callable[[str, float, float], Dict[str, Any]],
+                 interval: float = STREAM_INTERVAL, alert_aqi: float = STREAM_ALERT_AQI,
+                 forecast: Optional[Callable[[str, float, float], Dict[str, Any]]] = None):
+        self.logger = logging.getLogger('LiveFeed')
+        self.fetch_snapshot = fetch_snapshot
+        self.predict = predict
+        self.forecast = forecast
+        self.interval = interval
+        self.alert_aqi = alert_aqi
+        self._subscribers = {}
+        self._locations = {}
+        self._last_event = {}
+        self._published_at = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._executor = ThreadPoolExecutor(max_workers=STREAM_WORKERS, thread_name_prefix='live-feed')
+        self._stats = {'events_published': 0, 'messages_sent': 0}
+
+    @staticmethod
+    def topic(city: str, lat: float, lon: float) -> Tuple[str, float, float]:
+        """Normalize a location into a topic key."""
+        return ' '.join(city.strip().lower().split()), round(float(lat), 4), round(float(lon), 4)
+
+    def start(self):
+        """Start the publishing loop."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='live-feed', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the publishing loop."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+        self._executor.shutdown(wait=False)
+
+    def subscribe(self, city: str, lat: float, lon: float,
+                  subscription: Optional[Subscription] = None) -> Subscription:
+        """Register a subscriber for a location and queue its first event."""
+        topic = self.topic(city, lat, lon)
+        subscription = subscription or Subscription(topic)
+        subscription.topic = topic
+        with self._lock:
+            self._subscribers.setdefault(topic, set()).add(subscription)
+            self._locations[topic] = (city.strip(), float(lat), float(lon))
+            last = self._last_event.get(topic)
+        if last is not None:
+            subscription.put(last)
+        else:
+            # New city: publish now instead of waiting for the next round
+            self._wake.set()
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        """Remove a subscriber; a city with none left stops being published."""
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.topic)
+            if subscribers is None:
+                return
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[subscription.topic]
+                self._locations.pop(subscription.topic, None)
+                self._last_event.pop(subscription.topic, None)
+                self._published_at.pop(subscription.topic, None)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._publish_due()
+            self._wake.wait(self._next_wait())
+            self._wake.clear()
+
+    def _next_wait(self) -> float:
+        """Seconds until the next city is due."""
+        now = monotonic()
+        with self._lock:
+            due = [self._published_at[topic] + self.interval - now if topic in self._published_at else 0.0
+                   for topic in self._locations]
+        return max(0.0, min(due)) if due else self.interval
+
+    def _publish_due(self):
+        """Publish every subscribed city whose last event is at least an interval old."""
+        now = monotonic()
+        with self._lock:
+            due = [(topic, location) for topic, location in self._locations.items()
+                   if topic not in self._published_at or self._published_at[topic] + self.interval <= now]
+            for topic, _ in due:
+                self._published_at[topic] = now
+        futures = [self._executor.submit(self.publish, topic, *location) for topic, location in due]
+        for future in futures:
+            try:
+                future.result()
+            except Exception as e:
+                self.logger.error(f"Live feed publish failed: {str(e)}")
+
+    def build_event(self, city: str, lat: float, lon: float) -> Dict[str, Any]:
+        """Assemble the snapshot, prediction, forecast and alerts for one city."""
+        snapshot = self.fetch_snapshot(city, lat, lon)
+        try:
+            prediction = self.predict(city, lat, lon)
+        except Exception as e:
+            self.logger.error(f"Live feed prediction for {city} failed: {str(e)}")
+            prediction = None
+        # Sent with the event so dashboards do not each request it on every update
+        forecast = None
+        if self.forecast is not None:
+            try:
+                forecast = self.forecast(city, lat, lon)
+            except Exception as e:
+                self.logger.error(f"Live feed forecast for {city} failed: {str(e)}")
+        return {
+            'city': city,
+            'lat': lat,
+            'lon': lon,
+            'snapshot': snapshot,
+            'prediction': prediction,
+            'forecast': forecast,
+            'alerts': self._alerts(snapshot, prediction),
+            'timestamp': datetime.utcnow().isoformat()
+        }
+
+    def _alerts(self, snapshot: Dict[str, Any], prediction: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        alerts = []
+        current = snapshot.get('air_quality', {}).get('waqi', {}).get('data', {}).get('aqi')
+        if isinstance(current, (int, float)) and current >= self.alert_aqi:
+            alerts.append({'type': 'current', 'aqi': current,
+                           'message': f"Current AQI is {current}"})
+        if prediction and prediction.get('aqi', 0) >= self.alert_aqi:
+            alerts.append({'type': 'forecast', 'aqi': prediction['aqi'],
+                           'risk_level': prediction.get('risk_level'),
+                           'message': f"AQI expected to reach {prediction['aqi']} ({prediction.get('risk_level')})"})
+        return alerts
+
+    def publish(self, topic: Tuple[str, float, float], city: str, lat: float, lon: float):
+        """Build one event for a city and fan it out to its subscribers."""
+        message = format_sse(json.dumps(self.build_event(city, lat, lon)), event='snapshot')
+        with self._lock:
+            subscribers = list(self._subscribers.get(topic, ()))
+            if subscribers:
+                self._last_event[topic] = message
+            self._stats['events_published'] += 1
+            self._stats['messages_sent'] += len(subscribers)
+        for subscription in subscribers:
+            subscription.put(message)
+
+    def get_status(self) -> Dict[str, Any]:
+        """Describe the subscribed cities and publishing counters."""
+        with self._lock:
+            cities = {f"{city}@{lat},{lon}": len(subscribers)
+                      for (city, lat, lon), subscribers in self._subscribers.items()}
+            stats = dict(self._stats)
+        return {
+            'running': bool(self._thread and self._thread.is_alive()),
+            'subscribers': cities,
+            'interval_s': self.interval,
+            **stats,
+            'timestamp': datetime.utcnow().isoformat()
+        }
@@ -0,0 +1,78 @@
+"""
+Throughput benchmark for the Smart AQI Guardian backend
+Run against app.py started in replay mode or pointed at stub_server.py.
+
+Usage:
+    python load_test.py --url http://localhost:5000/api/aggregated/Delhi --threads 16 --requests 2000
+    python load_test.py --url http://localhost:5000/predict --method POST --body '{"city": "Delhi"}'
+"""
+
+import argparse
+import json
+import threading
+from time import perf_counter
+
+import requests
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * pct / 100))]
+
+
+def run(url: str, method: str, body, threads: int, total: int):
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    remaining = [total]
+
+    def worker():
+        session = requests.Session()
+        while True:
+            with lock:
+                if remaining[0] <= 0:
+                    return
+                remaining[0] -= 1
+            started = perf_counter()
+            try:
+                response = session.request(method, url, json=body, timeout=30)
+                ok = response.ok
+            except requests.RequestException:
+                ok = False
+            elapsed = perf_counter() - started
+            with lock:
+                latencies.append(elapsed)
+                errors[0] += not ok
+
+    started = perf_counter()
+    pool = [threading.Thread(target=worker) for _ in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    wall = perf_counter() - started
+
+    latencies.sort()
+    print(f"\n=== {method} {url} ===")
+    print(f"Requests: {len(latencies)}  Errors: {errors[0]}  Threads: {threads}")
+    print(f"Throughput: {len(latencies) / wall:.1f} req/s")
+    for pct in (50, 90, 99):
+        print(f"p{pct}: {_percentile(latencies, pct) * 1000:.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test an AQI backend endpoint')
+    parser.add_argument('--url', default='http://localhost:5000/api/aggregated/Delhi')
+    parser.add_argument('--method', default='GET')
+    parser.add_argument('--body', default=None, help='JSON request body')
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=1000)
+    args = parser.parse_args()
+
+    body = json.loads(args.body) if args.body else None
+    run(args.url, args.method.upper(), body, args.threads, args.requests)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,157 @@
+"""
+Location index for Smart AQI Guardian
+Resolves a city to coordinates once and serves later lookups from memory
+"""
+
+import json
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Any, Optional, Callable, List
+import logging
+
+try:
+    import fcntl
+except ImportError:  # Windows: writes are still serialized within the process
+    fcntl = None
+
+from config import LOCATION_INDEX_MAX_ENTRIES
+
+
+class LocationIndex:
+    """
+    Persistent city -> (lat, lon, bbox, metadata) mapping.
+
+    Lookups are plain dictionary reads. Unknown cities are resolved through
+    the geocoder once and written back to a JSON file, which is merged on
+    write so several worker processes can share it. Writes are serialized
+    by a thread lock and, across processes, an advisory lock file. City
+    names come from requests, so past max_entries the oldest geocoded
+    entries are dropped; seeded locations are always kept.
+    """
+
+    def __init__(self, path: str, geocoder: Optional[Callable[[str], Optional[Dict[str, Any]]]] = None,
+                 seed: Optional[List[Dict[str, Any]]] = None, max_entries: int = LOCATION_INDEX_MAX_ENTRIES):
+        self.logger = logging.getLogger('LocationIndex')
+        self.path = path
+        self.geocoder = geocoder
+        self.max_entries = max_entries
+        self._locations = {}
+        self._lock = threading.Lock()
+        self._persist_lock = threading.Lock()
+
+        for location in seed or []:
+            self._locations[self.normalize(location['city'])] = {
+                'city': location['city'],
+                'lat': float(location['lat']),
+                'lon': float(location['lon']),
+                'bbox': location.get('bbox'),
+                'metadata': location.get('metadata', {}),
+                'source': 'config'
+            }
+        self._locations = self._trim({**self._locations, **self._load()})
+
+    @staticmethod
+    def normalize(city: str) -> str:
+        """Normalize a city name into an index key."""
+        return ' '.join(city.strip().lower().split())
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        """Read the persisted index, if any."""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Ignoring unreadable location index {self.path}: {str(e)}")
+            return {}
+
+    def _trim(self, locations: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """Keep seeded locations and the most recently resolved others, up to max_entries."""
+        if len(locations) <= self.max_entries:
+            return locations
+        seeded = {key: loc for key, loc in locations.items() if loc.get('source') == 'config'}
+        # Newest first; insertion order breaks ties between equal timestamps
+        others = [(position, key, loc) for position, (key, loc) in enumerate(locations.items())
+                  if key not in seeded]
+        others.sort(key=lambda item: (item[2].get('resolved_at') or '', item[0]), reverse=True)
+        kept = others[:max(self.max_entries - len(seeded), 0)]
+        return {**seeded, **{key: loc for _, key, loc in kept}}
+
+    @contextmanager
+    def _file_lock(self):
+        """Hold an exclusive lock on the index's lock file, where the platform supports it."""
+        if fcntl is None:
+            yield
+            return
+        with open(f"{self.path}.lock", 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _persist(self):
+        """Merge with the file on disk and atomically replace it, one writer at a time."""
+        directory = os.path.dirname(self.path)
+        tmp_path = None
+        try:
+            os.makedirs(directory, exist_ok=True)
+            with self._persist_lock, self._file_lock():
+                # Read under the file lock so another process's entries are not lost
+                on_disk = self._load()
+                with self._lock:
+                    merged = self._trim({**on_disk, **self._locations})
+                    self._locations = merged
+                fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=os.path.basename(self.path) + '.',
+                                                suffix='.tmp')
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(merged, f, indent=2, sort_keys=True)
+                os.replace(tmp_path, self.path)
+                tmp_path = None
+        except OSError as e:
+            self.logger.error(f"Failed to persist location index: {str(e)}")
+        finally:
+            if tmp_path is not None and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def get(self, city: str) -> Optional[Dict[str, Any]]:
+        """Return the indexed location for city without any I/O."""
+        return self._locations.get(self.normalize(city))
+
+    def add(self, city: str, lat: float, lon: float, bbox: Optional[List[float]] = None,
+            metadata: Optional[Dict[str, Any]] = None, persist: bool = True) -> Dict[str, Any]:
+        """Add or replace a location."""
+        location = {
+            'city': city.strip(),
+            'lat': float(lat),
+            'lon': float(lon),
+            'bbox': bbox,
+            'metadata': metadata or {},
+            'resolved_at': datetime.utcnow().isoformat()
+        }
+        with self._lock:
+            self._locations[self.normalize(city)] = location
+            self._locations = self._trim(self._locations)
+        if persist:
+            self._persist()
+        return location
+
+    def resolve(self, city: str) -> Optional[Dict[str, Any]]:
+        """Return the location for city, geocoding and persisting it on first use."""
+        location = self.get(city)
+        if location is not None or self.geocoder is None:
+            return location
+
+        result = self.geocoder(city)
+        if not result:
+            self.logger.warning(f"Could not resolve location for {city}")
+            return None
+        return self.add(city, result['lat'], result['lon'],
+                        bbox=result.get('bbox'), metadata=result.get('metadata'))
+
+    def __len__(self) -> int:
+        return len(self._locations)
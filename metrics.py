@@ -0,0 +1,324 @@
+"""
+Metrics for Smart AQI Guardian
+Counters, gauges and latency histograms rendered in Prometheus text format
+"""
+
+import itertools
+import threading
+from bisect import bisect_left
+from time import perf_counter
+from typing import Dict, Any, List, Tuple, Callable, Iterable, Optional
+import logging
+
+# Latency buckets in seconds, from cache hits to slow upstreams
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Recording is spread over this many independently locked shards
+SHARD_COUNT = 16
+
+
+class _Shards:
+    """
+    Striped storage for one metric.
+
+    Each thread is pinned to one shard on first use, so concurrent
+    recorders rarely contend for the same lock; readers merge all shards.
+    """
+
+    _next_shard = itertools.count()
+
+    def __init__(self):
+        self._shards = [({}, threading.Lock()) for _ in range(SHARD_COUNT)]
+        self._local = threading.local()
+
+    def shard(self) -> Tuple[Dict, threading.Lock]:
+        index = getattr(self._local, 'index', None)
+        if index is None:
+            index = next(self._next_shard) % SHARD_COUNT
+            self._local.index = index
+        return self._shards[index]
+
+    def snapshots(self) -> Iterable[Dict]:
+        for values, lock in self._shards:
+            with lock:
+                copy = dict(values)
+            yield copy
+
+
+class _Metric:
+    kind = 'untyped'
+
+    def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._shards = _Shards()
+
+    def _labels(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+    def _format_labels(self, values: Tuple[str, ...], extra: Optional[Tuple[str, str]] = None) -> str:
+        pairs = list(zip(self.labelnames, values))
+        if extra:
+            pairs.append(extra)
+        if not pairs:
+            return ''
+        escaped = (f'{k}="{_escape(v)}"' for k, v in pairs)
+        return '{' + ','.join(escaped) + '}'
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return lines
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonic count per label set."""
+
+    kind = 'counter'
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._labels(labels)
+        values, lock = self._shards.shard()
+        with lock:
+            values[key] = values.get(key, 0) + amount
+
+    def values(self) -> Dict[Tuple[str, ...], float]:
+        totals = {}
+        for values in self._shards.snapshots():
+            for key, value in values.items():
+                totals[key] = totals.get(key, 0) + value
+        return totals
+
+    def _samples(self) -> List[str]:
+        return [f"{self.name}{self._format_labels(key)} {_number(value)}"
+                for key, value in sorted(self.values().items())]
+
+
+class Gauge(Counter):
+    """Up/down value per label set, such as requests in flight."""
+
+    kind = 'gauge'
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def track(self, **labels) -> '_GaugeTracker':
+        """Context manager that raises the gauge for the duration of a block."""
+        return _GaugeTracker(self, labels)
+
+
+class _GaugeTracker:
+    def __init__(self, gauge: Gauge, labels: Dict[str, Any]):
+        self.gauge = gauge
+        self.labels = labels
+
+    def __enter__(self):
+        self.gauge.inc(**self.labels)
+
+    def __exit__(self, *exc):
+        self.gauge.dec(**self.labels)
+
+
+class Histogram(_Metric):
+    """Cumulative-bucket latency histogram per label set."""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._labels(labels)
+        # Counts per bucket, with a final slot for +Inf, then [sum]
+        index = bisect_left(self.buckets, value)
+        values, lock = self._shards.shard()
+        with lock:
+            state = values.get(key)
+            if state is None:
+                state = values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][index] += 1
+            state[1] += value
+
+    def time(self, **labels) -> '_HistogramTimer':
+        """Context manager that observes the elapsed time of a block."""
+        return _HistogramTimer(self, labels)
+
+    def values(self) -> Dict[Tuple[str, ...], Tuple[List[int], float]]:
+        totals = {}
+        for values in self._shards.snapshots():
+            for key, (counts, total) in values.items():
+                merged = totals.setdefault(key, [[0] * (len(self.buckets) + 1), 0.0])
+                merged[0] = [a + b for a, b in zip(merged[0], counts)]
+                merged[1] += total
+        return totals
+
+    def _samples(self) -> List[str]:
+        lines = []
+        for key, (counts, total) in sorted(self.values().items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{self._format_labels(key, ('le', _number(bound)))} {cumulative}")
+            cumulative += counts[-1]
+            lines.append(f"{self.name}_bucket{self._format_labels(key, ('le', '+Inf'))} {cumulative}")
+            lines.append(f"{self.name}_sum{self._format_labels(key)} {_number(total)}")
+            lines.append(f"{self.name}_count{self._format_labels(key)} {cumulative}")
+        return lines
+
+
+class _HistogramTimer:
+    def __init__(self, histogram: Histogram, labels: Dict[str, Any]):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(perf_counter() - self.started, **self.labels)
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _number(value: float) -> str:
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class MetricsRegistry:
+    """
+    Holds the process's metrics and renders them for scraping.
+
+    Collectors are callables evaluated at scrape time that return
+    (name, type, help, {labels: value}) tuples, for stats that are already
+    counted elsewhere, like cache hit/miss counters.
+    """
+
+    CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+    def __init__(self):
+        self.logger = logging.getLogger('MetricsRegistry')
+        self._metrics = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, help_text: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(name, help_text, labelnames))
+
+    def gauge(self, name: str, help_text: str, labelnames: Tuple[str, ...] = ()) -> Gauge:
+        return self._register(Gauge(name, help_text, labelnames))
+
+    def histogram(self, name: str, help_text: str, labelnames: Tuple[str, ...] = (),
+                  buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help_text, labelnames, buckets))
+
+    def register_collector(self, collector: Callable[[], Iterable[Tuple[str, str, str, Dict[Tuple[Tuple[str, str], ...], float]]]]):
+        with self._lock:
+            self._collectors.append(collector)
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors)
+
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+
+        # Several collectors may report into the same family
+        families = {}
+        for collector in collectors:
+            try:
+                for name, kind, help_text, samples in collector():
+                    family = families.setdefault(name, (kind, help_text, {}))
+                    family[2].update(samples)
+            except Exception as e:
+                self.logger.error(f"Metrics collector failed: {str(e)}")
+        for name, (kind, help_text, samples) in families.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in sorted(samples.items()):
+                label_text = ','.join(f'{k}="{_escape(str(v))}"' for k, v in labels)
+                lines.append(f"{name}{{{label_text}}} {_number(value)}" if label_text
+                             else f"{name} {_number(value)}")
+        return '\n'.join(lines) + '\n'
+
+
+# Process-wide registry and the metrics recorded across modules
+REGISTRY = MetricsRegistry()
+
+HTTP_REQUESTS = REGISTRY.counter(
+    'aqi_http_requests_total', 'HTTP requests served', ('route', 'method', 'status'))
+HTTP_LATENCY = REGISTRY.histogram(
+    'aqi_http_request_duration_seconds', 'HTTP request latency', ('route',))
+HTTP_IN_FLIGHT = REGISTRY.gauge(
+    'aqi_http_requests_in_flight', 'HTTP requests currently being served', ('route',))
+UPSTREAM_LATENCY = REGISTRY.histogram(
+    'aqi_upstream_request_duration_seconds', 'Upstream fetch latency including retries', ('provider',))
+UPSTREAM_ERRORS = REGISTRY.counter(
+    'aqi_upstream_errors_total', 'Upstream fetches that failed after retries', ('provider',))
+UPSTREAM_RETRIES = REGISTRY.counter(
+    'aqi_upstream_retries_total', 'Upstream requests retried', ('provider',))
+INFERENCE_LATENCY = REGISTRY.histogram(
+    'aqi_inference_duration_seconds', 'Model inference latency', ('method',))
+INFERENCE_ROWS = REGISTRY.counter(
+    'aqi_inference_rows_total', 'Feature rows scored by the model', ('method',))
+PREDICT_STAGE_LATENCY = REGISTRY.histogram(
+    'aqi_predict_stage_duration_seconds', 'Time spent in each /predict stage', ('stage',))
+
+
+def cache_collector(name: str, stats_fn: Callable[[], Dict[str, Any]]) -> Callable:
+    """
+    Build a collector exposing a cache's stats() counters.
+
+    Tiered caches report each tier under its own cache label, e.g.
+    'upstream_memory' and 'upstream_shared'. Counters a cache reports as
+    None (the shared tier's occupancy when its database is unreadable) are
+    left out rather than exported.
+    """
+    def known(samples):
+        return {labels: value for labels, value in samples.items() if value is not None}
+
+    def collect():
+        stats = stats_fn()
+        tiers = {f"{name}_{tier}": stats[tier] for tier in ('memory', 'shared') if tier in stats}
+        lookups, evictions, entries, size, flights = {}, {}, {}, {}, {}
+        for cache, tier_stats in (tiers or {name: stats}).items():
+            label = (('cache', cache),)
+            for result in ('hits', 'negative_hits', 'misses'):
+                lookups[label + (('result', result),)] = tier_stats.get(result, 0)
+            evictions[label + (('reason', 'evicted'),)] = tier_stats.get('evictions', 0)
+            evictions[label + (('reason', 'expired'),)] = tier_stats.get('expirations', 0)
+            entries[label] = tier_stats.get('entries', 0)
+            size[label] = tier_stats.get('bytes', 0)
+        flight = stats.get('single_flight')
+        if flight:
+            flights[(('cache', name), ('outcome', 'executed'))] = flight.get('calls', 0)
+            flights[(('cache', name), ('outcome', 'coalesced'))] = flight.get('coalesced', 0)
+
+        yield 'aqi_cache_lookups_total', 'counter', 'Cache lookups by result', known(lookups)
+        yield 'aqi_cache_evictions_total', 'counter', 'Cache entries evicted or expired', known(evictions)
+        yield 'aqi_cache_entries', 'gauge', 'Entries currently cached', known(entries)
+        yield 'aqi_cache_bytes', 'gauge', 'Approximate bytes currently cached', known(size)
+        yield 'aqi_single_flight_calls_total', 'counter', 'Cache fills run or coalesced', known(flights)
+    return collect
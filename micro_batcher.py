@@ -0,0 +1,159 @@
+"""
+Micro-batching scheduler for AQI predictions
+Groups concurrent single predictions into one matrix prediction
+"""
+
+import queue
+import threading
+from concurrent.futures import Future
+from itertools import groupby
+from time import monotonic
+from typing import Dict, Any, List, Tuple
+import logging
+
+from config import MICRO_BATCH_MAX_SIZE, MICRO_BATCH_MAX_WAIT_MS
+from predict import ModelNotReady
+
+
+class MicroBatcher:
+    """
+    Drop-in front for AQIPredictor.predict that batches concurrent callers.
+
+    A single worker thread takes the first queued request, then keeps
+    collecting until max_batch_size requests are gathered, max_wait_ms has
+    passed, or no other caller is waiting, and scores the group with one
+    batch_predict call. Each caller blocks only on its own result. If the
+    batched call fails, the group is rescored one request at a time so a
+    single bad input only fails its own caller; if it failed because the
+    model is not available, the whole group fails at once instead.
+    """
+
+    def __init__(self, predictor, max_batch_size: int = MICRO_BATCH_MAX_SIZE,
+                 max_wait_ms: float = MICRO_BATCH_MAX_WAIT_MS):
+        self.logger = logging.getLogger('MicroBatcher')
+        self.predictor = predictor
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue = queue.Queue()
+        self._pending = 0
+        self._closed = False
+        self._lock = threading.Lock()
+        self._stats = {'requests': 0, 'batches': 0, 'largest_batch': 0, 'fallbacks': 0}
+        self._thread = threading.Thread(target=self._run, name='micro-batcher', daemon=True)
+        self._thread.start()
+
+    def predict(self, features: Dict[str, Any], hours: int = 1) -> Dict[str, Any]:
+        """Queue one prediction and wait for its result."""
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Micro-batcher is closed")
+            self._pending += 1
+            self._stats['requests'] += 1
+            # Queued under the lock so nothing lands behind close()'s sentinel
+            self._queue.put((features, int(hours), future))
+        return future.result()
+
+    def batch_predict(self, features_list: List[Dict[str, Any]], hours: int = 1) -> List[Dict[str, Any]]:
+        """Explicit batches are already vectorized; pass them straight through."""
+        return self.predictor.batch_predict(features_list, hours=hours)
+
+    def close(self, timeout: float = 5):
+        """
+        Stop the worker after the queued requests are served. Later calls
+        are refused, and requests still queued if the worker does not stop
+        within timeout are failed rather than left waiting.
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(None)
+        self._thread.join(timeout=timeout)
+        self._fail_queued(RuntimeError("Micro-batcher is closed"))
+
+    def _fail_queued(self, error: Exception):
+        """Fail every request still in the queue, leaving the stop sentinel for a busy worker."""
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                item[2].set_exception(error)
+                with self._lock:
+                    self._pending -= 1
+        self._queue.put(None)
+
+    def _collect(self, first: Tuple) -> Tuple[List[Tuple], bool]:
+        """Gather a batch starting with first; returns the batch and whether to stop."""
+        batch = [first]
+        deadline = monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            with self._lock:
+                others_waiting = self._pending > len(batch)
+            if not others_waiting:
+                # Nobody else is in line; waiting would only add latency
+                break
+            remaining = deadline - monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _run(self):
+        stop = False
+        while not stop:
+            first = self._queue.get()
+            if first is None:
+                break
+            batch, stop = self._collect(first)
+            self._dispatch(batch)
+
+    def _dispatch(self, batch: List[Tuple]):
+        """Score a batch, grouped by horizon, and resolve each caller's future."""
+        with self._lock:
+            self._stats['batches'] += 1
+            self._stats['largest_batch'] = max(self._stats['largest_batch'], len(batch))
+
+        for hours, group in groupby(sorted(batch, key=lambda item: item[1]), key=lambda item: item[1]):
+            group = list(group)
+            try:
+                results = self.predictor.batch_predict([features for features, _, _ in group], hours=hours)
+                for (_, _, future), result in zip(group, results):
+                    future.set_result(result)
+            except Exception as e:
+                if isinstance(e, ModelNotReady) or getattr(self.predictor, 'load_error', None):
+                    # Every request would wait out the same load again; fail them together
+                    for _, _, future in group:
+                        future.set_exception(e)
+                    continue
+                self.logger.error(f"Micro-batch of {len(group)} failed, scoring separately: {str(e)}")
+                with self._lock:
+                    self._stats['fallbacks'] += 1
+                self._dispatch_each(group, hours)
+
+        with self._lock:
+            self._pending -= len(batch)
+
+    def _dispatch_each(self, group: List[Tuple], hours: int):
+        """Score each request on its own, resolving its future with its result or its own error."""
+        for features, _, future in group:
+            try:
+                future.set_result(self.predictor.predict(features, hours=hours))
+            except Exception as e:
+                future.set_exception(e)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return request/batch counters and the mean batch size."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['pending'] = self._pending
+        stats['mean_batch_size'] = round(stats['requests'] / stats['batches'], 2) if stats['batches'] else 0.0
+        return stats
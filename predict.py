@@ -5,15 +5,24 @@ Author: Mithileshvinayak
 Last Updated: 2025-04-10 13:10:15
 """
 
+import json
 import joblib
+import threading
 import numpy as np
-import pandas as pd
-from pathlib import Path
-from datetime import datetime
-from typing import Dict, Any, List
+from datetime import datetime, timedelta
+from time import perf_counter
+from statistics import NormalDist
+from typing import Dict, Any, List, Optional, Tuple
 import logging
 
-from config import MODEL_PATH, SCALER_PATH
+from config import (MODEL_PATH, SCALER_PATH, MODEL_LOAD_MODE, MODEL_LOAD_WAIT, MODEL_MMAP_MODE,
+                    TREE_ENGINE_ENABLED, TREE_ENGINE_DIR, TREE_ENGINE_TOLERANCE, ATTRIBUTION_MAX_ROWS,
+                    INTERVAL_LEVEL, INTERVAL_MIN_SPREAD, INTERVAL_CONFIDENCE_SCALE, CALIBRATION_PATH,
+                    FORECAST_STEP_HOURS, FORECAST_MAX_HOURS)
+from metrics import INFERENCE_LATENCY, INFERENCE_ROWS
+from inference_policy import InferencePolicy
+from feature_builder import time_features
+from tree_engine import TreeEngine, ENGINE_FORMAT, artifact_version
 
 # Features expected by the trained model
 MODEL_FEATURES = [
@@ -46,21 +55,248 @@ MODEL_FEATURES = [
     'humidity_rolling_mean_3h', 'humidity_rolling_mean_6h'
 ]
 
+# Model features grouped into the factor categories reported with each
+# prediction; time features are left out. Every name must be in
+# MODEL_FEATURES. The model takes no industrial inputs, so
+# industrial_impact has no features and is always reported as 0; it is
+# kept so every response carries the same factor keys
+FACTOR_GROUPS = {
+    'air_pollutants': ['pm25', 'pm10', 'o3', 'co', 'no2', 'so2', 'gas_pollutant_index', 'pm_ratio',
+                       'pm25_rolling_mean_3h', 'pm25_rolling_mean_6h',
+                       'pm10_rolling_mean_3h', 'pm10_rolling_mean_6h'],
+    'weather_conditions': ['temperature', 'humidity', 'wind_speed', 'precipitation', 'pressure',
+                           'wind_direction', 'wind_pressure', 'temp_humidity',
+                           'temperature_rolling_mean_3h', 'temperature_rolling_mean_6h',
+                           'humidity_rolling_mean_3h', 'humidity_rolling_mean_6h'],
+    'industrial_impact': [],
+    'urban_factors': ['traffic_level', 'traffic_pollution_index']
+}
+
+# Individual features listed with each prediction's factor breakdown
+TOP_FEATURES = 3
+
+# How forecast horizons are produced, reported with every forecast. The
+# model has no lagged AQI input and training data is daily, so neither a
+# recursive rollout nor per-horizon models are possible; each horizon is
+# the current inputs with the calendar features moved to its time
+FORECAST_METHOD = 'calendar_shift'
+
+class FeatureEncoder:
+    """
+    Turns feature dictionaries into scaled float64 rows in model column order.
+
+    The name -> column map, default row and scaler statistics are compiled
+    once, so a single prediction costs one small allocation, one dictionary
+    pass and two vector operations instead of building DataFrames. Every
+    call returns a new array, so callers may keep or modify it.
+    """
+
+    def __init__(self, features: List[str], scaler=None):
+        self.features = list(features)
+        self.index = {name: i for i, name in enumerate(self.features)}
+        # Missing features default to 0, matching the original DataFrame path
+        self.defaults = np.zeros(len(self.features), dtype=np.float64)
+        self.scaler = scaler
+        self.mean = None
+        self.scale_ = None
+        if hasattr(scaler, 'mean_') and hasattr(scaler, 'scale_'):
+            # StandardScaler: (x - mean_) / scale_, with either part optional
+            n = len(self.features)
+            self.mean = np.asarray(scaler.mean_ if scaler.mean_ is not None else np.zeros(n), dtype=np.float64)
+            self.scale_ = np.asarray(scaler.scale_ if scaler.scale_ is not None else np.ones(n), dtype=np.float64)
+
+    def _fill(self, row: np.ndarray, features: Dict[str, Any]):
+        """Copy known, non-null feature values into row."""
+        index = self.index
+        for name, value in features.items():
+            i = index.get(name)
+            if i is not None and value is not None:
+                row[i] = value
+
+    def encode(self, features: Dict[str, Any], scale: bool = True) -> np.ndarray:
+        """Encode (and scale) one feature set into a new (1, n) row."""
+        return self.encode_batch([features], scale=scale)
+
+    def encode_batch(self, features_list: List[Dict[str, Any]], scale: bool = True) -> np.ndarray:
+        """Encode (and scale) many feature sets into a new (rows, n) matrix."""
+        matrix = np.empty((len(features_list), len(self.features)), dtype=np.float64)
+        matrix[:] = self.defaults
+        for row, features in zip(matrix, features_list):
+            self._fill(row, features)
+        return self.transform(matrix) if scale else matrix
+
+    def transform(self, matrix: np.ndarray) -> np.ndarray:
+        """Scale a raw matrix in place."""
+        if self.mean is None:
+            return self.scaler.transform(matrix) if self.scaler is not None else matrix
+        matrix -= self.mean
+        matrix /= self.scale_
+        return matrix
+
+
+class ModelNotReady(RuntimeError):
+    """Raised when a prediction arrives before the model has finished loading."""
+
+
 class AQIPredictor:
-    def __init__(self):
+    """
+    Loads the trained model and scaler and turns feature sets into AQI predictions.
+
+    load_mode 'eager' loads in the constructor. 'lazy' defers loading to the
+    first prediction, and 'background' loads on a separate thread so the
+    server can start answering health checks and snapshot routes right
+    away; predictions wait up to MODEL_LOAD_WAIT seconds for it and then
+    raise ModelNotReady. `ready` reports whether the model is loaded.
+    """
+
+    def __init__(self, load_mode: str = MODEL_LOAD_MODE):
         self.logger = logging.getLogger('AQIPredictor')
-        self.model = self._load_model()
-        self.scaler = self._load_scaler()
         self.features = MODEL_FEATURES
+        self.load_mode = load_mode
+        self.model = None
+        self.scaler = None
+        self.encoder = None
+        self.engine = None
+        self.engine_inference = None
+        self.inference = None
+        self.importances = {}
+        self.global_factors = {}
+        self.factor_matrix = None
+        self.calibration = None
+        self.load_seconds = None
+        self.load_error = None
+        self._loaded = threading.Event()
+        self._load_lock = threading.Lock()
+        # Identifies the artifacts on disk, e.g. for keying cached predictions
+        self.model_version = self._model_version()
+
+        if load_mode == 'background':
+            threading.Thread(target=self._load_in_background, name='model-loader', daemon=True).start()
+        elif load_mode != 'lazy':
+            self.load()
+
+    @property
+    def ready(self) -> bool:
+        """Whether the model and scaler are loaded."""
+        return self._loaded.is_set()
+
+    def load(self):
+        """Load the model and scaler; later calls return immediately."""
+        with self._load_lock:
+            if self._loaded.is_set():
+                return
+            started = perf_counter()
+            scaler = self._load_scaler()
+            self.encoder = FeatureEncoder(self.features, scaler)
+            # Flat-array traversal, much cheaper per call than sklearn for small
+            # batches. A current saved engine was verified when it was written,
+            # so the forest is only unpickled to compile one or to fall back on
+            model = None
+            engine = self._open_engine() if TREE_ENGINE_ENABLED else None
+            if engine is None:
+                model = self._load_model()
+                engine = self._compile_engine(model) if TREE_ENGINE_ENABLED else None
+            if engine is not None:
+                # Drop the forest so workers only hold the shared memory-mapped arrays
+                model = None
+                importances = engine.meta['feature_importances']
+            else:
+                # feature_importances_ is recomputed over every tree on each access
+                importances = model.feature_importances_
+            self.engine = engine
+            # Serial for small batches, chunked over a shared thread budget for large ones
+            self.engine_inference = InferencePolicy(engine) if engine is not None else None
+            self.inference = InferencePolicy(model) if model is not None else None
+            self.importances = dict(zip(self.features, importances))
+            self.global_factors = self._analyze_contributing_factors()
+            self.factor_matrix = self._factor_matrix()
+            self.calibration = self._load_calibration()
+            self.model, self.scaler = model, scaler
+            self.load_seconds = round(perf_counter() - started, 3)
+            self.load_error = None
+            self._loaded.set()
+        self.logger.info(f"Model {self.model_version} loaded in {self.load_seconds}s")
+
+    def _load_in_background(self):
+        try:
+            self.load()
+        except Exception as e:
+            self.load_error = str(e)
+
+    def _ensure_loaded(self):
+        """Block until the model is usable, loading it here if needed."""
+        if self._loaded.is_set():
+            return
+        if self.load_mode == 'background' and self.load_error is None:
+            if not self._loaded.wait(MODEL_LOAD_WAIT):
+                raise ModelNotReady("Model is still loading")
+            return
+        # Lazy mode, or a background load that failed and is retried here
+        try:
+            self.load()
+        except Exception as e:
+            self.load_error = str(e)
+            raise ModelNotReady(f"Model could not be loaded: {str(e)}")
+
+    def get_status(self) -> Dict[str, Any]:
+        """Readiness and load details for health checks."""
+        return {
+            'ready': self.ready,
+            'load_mode': self.load_mode,
+            'model_version': self.model_version,
+            'load_seconds': self.load_seconds,
+            'mmap_mode': MODEL_MMAP_MODE,
+            'scorer': 'engine' if self.engine is not None else 'sklearn',
+            'engine': ({k: v for k, v in self.engine.meta.items() if k != 'feature_importances'}
+                       if self.engine is not None else None),
+            'error': self.load_error
+        }
 
     def _load_model(self):
         """Load the trained model."""
         try:
-            return joblib.load(MODEL_PATH)
+            # Arrays joblib stored uncompressed are mapped from the page cache
+            # instead of read; sklearn still copies tree nodes when unpickling
+            return joblib.load(MODEL_PATH, mmap_mode=MODEL_MMAP_MODE)
         except Exception as e:
             self.logger.error(f"Error loading model: {str(e)}")
             raise
 
+    def _model_version(self) -> str:
+        """Fingerprint the model and scaler files by path, size and mtime."""
+        return artifact_version([MODEL_PATH, SCALER_PATH])
+
+    def _open_engine(self) -> Optional[TreeEngine]:
+        """
+        Open the memory-mapped engine that training (or `python
+        tree_engine.py` at deploy time) saved and verified for this model.
+        Returns None if it is missing, stale or of another format.
+        """
+        try:
+            engine = TreeEngine.load(TREE_ENGINE_DIR)
+        except (OSError, ValueError, KeyError):
+            return None
+        if (engine.meta.get('source_version') != self.model_version
+                or engine.meta.get('format') != ENGINE_FORMAT):
+            return None
+        return engine
+
+    def _compile_engine(self, model) -> Optional[TreeEngine]:
+        """
+        Compile an engine in memory for this process only; the server never
+        writes into the model directory. Returns None, so sklearn is used,
+        if the engine's predictions do not match the forest's.
+        """
+        self.logger.warning(f"No current tree engine in {TREE_ENGINE_DIR}; compiling it in memory "
+                            f"(run `python tree_engine.py` at deploy time to share it across workers)")
+        engine = TreeEngine.compile(model, self.encoder.mean, self.encoder.scale_,
+                                    source_version=self.model_version)
+        error = engine.verify(model, self.encoder.mean, self.encoder.scale_)
+        if error > TREE_ENGINE_TOLERANCE:
+            self.logger.warning(f"Tree engine differs from the model by {error}; using sklearn")
+            return None
+        return engine
+
     def _load_scaler(self):
         """Load the fitted scaler."""
         try:
@@ -69,6 +305,75 @@ class AQIPredictor:
             self.logger.error(f"Error loading scaler: {str(e)}")
             raise
 
+    def _score(self, rows: np.ndarray, explain: bool = True) -> Tuple[np.ndarray, Optional[np.ndarray],
+                                                                     Optional[Tuple[np.ndarray, np.ndarray]]]:
+        """
+        Predict encoded, unscaled rows in one pass over the trees. Returns
+        the predictions, the spread of the tree outputs and the (bias,
+        contributions) attribution; batches past ATTRIBUTION_MAX_ROWS (or
+        explain=False) skip the attribution, and without the engine only
+        predictions come back.
+        """
+        if self.engine is None:
+            return self.inference.predict(self.encoder.transform(rows)), None, None
+        if not self.engine.folded:
+            rows = self.encoder.transform(rows)
+        if explain and len(rows) <= ATTRIBUTION_MAX_ROWS:
+            parts = self.engine_inference.apply(self.engine.explain, rows)
+            predictions, spread, bias, contributions = (np.concatenate(arrays) for arrays in zip(*parts))
+            return predictions, spread, (bias, contributions)
+        parts = self.engine_inference.apply(self.engine.predict_with_spread, rows)
+        predictions, spread = (np.concatenate(arrays) for arrays in zip(*parts))
+        return predictions, spread, None
+
+    def _load_calibration(self) -> Dict[str, Any]:
+        """
+        Interval quantiles of spread-normalized residuals saved by training.
+        Without a calibration for this model, fall back to normal quantiles.
+        """
+        try:
+            with open(CALIBRATION_PATH) as f:
+                calibration = json.load(f)
+            if calibration.get('source_version') == self.model_version:
+                return {**calibration, 'calibrated': True}
+            self.logger.info("Interval calibration is for a different model; using normal quantiles")
+        except (OSError, ValueError) as e:
+            self.logger.info(f"No interval calibration ({str(e)}); using normal quantiles")
+        z = NormalDist().inv_cdf(0.5 + INTERVAL_LEVEL / 2)
+        return {'level': INTERVAL_LEVEL, 'quantiles': [-z, z], 'min_spread': INTERVAL_MIN_SPREAD,
+                'calibrated': False}
+
+    def _intervals(self, predictions: np.ndarray, spread: Optional[np.ndarray]) -> List[Dict[str, Any]]:
+        """
+        Prediction intervals and variance-based confidence for each row.
+
+        The interval is the prediction plus the calibrated quantiles times
+        the tree spread. Confidence is one minus the interval's half-width
+        relative to the prediction (or one AQI category band for low
+        predictions), so it falls as the trees disagree.
+        """
+        if spread is None:
+            return [{}] * len(predictions)
+        calibration = self.calibration
+        low_q, high_q = calibration['quantiles']
+        sigma = np.maximum(spread, calibration['min_spread'])
+        lower = np.maximum(predictions + low_q * sigma, 0.0)
+        upper = predictions + high_q * sigma
+        confidence = np.clip(1 - (upper - lower) / 2 / np.maximum(predictions, INTERVAL_CONFIDENCE_SCALE),
+                             0.0, 1.0)
+        return [{
+            'confidence': round(float(confidence[i]), 2),
+            'interval': {'lower': round(float(lower[i])), 'upper': round(float(upper[i])),
+                         'level': calibration['level'], 'calibrated': calibration['calibrated']},
+            'tree_spread': round(float(spread[i]), 1)
+        } for i in range(len(predictions))]
+
+    def _explanations(self, attribution: Optional[Tuple[np.ndarray, np.ndarray]], rows: int) -> List[Dict[str, Any]]:
+        """Per-row factor breakdowns, or the global shares when sklearn scored the rows."""
+        if attribution is None:
+            return [{'factors': self.global_factors}] * rows
+        return self._attribute(*attribution)
+
     def _get_risk_level(self, aqi: float) -> str:
         """Determine risk level based on AQI value."""
         if aqi <= 50:
@@ -85,12 +390,8 @@ class AQIPredictor:
             return "Hazardous"
 
     def _calculate_confidence(self, prediction: float, features: Dict) -> float:
-        """Calculate prediction confidence based on data quality."""
+        """Data-quality confidence, used when the tree spread is unavailable."""
         try:
-            # Base confidence on model's feature importance
-            importances = dict(zip(self.features, 
-                                 self.model.feature_importances_))
-            
             # Calculate data quality score
             data_quality = sum(1 for f in features if features[f] is not None) / len(features)
             
@@ -107,33 +408,78 @@ class AQIPredictor:
             self.logger.warning(f"Error calculating confidence: {str(e)}")
             return 0.5
 
-    def _analyze_contributing_factors(self, features: Dict) -> Dict[str, float]:
-        """Analyze which factors contribute most to the prediction."""
+    def _analyze_contributing_factors(self) -> Dict[str, float]:
+        """Global factor shares from the forest's feature importances, used when per-row attribution is unavailable."""
         try:
-            # Get feature importance from model
-            importances = dict(zip(self.features, 
-                                 self.model.feature_importances_))
-            
-            # Group factors by category
-            factors = {
-                "air_pollutants": sum(importances.get(f, 0) for f in 
-                                    ['pm25', 'pm10', 'no2', 'co']),
-                "weather_conditions": sum(importances.get(f, 0) for f in 
-                                       ['temperature', 'humidity', 'wind_speed']),
-                "industrial_impact": sum(importances.get(f, 0) for f in 
-                                      ['industrial_activity_index', 'emission_levels']),
-                "urban_factors": sum(importances.get(f, 0) for f in 
-                                  ['daily_vehicle_count', 'urban_density'])
-            }
+            importances = self.importances
+            factors = {group: float(sum(importances.get(f, 0) for f in names))
+                       for group, names in FACTOR_GROUPS.items()}
             
             # Normalize to percentages
             total = sum(factors.values())
-            return {k: round(v/total, 2) for k, v in factors.items()}
+            return {k: round(v/total, 2) if total else 0.0 for k, v in factors.items()}
             
         except Exception as e:
             self.logger.error(f"Error analyzing factors: {str(e)}")
             return {}
 
+    def _factor_matrix(self) -> np.ndarray:
+        """(n_features, n_groups) 0/1 matrix summing feature contributions into factor groups."""
+        matrix = np.zeros((len(self.features), len(FACTOR_GROUPS)))
+        for j, names in enumerate(FACTOR_GROUPS.values()):
+            for name in names:
+                i = self.encoder.index.get(name)
+                if i is not None:
+                    matrix[i, j] = 1.0
+        return matrix
+
+    def _attribute(self, bias: np.ndarray, contributions: np.ndarray) -> List[Dict[str, Any]]:
+        """
+        Turn per-feature contributions into each row's factor breakdown:
+        the share of the movement away from the baseline each factor group
+        accounts for, its signed effect in AQI points and the features that
+        moved the prediction most.
+        """
+        grouped = contributions @ self.factor_matrix
+        magnitude = np.abs(grouped)
+        totals = magnitude.sum(axis=1, keepdims=True)
+        shares = np.divide(magnitude, totals, out=np.zeros_like(magnitude), where=totals > 0)
+        top = np.argsort(-np.abs(contributions), axis=1)[:, :TOP_FEATURES]
+        groups = list(FACTOR_GROUPS)
+
+        explanations = []
+        for i in range(len(contributions)):
+            explanations.append({
+                'factors': {group: round(float(share), 2) for group, share in zip(groups, shares[i])},
+                'factor_contributions': {group: round(float(points), 1) for group, points in zip(groups, grouped[i])},
+                'baseline_aqi': round(float(bias[i]), 1),
+                'top_features': [{'feature': self.features[j], 'aqi': round(float(contributions[i, j]), 1)}
+                                 for j in top[i]]
+            })
+        return explanations
+
+    def _format_result(self, predicted_aqi: float, confidence: float,
+                       explanation: Dict[str, Any], hours: int, timestamp: str) -> Dict[str, Any]:
+        """Build the response dictionary for one prediction."""
+        predicted_aqi = float(predicted_aqi)
+        return {
+            "aqi": round(predicted_aqi),
+            "risk_level": self._get_risk_level(predicted_aqi),
+            "prediction_for": f"next {hours} hour(s)",
+            "confidence": confidence,
+            **explanation,
+            "timestamp": timestamp
+        }
+
+    def _build_result(self, predicted_aqi: float, features: Dict[str, Any], interval: Dict[str, Any],
+                      explanation: Dict[str, Any], hours: int, timestamp: str) -> Dict[str, Any]:
+        """Format one prediction, preferring the spread-based confidence over the data-quality one."""
+        details = {k: v for k, v in interval.items() if k != 'confidence'}
+        confidence = interval.get('confidence')
+        if confidence is None:
+            confidence = self._calculate_confidence(predicted_aqi, features)
+        return self._format_result(predicted_aqi, confidence, {**details, **explanation}, hours, timestamp)
+
     def predict(self, features: Dict[str, Any], hours: int = 1) -> Dict[str, Any]:
         """
         Make AQI prediction based on input features.
@@ -149,43 +495,97 @@ class AQIPredictor:
             - confidence: float
             - contributing_factors: Dict[str, float]
         """
+        self._ensure_loaded()
         try:
-            # Prepare features
-            df = pd.DataFrame([features])
-            
-            # Add missing columns
-            for col in self.features:
-                if col not in df.columns:
-                    df[col] = 0
-            
-            # Ensure features are in the correct order
-            ordered_df = pd.DataFrame(columns=self.features)
-            for col in self.features:
-                ordered_df[col] = df[col] if col in df else 0
-            
-            # Scale features
-            scaled_features = self.scaler.transform(ordered_df)
+            # Encode straight into a scaled NumPy row
+            rows = self.encoder.encode(features, scale=False)
             
             # Make prediction
-            predicted_aqi = self.model.predict(scaled_features)[0]
-            
-            # Calculate confidence and analyze factors
-            confidence = self._calculate_confidence(predicted_aqi, features)
-            factors = self._analyze_contributing_factors(features)
+            with INFERENCE_LATENCY.time(method='predict'):
+                predictions, spread, attribution = self._score(rows)
+            INFERENCE_ROWS.inc(method='predict')
             
-            return {
-                "aqi": round(predicted_aqi),
-                "risk_level": self._get_risk_level(predicted_aqi),
-                "prediction_for": f"next {hours} hour(s)",
-                "confidence": confidence,
-                "factors": factors,
-                "timestamp": datetime.utcnow().isoformat()
-            }
+            # Add the interval and explain this prediction
+            return self._build_result(predictions[0], features, self._intervals(predictions, spread)[0],
+                                      self._explanations(attribution, 1)[0], hours,
+                                      datetime.utcnow().isoformat())
             
         except Exception as e:
             self.logger.error(f"Prediction error: {str(e)}")
             raise
 
-    def batch_predict(self, features_list: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Make predictions for multiple feature sets."""
-        return [self.predict(features) for features in features_list]
\ No newline at end of file
+    def batch_predict(self, features_list: List[Dict[str, Any]], hours: int = 1) -> List[Dict[str, Any]]:
+        """
+        Make predictions for multiple feature sets.
+
+        All rows are encoded and scored with a single model call, which also
+        yields each row's contributing factors.
+        """
+        if not features_list:
+            return []
+        self._ensure_loaded()
+
+        try:
+            rows = self.encoder.encode_batch(features_list, scale=False)
+            with INFERENCE_LATENCY.time(method='batch_predict'):
+                predictions, spread, attribution = self._score(rows)
+            INFERENCE_ROWS.inc(len(features_list), method='batch_predict')
+
+            explanations = self._explanations(attribution, len(features_list))
+            intervals = self._intervals(predictions, spread)
+            timestamp = datetime.utcnow().isoformat()
+            return [
+                self._build_result(predicted_aqi, features, interval, explanation, hours, timestamp)
+                for predicted_aqi, features, interval, explanation in zip(predictions, features_list,
+                                                                          intervals, explanations)
+            ]
+
+        except Exception as e:
+            self.logger.error(f"Batch prediction error: {str(e)}")
+            raise
+
+    def forecast(self, features: Dict[str, Any], horizons: Optional[List[int]] = None,
+                 start: Optional[datetime] = None) -> Dict[str, Any]:
+        """
+        Predict AQI now and at each horizon with one batched model call.
+
+        Current conditions are held fixed and only the calendar features
+        move to each horizon's time (FORECAST_METHOD), so horizons differ
+        only as far as the model responds to time of day and date; the
+        response says so in 'method'. The peak is the earliest highest point.
+        """
+        self._ensure_loaded()
+        start = start or datetime.now()
+        if horizons is None:
+            horizons = list(range(0, FORECAST_MAX_HOURS + 1, FORECAST_STEP_HOURS))
+        moments = [start + timedelta(hours=h) for h in horizons]
+
+        try:
+            rows = self.encoder.encode_batch([{**features, **time_features(moment)} for moment in moments],
+                                             scale=False)
+            with INFERENCE_LATENCY.time(method='forecast'):
+                predictions, spread, _ = self._score(rows, explain=False)
+            INFERENCE_ROWS.inc(len(horizons), method='forecast')
+
+            points = []
+            for hours, moment, predicted_aqi, interval in zip(horizons, moments, predictions,
+                                                                self._intervals(predictions, spread)):
+                predicted_aqi = float(predicted_aqi)
+                points.append({
+                    'hours': hours,
+                    'time': moment.isoformat(timespec='minutes'),
+                    'aqi': round(predicted_aqi),
+                    'risk_level': self._get_risk_level(predicted_aqi),
+                    **interval
+                })
+            peak = max(points, key=lambda point: point['aqi'])
+            return {
+                'method': FORECAST_METHOD,
+                'horizons': points,
+                'peak': {'hours': peak['hours'], 'aqi': peak['aqi'], 'risk_level': peak['risk_level']},
+                'timestamp': datetime.utcnow().isoformat()
+            }
+
+        except Exception as e:
+            self.logger.error(f"Forecast error: {str(e)}")
+            raise
@@ -0,0 +1,138 @@
+"""
+Prediction result cache for Smart AQI Guardian
+Lets every viewer of a location share one prediction per time window
+"""
+
+import asyncio
+import hashlib
+import json
+from time import time
+from typing import Dict, Any, Optional, Callable, Awaitable
+import logging
+
+from config import (PREDICTION_CACHE_WINDOW, PREDICTION_CACHE_COORD_PRECISION,
+                    PREDICTION_CACHE_MAX_ENTRIES)
+from response_cache import ResponseCache, SingleFlight
+
+# Request fields that locate the prediction rather than override its inputs
+LOCATION_FIELDS = {'city', 'lat', 'lon'}
+
+
+class PredictionCache:
+    """
+    Caches /predict responses by location, time bucket and inputs.
+
+    Keys combine the normalized city, lat/lon rounded to a bucket, the
+    current time window, a hash of the user-supplied overrides and the
+    model version, so a retrained model or a new window never serves an
+    old result. Each entry also records the version of the upstream
+    snapshot it was computed from and is dropped once that snapshot is
+    replaced. Concurrent misses for one key share a single computation,
+    whether they come from threads (get_or_compute) or from coroutines on
+    one event loop (aget_or_compute).
+    """
+
+    def __init__(self, window: float = PREDICTION_CACHE_WINDOW,
+                 coord_precision: int = PREDICTION_CACHE_COORD_PRECISION,
+                 max_entries: int = PREDICTION_CACHE_MAX_ENTRIES):
+        self.logger = logging.getLogger('PredictionCache')
+        self.window = window
+        self.coord_precision = coord_precision
+        self._cache = ResponseCache(max_entries=max_entries)
+        self._inflight = SingleFlight()
+        self._ainflight = {}
+        self._astats = {'calls': 0, 'coalesced': 0}
+        self._invalidations = 0
+
+    def key(self, city: str, lat: float, lon: float, features: Dict[str, Any],
+            model_version: str, now: Optional[float] = None) -> str:
+        """Build the cache key for a prediction request."""
+        overrides = {k: v for k, v in features.items() if k not in LOCATION_FIELDS}
+        overrides_hash = hashlib.sha1(
+            json.dumps(overrides, sort_keys=True, default=str).encode('utf-8')).hexdigest()[:16]
+        bucket = int((time() if now is None else now) // self.window)
+        return '|'.join([
+            ' '.join(city.strip().lower().split()),
+            f"{round(float(lat), self.coord_precision)},{round(float(lon), self.coord_precision)}",
+            str(bucket),
+            overrides_hash,
+            model_version
+        ])
+
+    def get(self, key: str, snapshot_version: Any) -> Optional[Dict[str, Any]]:
+        """Return the cached result for key unless it was computed from an older snapshot."""
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        if entry.value['snapshot_version'] != snapshot_version:
+            self._cache.invalidate(key)
+            self._invalidations += 1
+            return None
+        return entry.value['result']
+
+    def set(self, key: str, result: Dict[str, Any], snapshot_version: Any):
+        """Store a result for the rest of the current window."""
+        if snapshot_version is None:
+            # No good upstream snapshot behind this result; don't pin it
+            return
+        self._cache.set(key, {'result': result, 'snapshot_version': snapshot_version},
+                        self.window, size=len(json.dumps(result, default=str)))
+
+    def get_or_compute(self, key: str, snapshot_version: Callable[[], Any],
+                       compute: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Return the cached result for key, computing it at most once per window.
+
+        snapshot_version is called before the lookup and again after
+        compute, since computing may itself replace the snapshot.
+        """
+        cached = self.get(key, snapshot_version())
+        if cached is not None:
+            return cached
+
+        def run():
+            result = compute()
+            self.set(key, result, snapshot_version())
+            return result
+
+        return self._inflight.do(key, run)
+
+    async def aget_or_compute(self, key: str, snapshot_version: Callable[[], Any],
+                              compute: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        """
+        Async counterpart of get_or_compute.
+
+        Misses for a key that is already being computed await the same
+        task instead of starting another; the task is shielded so a caller
+        that goes away does not cancel it for the others.
+        """
+        cached = self.get(key, snapshot_version())
+        if cached is not None:
+            return cached
+
+        task = self._ainflight.get(key)
+        if task is None:
+            async def run():
+                result = await compute()
+                self.set(key, result, snapshot_version())
+                return result
+
+            task = asyncio.ensure_future(run())
+            self._ainflight[key] = task
+            task.add_done_callback(lambda _: self._ainflight.pop(key, None))
+            self._astats['calls'] += 1
+        else:
+            self._astats['coalesced'] += 1
+        return await asyncio.shield(task)
+
+    def invalidate(self):
+        """Drop every cached prediction."""
+        self._cache.invalidate()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters, snapshot invalidations and coalesced computations."""
+        stats = self._cache.stats()
+        stats['snapshot_invalidations'] = self._invalidations
+        stats['single_flight'] = self._inflight.stats()
+        stats['async_single_flight'] = {**self._astats, 'in_flight': len(self._ainflight)}
+        return stats
@@ -0,0 +1,210 @@
+"""
+Stale-while-revalidate prefetcher for the API Integration Layer
+Keeps aggregated data warm for hot cities so requests never wait on upstreams
+"""
+
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from time import monotonic
+from typing import Dict, Any, List, Optional, Tuple
+import logging
+
+from config import (PREFETCH_LOCATIONS, PREFETCH_INTERVAL, PREFETCH_SOFT_TTL,
+                    PREFETCH_HARD_TTL, PREFETCH_WORKERS, PREFETCH_MAX_SNAPSHOTS)
+
+
+class SnapshotPrefetcher:
+    """
+    Serves aggregated data from the last good snapshot per location.
+
+    Snapshots older than the soft TTL are returned immediately while a
+    refresh runs in the background. Only snapshots older than the hard TTL,
+    or locations never seen before, are fetched on the request path. A
+    background thread refreshes the configured hot locations on a fixed
+    interval so they rarely go stale at all.
+
+    Snapshots are keyed by request parameters, so at most max_snapshots
+    are held, least recently used evicted first, and each refresh drops
+    snapshots past the hard TTL. Hot locations are never evicted and keep
+    their last good snapshot, which is served while upstreams are failing.
+    """
+
+    def __init__(self, integrator, locations: Optional[List[Dict[str, Any]]] = None,
+                 interval: float = PREFETCH_INTERVAL, soft_ttl: float = PREFETCH_SOFT_TTL,
+                 hard_ttl: float = PREFETCH_HARD_TTL, max_snapshots: int = PREFETCH_MAX_SNAPSHOTS):
+        self.logger = logging.getLogger('SnapshotPrefetcher')
+        self.integrator = integrator
+        self.locations = PREFETCH_LOCATIONS if locations is None else locations
+        self.interval = interval
+        self.soft_ttl = soft_ttl
+        self.hard_ttl = hard_ttl
+        self.max_snapshots = max_snapshots
+        self._hot = {self._key(location['city'], location['lat'], location['lon'])
+                     for location in self.locations}
+        self._snapshots = OrderedDict()
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        # Separate from the integrator's pool, which each refresh fans out into
+        self._executor = ThreadPoolExecutor(max_workers=PREFETCH_WORKERS,
+                                            thread_name_prefix='prefetch')
+
+    @staticmethod
+    def _key(city: str, lat: float, lon: float) -> Tuple[str, float, float]:
+        """Normalize a location into a snapshot key."""
+        return city.strip().lower(), round(float(lat), 4), round(float(lon), 4)
+
+    @staticmethod
+    def _is_good(data: Dict[str, Any]) -> bool:
+        """A snapshot is worth keeping if at least one source returned data."""
+        return any(s.get('status') == 'ok' for s in data.get('sources', {}).values())
+
+    def start(self):
+        """Start the background refresh loop."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='snapshot-prefetcher', daemon=True)
+        self._thread.start()
+        self.logger.info(f"Prefetching {len(self.locations)} location(s) every {self.interval}s")
+
+    def stop(self):
+        """Stop the background refresh loop."""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+        self._executor.shutdown(wait=False)
+
+    def _run(self):
+        """Refresh every hot location, then sleep until the next round."""
+        while not self._stop.is_set():
+            for location in self.locations:
+                if self._stop.is_set():
+                    break
+                try:
+                    self.refresh(location['city'], location['lat'], location['lon'])
+                except Exception as e:
+                    self.logger.error(f"Prefetch of {location.get('city')} failed: {str(e)}")
+            self._stop.wait(self.interval)
+
+    def refresh(self, city: str, lat: float, lon: float) -> Dict[str, Any]:
+        """Fetch fresh aggregated data and keep it if it is good."""
+        data = self.integrator.get_aggregated_data(city, lat, lon)
+        self._keep(self._key(city, lat, lon), data)
+        return data
+
+    def _keep(self, key: Tuple[str, float, float], data: Dict[str, Any]):
+        """Replace the snapshot for key if data is good, then prune expired and excess snapshots."""
+        now = monotonic()
+        with self._lock:
+            if self._is_good(data):
+                self._snapshots[key] = (data, now)
+                self._snapshots.move_to_end(key)
+            else:
+                self.logger.warning(f"Discarding empty snapshot for {key[0]}")
+            expired = [k for k, (_, fetched_at) in self._snapshots.items()
+                       if now - fetched_at >= self.hard_ttl and k not in self._hot]
+            for k in expired:
+                del self._snapshots[k]
+            excess = len(self._snapshots) - self.max_snapshots
+            if excess > 0:
+                # Hot locations are never evicted; the least recently used others go first
+                for k in [k for k in self._snapshots if k not in self._hot][:excess]:
+                    del self._snapshots[k]
+
+    def _refresh_async(self, city: str, lat: float, lon: float):
+        """Schedule a background refresh unless one is already running."""
+        key = self._key(city, lat, lon)
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def run():
+            try:
+                self.refresh(city, lat, lon)
+            except Exception as e:
+                self.logger.error(f"Background refresh of {city} failed: {str(e)}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        self._executor.submit(run)
+
+    def peek(self, city: str, lat: float, lon: float) -> Optional[Dict[str, Any]]:
+        """
+        Serve the snapshot for a location without touching upstreams.
+
+        Returns None when there is no snapshot younger than the hard TTL.
+        A snapshot past its soft TTL is still served, and a background
+        refresh is scheduled for it.
+        """
+        key = self._key(city, lat, lon)
+        with self._lock:
+            snapshot = self._snapshots.get(key)
+            if snapshot is not None:
+                self._snapshots.move_to_end(key)
+        if snapshot is None:
+            return None
+
+        data, fetched_at = snapshot
+        age = monotonic() - fetched_at
+        if age >= self.hard_ttl:
+            return None
+        stale = age >= self.soft_ttl
+        if stale:
+            self._refresh_async(city, lat, lon)
+        return {**data, 'snapshot': {'age_s': round(age, 1), 'stale': stale}}
+
+    def snapshot_version(self, city: str, lat: float, lon: float) -> Optional[float]:
+        """Identify the snapshot currently held for a location; changes whenever it is replaced."""
+        with self._lock:
+            snapshot = self._snapshots.get(self._key(city, lat, lon))
+        return snapshot[1] if snapshot is not None else None
+
+    def store(self, city: str, lat: float, lon: float, data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Keep freshly fetched aggregated data and return what should be served.
+
+        Lets callers that fetch on their own, such as the async app, feed
+        the same snapshots. If data is not good, the previous snapshot is
+        served instead when there is one, whatever its age.
+        """
+        key = self._key(city, lat, lon)
+        with self._lock:
+            snapshot = self._snapshots.get(key)
+        self._keep(key, data)
+        if not self._is_good(data) and snapshot is not None:
+            # Upstreams are failing; an old snapshot beats no data
+            old_data, fetched_at = snapshot
+            return {**old_data, 'snapshot': {'age_s': round(monotonic() - fetched_at, 1), 'stale': True}}
+        return {**data, 'snapshot': {'age_s': 0.0, 'stale': False}}
+
+    def get_aggregated_data(self, city: str, lat: float, lon: float) -> Dict[str, Any]:
+        """
+        Get aggregated data, served from the last good snapshot when possible.
+
+        The returned dictionary carries a 'snapshot' entry with the snapshot
+        age and whether it was past its soft TTL when served.
+        """
+        served = self.peek(city, lat, lon)
+        if served is not None:
+            return served
+        return self.store(city, lat, lon, self.integrator.get_aggregated_data(city, lat, lon))
+
+    def get_status(self) -> Dict[str, Any]:
+        """Describe the snapshots currently held."""
+        now = monotonic()
+        with self._lock:
+            snapshots = {f"{city}@{lat},{lon}": round(now - fetched_at, 1)
+                         for (city, lat, lon), (_, fetched_at) in self._snapshots.items()}
+            refreshing = len(self._refreshing)
+        return {
+            'running': bool(self._thread and self._thread.is_alive()),
+            'snapshot_age_s': snapshots,
+            'refreshing': refreshing,
+            'timestamp': datetime.utcnow().isoformat()
+        }
@@ -0,0 +1,350 @@
+"""
+Response caching for the API Integration Layer
+Provides TTL-aware, memory-bounded caching of upstream responses
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from collections import OrderedDict, namedtuple
+from concurrent.futures import Future
+from time import monotonic, time
+from typing import Dict, Any, Optional, Callable
+import logging
+
+# A cached upstream response; negative entries record a failed fetch
+CacheEntry = namedtuple('CacheEntry', ['value', 'expires_at', 'size', 'negative'])
+
+
+class ResponseCache:
+    """
+    In-process LRU cache with per-entry expiry.
+
+    Entries are bounded both by count and by an approximate byte budget;
+    the least recently used entries are evicted first once either bound
+    is exceeded. Expired entries are reported as misses and dropped.
+    """
+
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 64 * 1024 * 1024):
+        self.logger = logging.getLogger('ResponseCache')
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {
+            'hits': 0,
+            'negative_hits': 0,
+            'misses': 0,
+            'expirations': 0,
+            'evictions': 0
+        }
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        """Return the live entry for key, or None on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats['misses'] += 1
+                return None
+
+            if entry.expires_at <= monotonic():
+                self._remove(key)
+                self._stats['expirations'] += 1
+                self._stats['misses'] += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self._stats['negative_hits' if entry.negative else 'hits'] += 1
+            return entry
+
+    def set(self, key: str, value: Any, ttl: float, size: int = 0, negative: bool = False):
+        """Store value under key for ttl seconds."""
+        if ttl <= 0 or size > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = CacheEntry(value, monotonic() + ttl, size, negative)
+            self._bytes += size
+
+            while self._entries and (len(self._entries) > self.max_entries
+                                     or self._bytes > self.max_bytes):
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self._stats['evictions'] += 1
+
+    def invalidate(self, key: Optional[str] = None):
+        """Drop a single key, or everything when key is None."""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+                self._bytes = 0
+            elif key in self._entries:
+                self._remove(key)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss/eviction counters and current occupancy."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._entries)
+            stats['bytes'] = self._bytes
+
+        lookups = stats['hits'] + stats['negative_hits'] + stats['misses']
+        stats['hit_rate'] = round((stats['hits'] + stats['negative_hits']) / lookups, 4) if lookups else 0.0
+        return stats
+
+    def _remove(self, key: str):
+        """Remove key; caller must hold the lock."""
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+
+
+class SQLiteResponseCache:
+    """
+    Persistent response cache shared by every worker on the host.
+
+    Entries live in a SQLite database in WAL mode so several processes can
+    read and write concurrently, and survive restarts. Expiry uses wall
+    clock time so it is consistent across processes. Size-based eviction
+    removes the least recently accessed rows and runs every few writes to
+    keep the write path cheap.
+    """
+
+    EVICT_EVERY = 32
+
+    def __init__(self, path: str, max_entries: int = 20000, max_bytes: int = 256 * 1024 * 1024):
+        self.logger = logging.getLogger('SQLiteResponseCache')
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._stats = {
+            'hits': 0,
+            'negative_hits': 0,
+            'misses': 0,
+            'expirations': 0,
+            'evictions': 0,
+            'errors': 0
+        }
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY,"
+                " value TEXT NOT NULL,"
+                " expires_at REAL NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " negative INTEGER NOT NULL,"
+                " accessed_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses (accessed_at)")
+
+    def _connection(self) -> sqlite3.Connection:
+        """Get this thread's connection, opening it on first use."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _count(self, stat: str):
+        with self._lock:
+            self._stats[stat] += 1
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        """Return the live entry for key, or None on a miss."""
+        try:
+            conn = self._connection()
+            row = conn.execute(
+                "SELECT value, expires_at, size, negative FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self._count('misses')
+                return None
+
+            now = time()
+            if row[1] <= now:
+                with conn:
+                    conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._count('expirations')
+                self._count('misses')
+                return None
+
+            with conn:
+                conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            negative = bool(row[3])
+            self._count('negative_hits' if negative else 'hits')
+            return CacheEntry(json.loads(row[0]), row[1], row[2], negative)
+        except sqlite3.Error as e:
+            self.logger.warning(f"Cache read failed: {str(e)}")
+            self._count('errors')
+            return None
+
+    def set(self, key: str, value: Any, ttl: float, size: int = 0, negative: bool = False):
+        """Store value under key for ttl seconds."""
+        if ttl <= 0 or size > self.max_bytes:
+            return
+
+        try:
+            now = time()
+            conn = self._connection()
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, json.dumps(value), now + ttl, size, int(negative), now)
+                )
+            with self._lock:
+                self._writes += 1
+                evict = self._writes % self.EVICT_EVERY == 0
+            if evict:
+                self._evict(conn)
+        except sqlite3.Error as e:
+            self.logger.warning(f"Cache write failed: {str(e)}")
+            self._count('errors')
+
+    def _evict(self, conn: sqlite3.Connection):
+        """Drop expired rows, then least recently accessed rows over the bounds."""
+        with conn:
+            conn.execute("DELETE FROM responses WHERE expires_at <= ?", (time(),))
+            count, total = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+            if count <= self.max_entries and total <= self.max_bytes:
+                return
+
+            evicted = 0
+            rows = conn.execute("SELECT key, size FROM responses ORDER BY accessed_at").fetchall()
+            for key, size in rows:
+                if count <= self.max_entries and total <= self.max_bytes:
+                    break
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                count -= 1
+                total -= size
+                evicted += 1
+
+        with self._lock:
+            self._stats['evictions'] += evicted
+
+    def invalidate(self, key: Optional[str] = None):
+        """Drop a single key, or everything when key is None."""
+        try:
+            conn = self._connection()
+            with conn:
+                if key is None:
+                    conn.execute("DELETE FROM responses")
+                else:
+                    conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+        except sqlite3.Error as e:
+            self.logger.warning(f"Cache invalidation failed: {str(e)}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Return this process's counters and the shared store's occupancy."""
+        with self._lock:
+            stats = dict(self._stats)
+        try:
+            count, total = self._connection().execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+        except sqlite3.Error:
+            count, total = None, None
+        stats['entries'] = count
+        stats['bytes'] = total
+
+        lookups = stats['hits'] + stats['negative_hits'] + stats['misses']
+        stats['hit_rate'] = round((stats['hits'] + stats['negative_hits']) / lookups, 4) if lookups else 0.0
+        return stats
+
+
+class TieredResponseCache:
+    """
+    In-process cache in front of a shared persistent cache.
+
+    Lookups try memory first and fall back to the shared store, promoting
+    hits into memory for their remaining lifetime. Writes go to both.
+    """
+
+    def __init__(self, memory: ResponseCache, shared: SQLiteResponseCache):
+        self.memory = memory
+        self.shared = shared
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        """Return the live entry for key from either tier, or None."""
+        entry = self.memory.get(key)
+        if entry is not None:
+            return entry
+
+        entry = self.shared.get(key)
+        if entry is not None:
+            self.memory.set(key, entry.value, entry.expires_at - time(),
+                            size=entry.size, negative=entry.negative)
+        return entry
+
+    def set(self, key: str, value: Any, ttl: float, size: int = 0, negative: bool = False):
+        """Store value under key in both tiers."""
+        self.memory.set(key, value, ttl, size=size, negative=negative)
+        self.shared.set(key, value, ttl, size=size, negative=negative)
+
+    def invalidate(self, key: Optional[str] = None):
+        """Drop key (or everything) from both tiers."""
+        self.memory.invalidate(key)
+        self.shared.invalidate(key)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return counters for each tier."""
+        return {'memory': self.memory.stats(), 'shared': self.shared.stats()}
+
+
+class SingleFlight:
+    """
+    Collapse concurrent calls for the same key into one in-flight call.
+
+    The first caller for a key runs the function; callers that arrive while
+    it is still running block on the same result (or exception) instead of
+    repeating the work.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self._stats = {'calls': 0, 'coalesced': 0}
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        """Run fn for key, or wait on the call already in flight for key."""
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+                self._stats['calls'] += 1
+            else:
+                self._stats['coalesced'] += 1
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+    def stats(self) -> Dict[str, int]:
+        """Return counts of executed and coalesced calls."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['in_flight'] = len(self._calls)
+        return stats
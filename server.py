@@ -1,15 +1,34 @@
-from flask import Flask, send_from_directory
+from flask import Flask, send_from_directory, request, Response
 import os
 
+from http_caching import StaticAssets, etag_matches
+
 app = Flask(__name__)
 
+# The front-end pages and stylesheet sit next to this file; they are
+# compressed once and served from memory with ETags
+STATIC_ROOT = os.path.dirname(os.path.abspath(__file__))
+assets = StaticAssets(STATIC_ROOT)
+assets.precompress()
+
+def serve_asset(path):
+    asset = assets.get(path)
+    if asset is None:
+        return send_from_directory(STATIC_ROOT, path)
+
+    variant = assets.variant(asset, request.headers.get('Accept-Encoding'))
+    if etag_matches(request.headers.get('If-None-Match'), asset.etag):
+        return Response(status=304, headers={k: v for k, v in variant['headers'].items()
+                                             if k in ('ETag', 'Cache-Control', 'Vary')})
+    return Response(variant['body'], headers=variant['headers'])
+
 @app.route('/')
 def index():
-    return send_from_directory('.', 'index.html')
+    return serve_asset('index.html')
 
 @app.route('/<path:path>')
 def serve_file(path):
-    return send_from_directory('.', path)
+    return serve_asset(path)
 
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=3000)
@@ -0,0 +1,213 @@
+"""
+Local stand-in for the upstream providers used by the API Integration Layer
+Emulates the WAQI, OpenAQ, WeatherAPI, OpenWeather, TomTom, Geoapify, FRED and
+OpenCage endpoints so app.py can be load-tested on an isolated machine.
+
+Usage:
+    python stub_server.py --port 8081 --latency-ms 80 --error-rate 0.02
+    AQI_UPSTREAM_BASE_URL=http://localhost:8081 python app.py
+"""
+
+import argparse
+import hashlib
+import random
+from datetime import datetime, timedelta
+from time import sleep, time
+
+from flask import Flask, request, jsonify, abort
+
+from config import FIXTURE_DIR
+from upstream_replay import FixtureStore
+
+app = Flask(__name__)
+
+settings = {
+    'latency_ms': 0.0,
+    'jitter_ms': 0.0,
+    'error_rate': 0.0,
+    'fixtures': None
+}
+
+
+def _rng(*parts) -> random.Random:
+    """Deterministic generator per location that drifts every 10 minutes."""
+    bucket = int(time() // 600)
+    seed = hashlib.sha1('|'.join(str(p).lower() for p in (*parts, bucket)).encode('utf-8')).hexdigest()
+    return random.Random(int(seed[:16], 16))
+
+
+def _respond(provider: str, build):
+    """Apply injected latency/errors, then serve a recorded fixture or a synthetic body."""
+    delay = settings['latency_ms'] + random.uniform(0, settings['jitter_ms'])
+    if delay > 0:
+        sleep(delay / 1000)
+    if settings['error_rate'] and random.random() < settings['error_rate']:
+        abort(503)
+
+    store = settings['fixtures']
+    if store is not None:
+        fixture = store.load(provider, request.url)
+        if fixture is not None:
+            return jsonify(fixture['body']), fixture['status_code']
+    return jsonify(build())
+
+
+@app.route('/v3/locations')
+def openaq_locations():
+    city = request.args.get('city', 'Delhi')
+    rng = _rng('openaq', city)
+    return _respond('openaq', lambda: {'results': [{
+        'id': rng.randint(1000, 9999),
+        'name': f"{city} Central",
+        'locality': city,
+        'coordinates': {'latitude': 28.6 + rng.uniform(-0.1, 0.1),
+                        'longitude': 77.2 + rng.uniform(-0.1, 0.1)}
+    }]})
+
+
+@app.route('/feed/<city>/')
+def waqi_feed(city):
+    rng = _rng('waqi', city)
+
+    def build():
+        pm25 = round(rng.uniform(20, 250))
+        return {'status': 'ok', 'data': {
+            'aqi': pm25,
+            'dominentpol': 'pm25',
+            'iaqi': {
+                'pm25': {'v': pm25},
+                'pm10': {'v': round(pm25 * rng.uniform(1.2, 1.8))},
+                'co': {'v': round(rng.uniform(1, 15), 1)},
+                'no2': {'v': round(rng.uniform(5, 80), 1)},
+                't': {'v': round(rng.uniform(10, 40), 1)},
+                'h': {'v': round(rng.uniform(20, 90))}
+            },
+            'city': {'name': city, 'geo': [28.6139, 77.2090]},
+            'time': {'iso': datetime.utcnow().isoformat()}
+        }}
+
+    return _respond('waqi', build)
+
+
+@app.route('/v1/current.json')
+def weatherapi_current():
+    city = request.args.get('q', 'Delhi')
+    rng = _rng('weatherapi', city)
+    return _respond('weatherapi', lambda: {
+        'location': {'name': city, 'lat': 28.61, 'lon': 77.21},
+        'current': {
+            'temp_c': round(rng.uniform(10, 40), 1),
+            'humidity': rng.randint(20, 90),
+            'wind_kph': round(rng.uniform(0, 30), 1),
+            'pressure_mb': rng.randint(995, 1025),
+            'precip_mm': round(rng.uniform(0, 5), 1)
+        }
+    })
+
+
+@app.route('/data/2.5/weather')
+def openweather_current():
+    city = request.args.get('q', 'Delhi')
+    rng = _rng('openweather', city)
+    return _respond('openweather', lambda: {
+        'main': {
+            'temp': round(rng.uniform(10, 40), 1),
+            'humidity': rng.randint(20, 90),
+            'pressure': rng.randint(995, 1025)
+        },
+        'wind': {'speed': round(rng.uniform(0, 10), 1), 'deg': rng.randint(0, 359)}
+    })
+
+
+@app.route('/traffic/services/4/flowSegmentData/absolute/10/json')
+def tomtom_flow():
+    point = request.args.get('point', '28.6139,77.2090')
+    rng = _rng('tomtom', point)
+
+    def build():
+        free_flow = rng.randint(40, 70)
+        current = rng.randint(10, free_flow)
+        return {'flowSegmentData': {
+            'currentSpeed': current,
+            'freeFlowSpeed': free_flow,
+            'currentTravelTime': rng.randint(60, 600),
+            'freeFlowTravelTime': rng.randint(60, 300),
+            'confidence': round(rng.uniform(0.7, 1.0), 2),
+            'roadClosure': False
+        }}
+
+    return _respond('tomtom', build)
+
+
+@app.route('/v1/routing')
+def geoapify_routing():
+    waypoints = request.args.get('waypoints', '')
+    rng = _rng('geoapify', waypoints)
+    return _respond('geoapify', lambda: {'features': [{'properties': {
+        'distance': rng.randint(10000, 20000),
+        'time': rng.randint(900, 3600)
+    }}]})
+
+
+@app.route('/fred/series/observations')
+def fred_observations():
+    series_id = request.args.get('series_id', 'INDPRO')
+    start = request.args.get('observation_start')
+    limit = int(request.args.get('limit', 1000))
+    descending = request.args.get('sort_order') == 'desc'
+
+    def build():
+        rng = random.Random(series_id)
+        month = datetime.utcnow().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        observations = []
+        for _ in range(120):
+            month = (month - timedelta(days=1)).replace(day=1)
+            observations.append({'date': month.strftime('%Y-%m-%d'),
+                                 'value': f"{rng.uniform(95, 105):.4f}"})
+        observations.reverse()
+        if start:
+            observations = [o for o in observations if o['date'] >= start]
+        if descending:
+            observations.reverse()
+        return {'observations': observations[:limit]}
+
+    return _respond('stlouisfed', build)
+
+
+@app.route('/geocode/v1/json')
+def opencage_geocode():
+    place = request.args.get('q', 'Delhi')
+    rng = _rng('opencage', place)
+
+    def build():
+        lat, lng = rng.uniform(8, 35), rng.uniform(68, 97)
+        return {'results': [{
+            'geometry': {'lat': round(lat, 4), 'lng': round(lng, 4)},
+            'bounds': {'southwest': {'lat': round(lat - 0.2, 4), 'lng': round(lng - 0.2, 4)},
+                       'northeast': {'lat': round(lat + 0.2, 4), 'lng': round(lng + 0.2, 4)}},
+            'formatted': f"{place}, India",
+            'confidence': 7,
+            'components': {'city': place, 'country': 'India', 'country_code': 'in', '_type': 'city'}
+        }]}
+
+    return _respond('opencage', build)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local stand-in for upstream AQI providers')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8081)
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='base latency per response')
+    parser.add_argument('--jitter-ms', type=float, default=0.0, help='uniform jitter added to latency')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of requests answered with 503')
+    parser.add_argument('--fixtures', nargs='?', const=FIXTURE_DIR, default=None,
+                        help='serve recorded fixtures when available (default dir from config)')
+    args = parser.parse_args()
+
+    settings.update(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, error_rate=args.error_rate,
+                    fixtures=FixtureStore(args.fixtures) if args.fixtures else None)
+    app.run(host=args.host, port=args.port, threaded=True)
+
+
+if __name__ == '__main__':
+    main()
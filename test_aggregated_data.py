@@ -0,0 +1,63 @@
+"""
+Test script to verify single-city aggregation under per-source deadlines
+"""
+
+from time import monotonic, sleep
+from api_integrator import APIIntegrator
+
+
+def _integrator(weather_delay):
+    integrator = APIIntegrator()
+
+    def slow_weather(city):
+        sleep(weather_delay)
+        return {'openweather': {'main': {'temp': 30}}}
+
+    integrator.get_air_quality = lambda city: {'waqi': {'data': {'aqi': 90}}}
+    integrator.get_weather = slow_weather
+    integrator.get_traffic = lambda lat, lon: {}
+    integrator.get_industrial_activity = lambda: {'industrial_production': {'value': 101.2}}
+    integrator.get_urban_development = lambda city: {'urban_data': {'city': city}}
+    return integrator
+
+
+def test_slow_source_times_out_with_partial_data():
+    integrator = _integrator(weather_delay=1.5)
+    deadlines = {'air_quality': 0.3, 'weather': 0.2, 'traffic': 0.3, 'industrial': 0.4, 'urban': 0.3}
+    try:
+        started = monotonic()
+        data = integrator.get_aggregated_data('Delhi', 28.6139, 77.2090, deadlines=deadlines)
+        elapsed = monotonic() - started
+    finally:
+        integrator.close()
+
+    sources = data['sources']
+    assert sources['weather']['status'] == 'timeout'
+    assert sources['weather']['deadline_ms'] == 200
+    assert data['weather'] == {}
+    # Everything else arrived in time
+    assert data['air_quality'] == {'waqi': {'data': {'aqi': 90}}}
+    assert data['industrial'] == {'industrial_production': {'value': 101.2}}
+    assert sources['air_quality']['status'] == 'ok'
+    assert sources['traffic']['status'] == 'empty'
+    assert 'timestamp' in data
+    # Bounded by the largest deadline, not by the slow source
+    assert deadlines['weather'] <= elapsed < max(deadlines.values()) + 0.3
+
+
+def test_sources_within_deadline_are_all_ok():
+    integrator = _integrator(weather_delay=0.0)
+    try:
+        data = integrator.get_aggregated_data('Delhi', 28.6139, 77.2090)
+    finally:
+        integrator.close()
+
+    assert data['weather'] == {'openweather': {'main': {'temp': 30}}}
+    assert {name: s['status'] for name, s in data['sources'].items()} == {
+        'air_quality': 'ok', 'weather': 'ok', 'traffic': 'empty', 'industrial': 'ok', 'urban': 'ok'}
+
+
+if __name__ == "__main__":
+    test_slow_source_times_out_with_partial_data()
+    test_sources_within_deadline_are_all_ok()
+    print("✓ Aggregated data tests passed")
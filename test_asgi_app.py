@@ -0,0 +1,117 @@
+"""
+Test script to verify the async app's shared computations and partial source status
+"""
+
+import asyncio
+import os
+import pytest
+from config import MODEL_PATH
+
+if not os.path.exists(MODEL_PATH):
+    pytest.skip("trained model not available", allow_module_level=True)
+
+import httpx
+import async_integrator
+import asgi_app
+from prediction_cache import PredictionCache
+
+
+def _requests(method, path, payloads):
+    """Send the requests concurrently to the app, without running its lifespan."""
+    async def send():
+        transport = httpx.ASGITransport(app=asgi_app.app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://test') as client:
+            return await asyncio.gather(*(client.request(method, path, json=payload) for payload in payloads))
+    return asyncio.run(send())
+
+
+def _counting_aggregation(monkeypatch, delay=0.05):
+    calls = []
+
+    async def aggregated(city, lat, lon, deadlines=None):
+        calls.append(city)
+        await asyncio.sleep(delay)
+        return {'air_quality': {'waqi': {'data': {'aqi': 150}}}, 'weather': {}, 'traffic': {},
+                'industrial': {}, 'urban': {}, 'sources': {'air_quality': {'status': 'ok'}}}
+
+    monkeypatch.setattr(asgi_app.api_integrator, 'aget_aggregated_data', aggregated)
+    monkeypatch.setattr(asgi_app, 'prediction_cache', PredictionCache())
+    return calls
+
+
+def test_concurrent_predictions_share_one_computation(monkeypatch):
+    calls = _counting_aggregation(monkeypatch)
+    body = {'city': 'Testville', 'lat': 11.1, 'lon': 22.2}
+    responses = _requests('POST', '/predict', [body] * 10)
+
+    assert [r.status_code for r in responses] == [200] * 10
+    assert len({r.json()['aqi'] for r in responses}) == 1
+    assert calls == ['Testville']
+    assert asgi_app.prediction_cache.stats()['async_single_flight']['coalesced'] == 9
+
+
+def test_concurrent_forecasts_share_one_computation(monkeypatch):
+    calls = _counting_aggregation(monkeypatch)
+    body = {'city': 'Forecastville', 'lat': 12.3, 'lon': 23.4}
+    responses = _requests('POST', '/forecast', [body] * 5)
+
+    assert [r.status_code for r in responses] == [200] * 5
+    assert all(r.json() == responses[0].json() for r in responses)
+    assert calls == ['Forecastville']
+
+
+def test_aggregated_route_reports_partial_status(monkeypatch):
+    integrator = asgi_app.api_integrator
+    monkeypatch.setattr(async_integrator, 'SOURCE_DEADLINES', {'weather': 0.05})
+
+    async def empty(*args):
+        return {}
+
+    async def slow_weather(city):
+        await asyncio.sleep(1.0)
+        return {'openweather': {'main': {'temp': 30}}}
+
+    async def air_quality(city):
+        return {'waqi': {'data': {'aqi': 90}}}
+
+    monkeypatch.setattr(integrator, 'aget_air_quality', air_quality)
+    monkeypatch.setattr(integrator, 'aget_weather', slow_weather)
+    monkeypatch.setattr(integrator, 'aget_traffic', empty)
+    monkeypatch.setattr(integrator, 'aget_urban_development', empty)
+    monkeypatch.setattr(integrator, 'aget_industrial_activity', empty)
+    response, = _requests('GET', '/api/aggregated/Partialville?lat=13.5&lon=24.5', [None])
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data['air_quality'] == {'waqi': {'data': {'aqi': 90}}}
+    assert data['weather'] == {}
+    assert data['sources']['weather']['status'] == 'timeout'
+    assert data['sources']['air_quality']['status'] == 'ok'
+
+
+def test_malformed_batch_bodies_are_rejected():
+    async def send(**kwargs):
+        transport = httpx.ASGITransport(app=asgi_app.app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://test') as client:
+            return await client.post('/predict/batch', **kwargs)
+
+    bodies = [{'content': b'null'}, {'content': b'{not json'}, {'content': b''}, {'json': 'text'},
+              {'json': {'features': [{'pm25': 50}], 'hours': 'soon'}},
+              {'json': {'features': [{'pm25': 50}], 'hours': 0}},
+              {'json': {'features': [{'pm25': 50}], 'hours': True}},
+              {'json': {'features': [1, 2]}}]
+    for body in bodies:
+        assert asyncio.run(send(**body)).status_code == 400, body
+
+    response = asyncio.run(send(json={'features': [{'pm25': 50}], 'hours': 3}))
+    assert response.status_code == 200
+    assert response.json()['count'] == 1
+
+
+if __name__ == "__main__":
+    with pytest.MonkeyPatch.context() as patch:
+        test_concurrent_predictions_share_one_computation(patch)
+    with pytest.MonkeyPatch.context() as patch:
+        test_aggregated_route_reports_partial_status(patch)
+    test_malformed_batch_bodies_are_rejected()
+    print("✓ ASGI app tests passed")
@@ -0,0 +1,137 @@
+"""
+Test script to verify the async integrator's shared fetches, cache access and deadlines
+"""
+
+import asyncio
+import threading
+from time import monotonic
+import httpx
+import async_integrator
+from async_integrator import AsyncAPIIntegrator
+from response_cache import ResponseCache, SQLiteResponseCache, TieredResponseCache
+
+
+class StubUpstream:
+    """Answers every GET with the same JSON body after a delay, counting calls."""
+
+    def __init__(self, body, delay=0.05):
+        self.body = body
+        self.delay = delay
+        self.calls = 0
+
+    async def __call__(self, provider, url, headers=None):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return httpx.Response(200, json=self.body, request=httpx.Request('GET', url))
+
+
+def test_concurrent_misses_share_one_upstream_fetch():
+    integrator = AsyncAPIIntegrator()
+    integrator._asend = upstream = StubUpstream({'value': 42})
+
+    async def viewers():
+        return await asyncio.gather(*(integrator._acached_request('stub', 'http://stub/a') for _ in range(10)))
+
+    try:
+        assert asyncio.run(viewers()) == [{'value': 42}] * 10
+        assert upstream.calls == 1
+        # Later callers are answered from the cache
+        assert asyncio.run(integrator._acached_request('stub', 'http://stub/a')) == {'value': 42}
+        assert upstream.calls == 1
+    finally:
+        integrator.close()
+
+
+def test_sqlite_tier_is_used_off_the_event_loop(tmp_path):
+    integrator = AsyncAPIIntegrator()
+    shared = SQLiteResponseCache(str(tmp_path / 'cache.db'))
+    integrator.cache = TieredResponseCache(ResponseCache(), shared)
+    integrator._asend = StubUpstream({'value': 7})
+    threads = []
+    shared_get, shared_set = shared.get, shared.set
+
+    def record(method):
+        def call(*args, **kwargs):
+            threads.append(threading.current_thread())
+            return method(*args, **kwargs)
+        return call
+
+    shared.get, shared.set = record(shared_get), record(shared_set)
+    try:
+        # Miss: the shared lookups (before and inside the flight) and the
+        # write-through run in worker threads
+        assert asyncio.run(integrator._acached_request('stub', 'http://stub/b')) == {'value': 7}
+        assert len(threads) == 3
+        assert threading.main_thread() not in threads
+
+        # Memory-tier hit: answered inline without reaching SQLite
+        assert asyncio.run(integrator._acached_request('stub', 'http://stub/b')) == {'value': 7}
+        assert len(threads) == 3
+    finally:
+        integrator.close()
+
+
+def test_slow_source_reports_timeout_with_partial_data():
+    integrator = AsyncAPIIntegrator()
+
+    async def fast():
+        return {'aqi': 90}
+
+    async def slow():
+        await asyncio.sleep(1.0)
+        return {'temp': 30}
+
+    async def broken():
+        raise ValueError('bad payload')
+
+    async def fetch():
+        started = monotonic()
+        data = await integrator._afetch_sources_concurrently(
+            {'air_quality': fast, 'weather': slow, 'traffic': broken},
+            {'air_quality': 0.5, 'weather': 0.1, 'traffic': 0.5})
+        return data, monotonic() - started
+
+    try:
+        data, elapsed = asyncio.run(fetch())
+    finally:
+        integrator.close()
+
+    assert data['air_quality'] == {'aqi': 90}
+    assert data['weather'] == {}
+    assert data['sources']['air_quality']['status'] == 'ok'
+    assert data['sources']['weather']['status'] == 'timeout'
+    assert data['sources']['weather']['deadline_ms'] == 100
+    assert data['sources']['traffic']['status'] == 'error'
+    # Bounded by the weather deadline, not the slow fetch
+    assert elapsed < 0.5
+
+
+def test_aggregated_data_uses_configured_deadlines(monkeypatch):
+    integrator = AsyncAPIIntegrator()
+    monkeypatch.setattr(async_integrator, 'SOURCE_DEADLINES', {'industrial': 0.05})
+
+    async def empty(*args):
+        return {}
+
+    async def slow_industrial():
+        await asyncio.sleep(1.0)
+        return {'industrial_production': {'value': 101.2}}
+
+    integrator.aget_air_quality = lambda city: asyncio.sleep(0, {'waqi': {'aqi': 90}})
+    integrator.aget_weather = integrator.aget_traffic = integrator.aget_urban_development = empty
+    integrator.aget_industrial_activity = slow_industrial
+    try:
+        data = asyncio.run(integrator.aget_aggregated_data('Delhi', 28.6, 77.2))
+    finally:
+        integrator.close()
+
+    assert data['air_quality'] == {'waqi': {'aqi': 90}}
+    assert data['sources']['industrial']['status'] == 'timeout'
+    assert data['sources']['weather']['status'] == 'empty'
+    assert 'timestamp' in data
+
+
+if __name__ == "__main__":
+    test_concurrent_misses_share_one_upstream_fetch()
+    test_slow_source_reports_timeout_with_partial_data()
+    print("✓ Async integrator tests passed")
@@ -0,0 +1,63 @@
+"""
+Test script to verify vectorized batch prediction
+"""
+
+import os
+import pytest
+from config import MODEL_PATH
+from test_features import get_test_features
+
+if not os.path.exists(MODEL_PATH):
+    pytest.skip("trained model not available", allow_module_level=True)
+
+from predict import AQIPredictor, FACTOR_GROUPS, MODEL_FEATURES
+
+
+def test_batch_matches_single_predictions():
+    predictor = AQIPredictor()
+    base = get_test_features()
+    features_list = [{**base, 'pm25': pm25} for pm25 in (10.0, 55.0, 120.0, 240.0)]
+    # Rows may omit features entirely; they default to 0 like single predictions
+    features_list.append({'pm25': 80.0})
+
+    batch = predictor.batch_predict(features_list)
+    single = [predictor.predict(features) for features in features_list]
+
+    assert len(batch) == len(features_list)
+    for b, s in zip(batch, single):
+        assert b['aqi'] == s['aqi']
+        assert b['risk_level'] == s['risk_level']
+        assert b['confidence'] == s['confidence']
+
+
+def test_factors_explain_each_prediction():
+    predictor = AQIPredictor()
+    base = get_test_features()
+    low, high = predictor.batch_predict([{**base, 'pm25': 10.0}, {**base, 'pm25': 240.0}])
+
+    assert high['factor_contributions']['air_pollutants'] > low['factor_contributions']['air_pollutants']
+    assert low['baseline_aqi'] == high['baseline_aqi']
+    assert abs(sum(high['factors'].values()) - 1) <= 0.02
+    assert len(high['top_features']) == 3
+    # No model feature is industrial, so the key is kept but always 0
+    assert high['factors']['industrial_impact'] == 0
+    assert high['factor_contributions']['industrial_impact'] == 0
+
+
+def test_factor_groups_use_model_features():
+    assert list(FACTOR_GROUPS) == ['air_pollutants', 'weather_conditions', 'industrial_impact', 'urban_factors']
+    for group, names in FACTOR_GROUPS.items():
+        assert set(names) <= set(MODEL_FEATURES), group
+    assert AQIPredictor().global_factors['industrial_impact'] == 0
+
+
+def test_empty_batch():
+    assert AQIPredictor().batch_predict([]) == []
+
+
+if __name__ == "__main__":
+    test_batch_matches_single_predictions()
+    test_factors_explain_each_prediction()
+    test_factor_groups_use_model_features()
+    test_empty_batch()
+    print("✓ Batch prediction tests passed")
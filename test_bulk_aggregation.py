@@ -0,0 +1,132 @@
+"""
+Test script to verify multi-city bulk aggregation
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from time import monotonic, sleep
+import api_integrator
+from api_integrator import APIIntegrator
+
+
+def _integrator(calls):
+    integrator = APIIntegrator()
+    lock = threading.Lock()
+
+    def record(name, result):
+        def fetch(*args):
+            with lock:
+                calls.append((name,) + args)
+            return result
+        return fetch
+
+    integrator.get_industrial_activity = record('industrial', {'industrial_production': {'value': 101.2}})
+    integrator.get_air_quality = record('air_quality', {'waqi': {'data': {'aqi': 90}}})
+    integrator.get_weather = record('weather', {'openweather': {'main': {'temp': 30}}})
+    integrator.get_traffic = record('traffic', {})
+    integrator.get_urban_development = record('urban', {'urban_data': {'city': 'x'}})
+    integrator.resolve_location = lambda city: {'lat': 10.0, 'lon': 20.0}
+    return integrator
+
+
+def test_shared_sources_fetched_once_and_cities_deduped():
+    calls = []
+    integrator = _integrator(calls)
+    try:
+        data = integrator.get_bulk_aggregated_data(['Delhi', 'Mumbai', ' delhi ', 'Pune', ''])
+    finally:
+        integrator.close()
+
+    assert list(data['cities']) == ['Delhi', 'Mumbai', 'Pune']
+    assert [c for c in calls if c[0] == 'industrial'] == [('industrial',)]
+    assert sorted(c[1] for c in calls if c[0] == 'weather') == ['Delhi', 'Mumbai', 'Pune']
+    assert ('traffic', 10.0, 20.0) in calls
+
+    assert data['industrial'] == {'industrial_production': {'value': 101.2}}
+    assert data['sources']['industrial']['status'] == 'ok'
+    delhi = data['cities']['Delhi']
+    assert set(delhi) == {'air_quality', 'weather', 'traffic', 'urban', 'sources'}
+    assert delhi['sources']['traffic']['status'] == 'empty'
+    assert delhi['sources']['weather']['status'] == 'ok'
+
+
+def test_unresolvable_city_has_empty_traffic():
+    calls = []
+    integrator = _integrator(calls)
+    integrator.resolve_location = lambda city: None
+    try:
+        data = integrator.get_bulk_aggregated_data(['Atlantis'])
+    finally:
+        integrator.close()
+
+    assert data['cities']['Atlantis']['traffic'] == {}
+    assert not [c for c in calls if c[0] == 'traffic']
+
+
+def test_bulk_runs_on_its_own_pool_with_deadlines_from_start():
+    calls = []
+    integrator = _integrator(calls)
+    threads = set()
+
+    def slow_weather(city):
+        threads.add(threading.current_thread().name)
+        sleep(0.05)
+        return {'openweather': {'main': {'temp': 30}}}
+
+    integrator.get_weather = slow_weather
+    integrator._bulk_executor.shutdown()
+    integrator._bulk_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='api-bulk')
+    cities = [f'City {i}' for i in range(20)]
+    try:
+        # 20 queued weather calls take ~0.5s in all but only 0.05s each
+        data = integrator.get_bulk_aggregated_data(cities, deadlines={'weather': 0.2})
+    finally:
+        integrator.close()
+
+    assert all(data['cities'][city]['sources']['weather']['status'] == 'ok' for city in cities)
+    assert threads and all(name.startswith('api-bulk') for name in threads)
+
+
+def test_source_still_queued_after_queue_wait_times_out(monkeypatch):
+    monkeypatch.setattr(api_integrator, 'SOURCE_QUEUE_WAIT', 0.1)
+    integrator = APIIntegrator()
+    integrator._bulk_executor.shutdown()
+    integrator._bulk_executor = ThreadPoolExecutor(max_workers=1)
+    release = threading.Event()
+    try:
+        data = integrator._fetch_sources_concurrently(
+            {'a': lambda: release.wait(1) and {'x': 1}, 'b': lambda: {'y': 2}},
+            deadlines={'a': 0.5, 'b': 0.5}, executor=integrator._bulk_executor)
+    finally:
+        release.set()
+        integrator.close()
+
+    assert data['sources']['b']['status'] == 'timeout'
+
+
+def test_single_city_deadlines_count_from_submission():
+    integrator = APIIntegrator()
+    integrator._executor.shutdown()
+    integrator._executor = ThreadPoolExecutor(max_workers=1)
+    release = threading.Event()
+    try:
+        started = monotonic()
+        data = integrator._fetch_sources_concurrently(
+            {'a': lambda: release.wait(1) and {'x': 1}, 'b': lambda: {'y': 2}},
+            deadlines={'a': 0.2, 'b': 0.3})
+        elapsed = monotonic() - started
+    finally:
+        release.set()
+        integrator.close()
+
+    # b never got a worker; the fetch still ends at the slowest deadline
+    assert data['sources']['a']['status'] == 'timeout'
+    assert data['sources']['b']['status'] == 'timeout'
+    assert elapsed < 0.6
+
+
+if __name__ == "__main__":
+    test_shared_sources_fetched_once_and_cities_deduped()
+    test_unresolvable_city_has_empty_traffic()
+    test_bulk_runs_on_its_own_pool_with_deadlines_from_start()
+    print("✓ Bulk aggregation tests passed")
@@ -0,0 +1,59 @@
+"""
+Test script to verify the per-provider circuit breaker
+"""
+
+import time
+from circuit_breaker import CircuitBreaker
+
+
+def test_opens_after_consecutive_failures():
+    breaker = CircuitBreaker('tomtom', failure_threshold=3, open_seconds=60)
+    for _ in range(3):
+        assert breaker.allow()
+        breaker.record(False, 0.1)
+
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+    assert breaker.snapshot()['rejected'] == 1
+
+
+def test_slow_calls_count_against_the_slo():
+    breaker = CircuitBreaker('opencage', failure_threshold=2, latency_slo=0.5)
+    breaker.record(True, 0.9)
+    breaker.record(True, 0.8)
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.snapshot()['error_rate'] == 0.0
+
+
+def test_half_open_probe_closes_or_reopens():
+    breaker = CircuitBreaker('waqi', failure_threshold=1, open_seconds=0.05)
+    breaker.record(False, 0.1)
+    time.sleep(0.06)
+
+    # Only one probe is let through while half-open
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record(False, 0.1)
+    assert breaker.state == CircuitBreaker.OPEN
+
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record(True, 0.1)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_snapshot_reports_latency_percentiles():
+    breaker = CircuitBreaker('openweather', latency_slo=10)
+    for ms in range(1, 101):
+        breaker.record(True, ms / 1000)
+
+    latency = breaker.snapshot()['latency_ms']
+    assert latency == {'p50': 50.0, 'p90': 90.0, 'p99': 99.0}
+
+
+if __name__ == "__main__":
+    test_opens_after_consecutive_failures()
+    test_slow_calls_count_against_the_slo()
+    test_half_open_probe_closes_or_reopens()
+    test_snapshot_reports_latency_percentiles()
+    print("✓ Circuit breaker tests passed")
@@ -0,0 +1,85 @@
+"""
+Test script to verify FeatureEncoder matches the original DataFrame preparation
+"""
+
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import StandardScaler
+from predict import FeatureEncoder, MODEL_FEATURES
+
+
+def _fitted_scaler():
+    rng = np.random.default_rng(0)
+    frame = pd.DataFrame(rng.normal(50, 20, size=(200, len(MODEL_FEATURES))), columns=MODEL_FEATURES)
+    return StandardScaler().fit(frame)
+
+
+def _dataframe_path(features, scaler):
+    """The preparation predict() used before FeatureEncoder, kept here as the reference."""
+    df = pd.DataFrame([features])
+    for col in MODEL_FEATURES:
+        if col not in df.columns:
+            df[col] = 0
+    ordered_df = pd.DataFrame(columns=MODEL_FEATURES)
+    for col in MODEL_FEATURES:
+        ordered_df[col] = df[col] if col in df else 0
+    return scaler.transform(ordered_df)
+
+
+FEATURE_SETS = [
+    # Every model feature
+    {name: float(i) * 1.5 for i, name in enumerate(MODEL_FEATURES)},
+    # Missing keys default to 0
+    {'pm25': 120.0, 'pm10': 180.0, 'hour': 14, 'is_weekend': 1},
+    {},
+    # Extra keys, including non-numeric ones, are ignored
+    {'pm25': 35.5, 'temperature': 31.2, 'city': 'Delhi', 'lat': 28.61, 'industrial_activity_index': 7.0},
+]
+
+
+def test_single_rows_match_dataframe_path():
+    scaler = _fitted_scaler()
+    encoder = FeatureEncoder(MODEL_FEATURES, scaler)
+    for features in FEATURE_SETS:
+        np.testing.assert_allclose(encoder.encode(features), _dataframe_path(features, scaler),
+                                   rtol=0, atol=1e-12)
+
+
+def test_batches_match_dataframe_path_row_by_row():
+    scaler = _fitted_scaler()
+    encoder = FeatureEncoder(MODEL_FEATURES, scaler)
+    expected = np.vstack([_dataframe_path(features, scaler) for features in FEATURE_SETS])
+    np.testing.assert_allclose(encoder.encode_batch(FEATURE_SETS), expected, rtol=0, atol=1e-12)
+
+
+def test_unscaled_rows_hold_raw_values_in_model_order():
+    encoder = FeatureEncoder(MODEL_FEATURES, _fitted_scaler())
+    row = encoder.encode({'pm25': 120.0, 'hour': 14, 'pm10': None}, scale=False)
+    assert row.shape == (1, len(MODEL_FEATURES))
+    assert row[0, MODEL_FEATURES.index('pm25')] == 120.0
+    assert row[0, MODEL_FEATURES.index('hour')] == 14
+    # Null values fall back to the default like missing keys
+    assert row[0, MODEL_FEATURES.index('pm10')] == 0
+    np.testing.assert_allclose(encoder.transform(row.copy()),
+                               _dataframe_path({'pm25': 120.0, 'hour': 14}, encoder.scaler), atol=1e-12)
+
+
+def test_consecutive_encodes_do_not_share_memory():
+    encoder = FeatureEncoder(MODEL_FEATURES, _fitted_scaler())
+    for scale in (True, False):
+        first = encoder.encode({'pm25': 10.0}, scale=scale)
+        snapshot = first.copy()
+        second = encoder.encode({'pm25': 250.0}, scale=scale)
+        assert not np.shares_memory(first, second)
+        np.testing.assert_array_equal(first, snapshot)
+        # Scaling a returned row in place leaves later encodes untouched
+        encoder.transform(second)
+        np.testing.assert_array_equal(encoder.encode({'pm25': 10.0}, scale=scale), snapshot)
+
+
+if __name__ == "__main__":
+    test_single_rows_match_dataframe_path()
+    test_batches_match_dataframe_path_row_by_row()
+    test_unscaled_rows_hold_raw_values_in_model_order()
+    test_consecutive_encodes_do_not_share_memory()
+    print("✓ Feature encoder tests passed")
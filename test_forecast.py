@@ -0,0 +1,79 @@
+"""
+Test script to verify the multi-horizon forecast
+"""
+
+import os
+from datetime import datetime
+import pytest
+from config import MODEL_PATH
+from feature_builder import time_features
+
+if not os.path.exists(MODEL_PATH):
+    pytest.skip("trained model not available", allow_module_level=True)
+
+import numpy as np
+from predict import AQIPredictor, FORECAST_METHOD, MODEL_FEATURES
+
+
+def test_time_features():
+    assert time_features(datetime(2024, 6, 8, 21, 30)) == {
+        'day': 8, 'hour': 21, 'month': 6, 'day_of_week': 5, 'is_weekend': 1
+    }
+
+
+def test_forecast_scores_all_horizons_in_one_call():
+    predictor = AQIPredictor()
+    calls = []
+    score = predictor._score
+
+    def counting_score(rows, explain=True):
+        calls.append(len(rows))
+        return score(rows, explain=explain)
+
+    predictor._score = counting_score
+    start = datetime(2024, 1, 15, 8, 0)
+    forecast = predictor.forecast({'pm25': 150, 'pm10': 220}, start=start)
+
+    assert calls == [13]
+    assert forecast['method'] == FORECAST_METHOD
+    assert [point['hours'] for point in forecast['horizons']] == list(range(0, 25, 2))
+    assert forecast['horizons'][1]['time'] == '2024-01-15T10:00'
+    assert forecast['peak']['aqi'] == max(point['aqi'] for point in forecast['horizons'])
+
+
+def test_first_horizon_matches_single_prediction():
+    predictor = AQIPredictor()
+    start = datetime(2024, 1, 15, 8, 0)
+    features = {'pm25': 90, 'pm10': 140}
+
+    now = predictor.forecast(features, start=start)['horizons'][0]
+    single = predictor.predict({**features, **time_features(start)})
+    assert now['aqi'] == single['aqi']
+    assert now['interval'] == single['interval']
+
+
+def test_horizons_differ_when_the_model_responds_to_time():
+    predictor = AQIPredictor()
+    hour = MODEL_FEATURES.index('hour')
+    seen = []
+
+    def hourly_score(rows, explain=True):
+        seen.append(rows[:, hour].copy())
+        # A stand-in model whose AQI peaks in the evening
+        predictions = 100 + 40 * np.exp(-((rows[:, hour] - 20) ** 2) / 8)
+        return predictions, np.full(len(rows), 5.0), None
+
+    predictor._score = hourly_score
+    forecast = predictor.forecast({'pm25': 150}, start=datetime(2024, 1, 15, 8, 0))
+
+    assert list(seen[0]) == [(8 + h) % 24 for h in range(0, 25, 2)]
+    assert len({point['aqi'] for point in forecast['horizons']}) > 1
+    assert forecast['peak'] == {'hours': 12, 'aqi': 140, 'risk_level': 'Unhealthy for Sensitive Groups'}
+
+
+if __name__ == "__main__":
+    test_time_features()
+    test_forecast_scores_all_horizons_in_one_call()
+    test_first_horizon_matches_single_prediction()
+    test_horizons_differ_when_the_model_responds_to_time()
+    print("✓ Forecast tests passed")
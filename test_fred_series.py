@@ -0,0 +1,136 @@
+"""
+Test script to verify incremental FRED series fetching
+"""
+
+from urllib.parse import urlsplit, parse_qs
+import api_integrator
+from api_integrator import APIIntegrator, PROJECTIONS
+from response_cache import ResponseCache
+
+
+def _raw(*points):
+    """A FRED observations payload with the fields the API sends alongside each point."""
+    return {'realtime_start': '2025-04-01', 'count': len(points),
+            'observations': [{'realtime_start': '2025-04-01', 'realtime_end': '2025-04-01',
+                              'date': date, 'value': value} for date, value in points]}
+
+
+class StubFred:
+    """Stands in for _cached_request, projecting each queued raw payload like the real path."""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.queries = []
+
+    def __call__(self, provider, url, headers=None):
+        assert provider == 'stlouisfed'
+        self.queries.append({k: v[0] for k, v in parse_qs(urlsplit(url).query).items()})
+        response = self.responses.pop(0)
+        return PROJECTIONS['stlouisfed'](response) if response else {}
+
+
+def _integrator(monkeypatch, *responses, now=1_000_000.0):
+    clock = [now]
+    monkeypatch.setattr(api_integrator, 'time', lambda: clock[0])
+    integrator = APIIntegrator()
+    integrator.cache = ResponseCache()
+    integrator._cached_request = StubFred(*responses)
+    return integrator, clock
+
+
+def test_first_fetch_asks_for_newest_history_and_trims(monkeypatch):
+    # FRED answers sort_order=desc newest first, with '.' for missing values
+    integrator, _ = _integrator(monkeypatch, _raw(('2025-03-01', '103.2'), ('2025-02-01', '.'),
+                                                  ('2025-01-01', '102.5')))
+    try:
+        observations = integrator._get_fred_series('INDPRO')
+    finally:
+        integrator.close()
+
+    query, = integrator._cached_request.queries
+    assert query['sort_order'] == 'desc'
+    assert query['limit'] == str(api_integrator.FRED_HISTORY_LIMIT)
+    assert 'observation_start' not in query
+    assert observations == [{'date': '2025-01-01', 'value': 102.5}, {'date': '2025-03-01', 'value': 103.2}]
+
+
+def test_refresh_within_ttl_makes_no_request(monkeypatch):
+    integrator, clock = _integrator(monkeypatch, _raw(('2025-01-01', '102.5')))
+    try:
+        first = integrator._get_fred_series('INDPRO')
+        clock[0] += 60
+        assert integrator._get_fred_series('INDPRO') == first
+    finally:
+        integrator.close()
+
+    assert len(integrator._cached_request.queries) == 1
+
+
+def test_stale_series_fetches_delta_and_merges(monkeypatch):
+    integrator, clock = _integrator(monkeypatch, _raw(('2025-02-01', '102.9'), ('2025-01-01', '102.5')),
+                                    # The delta repeats the last known date with a revised value
+                                    _raw(('2025-02-01', '103.0'), ('2025-03-01', '103.4')))
+    try:
+        integrator._get_fred_series('INDPRO')
+        clock[0] += api_integrator.PROVIDER_TTLS['stlouisfed'] + 1
+        observations = integrator._get_fred_series('INDPRO')
+    finally:
+        integrator.close()
+
+    delta_query = integrator._cached_request.queries[1]
+    assert delta_query['observation_start'] == '2025-02-01'
+    assert 'limit' not in delta_query
+    assert observations == [{'date': '2025-01-01', 'value': 102.5}, {'date': '2025-02-01', 'value': 103.0},
+                            {'date': '2025-03-01', 'value': 103.4}]
+
+
+def test_merged_series_is_capped_at_history_limit(monkeypatch):
+    monkeypatch.setattr(api_integrator, 'FRED_HISTORY_LIMIT', 3)
+    integrator, clock = _integrator(monkeypatch, _raw(('2025-03-01', '3'), ('2025-02-01', '2'), ('2025-01-01', '1')),
+                                    _raw(('2025-03-01', '3'), ('2025-04-01', '4'), ('2025-05-01', '5')))
+    try:
+        integrator._get_fred_series('INDPRO')
+        clock[0] += api_integrator.PROVIDER_TTLS['stlouisfed'] + 1
+        observations = integrator._get_fred_series('INDPRO')
+    finally:
+        integrator.close()
+
+    assert integrator._cached_request.queries[0]['limit'] == '3'
+    assert [obs['date'] for obs in observations] == ['2025-03-01', '2025-04-01', '2025-05-01']
+
+
+def test_failed_refresh_keeps_serving_known_observations(monkeypatch):
+    integrator, clock = _integrator(monkeypatch, _raw(('2025-01-01', '102.5')), {}, {})
+    try:
+        first = integrator._get_fred_series('INDPRO')
+        clock[0] += api_integrator.PROVIDER_TTLS['stlouisfed'] + 1
+        assert integrator._get_fred_series('INDPRO') == first
+        activity = integrator.get_industrial_activity()
+    finally:
+        integrator.close()
+
+    assert activity['industrial_production']['value'] == 102.5
+    # The series stays stale, so later calls ask again (throttled by the negative cache)
+    assert [q.get('observation_start') for q in integrator._cached_request.queries] == \
+        [None, '2025-01-01', '2025-01-01']
+
+
+def test_failed_first_fetch_reports_no_industrial_data(monkeypatch):
+    integrator, _ = _integrator(monkeypatch, {})
+    try:
+        assert integrator._get_fred_series('INDPRO') == []
+        integrator._cached_request.responses.append({})
+        assert integrator.get_industrial_activity()['industrial_production'] == {}
+    finally:
+        integrator.close()
+
+
+if __name__ == "__main__":
+    import pytest
+    for test in (test_first_fetch_asks_for_newest_history_and_trims, test_refresh_within_ttl_makes_no_request,
+                 test_stale_series_fetches_delta_and_merges, test_merged_series_is_capped_at_history_limit,
+                 test_failed_refresh_keeps_serving_known_observations,
+                 test_failed_first_fetch_reports_no_industrial_data):
+        with pytest.MonkeyPatch.context() as patch:
+            test(patch)
+    print("✓ FRED series tests passed")
@@ -0,0 +1,102 @@
+"""
+Test script to verify ETags, conditional GETs and gzip for API and static responses
+"""
+
+import gzip
+import os
+import tempfile
+from http_caching import (json_etag, etag_matches, accepts_gzip, gzip_body, conditional_json_body,
+                          StaticAssets)
+
+
+def test_json_etag_ignores_volatile_fields():
+    first = {'weather': {'temp': 30}, 'timestamp': '2024-01-01T00:00:00', 'snapshot': {'age_s': 1}}
+    second = {'timestamp': '2024-01-01T00:05:00', 'weather': {'temp': 30}, 'snapshot': {'age_s': 9}}
+    assert json_etag(first) == json_etag(second)
+    assert json_etag(first) != json_etag({'weather': {'temp': 31}})
+    # Different bytes share the tag, so it must be weak
+    assert json_etag(first).startswith('W/"')
+
+
+def test_etag_matches_variants():
+    assert etag_matches('"abc"', '"abc"')
+    assert etag_matches('W/"abc"', '"abc"')
+    assert etag_matches('"xyz", "abc-gz"', '"abc"')
+    assert etag_matches('*', '"abc"')
+    assert not etag_matches('"xyz"', '"abc"')
+    assert not etag_matches(None, '"abc"')
+    assert etag_matches('W/"abc-gz"', 'W/"abc"')
+
+
+def test_accepts_gzip():
+    assert accepts_gzip('gzip, deflate, br')
+    assert not accepts_gzip('gzip;q=0, deflate')
+    assert not accepts_gzip(None)
+
+
+def test_gzip_body_skips_small_bodies():
+    assert gzip_body(b'{}') is None
+    body = b'{"aqi": 100}' * 500
+    assert gzip.decompress(gzip_body(body)) == body
+
+
+def test_conditional_json_body_tags_each_encoding():
+    etag = json_etag({'aqi': 100})
+    body = b'{"aqi": 100}' * 500
+
+    zipped, headers = conditional_json_body(etag, body, 'gzip', None)
+    assert gzip.decompress(zipped) == body
+    assert headers['ETag'] == etag[:-1] + '-gz"' and headers['Content-Encoding'] == 'gzip'
+    plain, headers = conditional_json_body(etag, body, None, None)
+    assert plain == body and headers['ETag'] == etag
+
+    # A 304 carries the tag of the variant the client would have received
+    not_modified, headers = conditional_json_body(etag, body, 'gzip', etag[:-1] + '-gz"')
+    assert not_modified is None and headers['ETag'] == etag[:-1] + '-gz"'
+    not_modified, headers = conditional_json_body(etag, body, None, etag)
+    assert not_modified is None and headers['ETag'] == etag
+
+
+def test_static_assets_skip_data_files_and_subdirectories():
+    with tempfile.TemporaryDirectory() as root:
+        for name in ('index.html', 'notes.txt', 'config.json'):
+            with open(os.path.join(root, name), 'w') as f:
+                f.write('x' * 5000)
+        os.mkdir(os.path.join(root, 'model'))
+        with open(os.path.join(root, 'model', 'report.html'), 'w') as f:
+            f.write('x' * 5000)
+
+        assets = StaticAssets(root)
+        assets.precompress()
+        assert [os.path.basename(path) for path in assets._assets] == ['index.html']
+        assert assets.get('config.json') is None
+
+
+def test_static_assets_serve_gzip_and_refuse_traversal():
+    with tempfile.TemporaryDirectory() as root:
+        with open(os.path.join(root, 'index.html'), 'w') as f:
+            f.write('<html>' + 'x' * 5000 + '</html>')
+        assets = StaticAssets(root)
+        asset = assets.get('index.html')
+        assert asset.cache_control == 'no-cache'
+
+        plain = assets.variant(asset, None)
+        zipped = assets.variant(asset, 'gzip')
+        assert plain['body'] == asset.body
+        assert gzip.decompress(zipped['body']) == asset.body
+        assert zipped['headers']['Content-Encoding'] == 'gzip'
+        assert etag_matches(zipped['headers']['ETag'], plain['headers']['ETag'])
+
+        assert assets.get('../outside.html') is None
+        assert assets.get('missing.js') is None
+
+
+if __name__ == "__main__":
+    test_json_etag_ignores_volatile_fields()
+    test_etag_matches_variants()
+    test_accepts_gzip()
+    test_gzip_body_skips_small_bodies()
+    test_conditional_json_body_tags_each_encoding()
+    test_static_assets_skip_data_files_and_subdirectories()
+    test_static_assets_serve_gzip_and_refuse_traversal()
+    print("✓ HTTP caching tests passed")
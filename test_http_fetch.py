@@ -0,0 +1,126 @@
+"""
+Test script to verify upstream retries, backoff and pooled sessions
+"""
+
+import pytest
+import requests
+import api_integrator
+from api_integrator import APIIntegrator
+from config import HTTP_MAX_RETRIES, HTTP_BACKOFF_BASE, HTTP_BACKOFF_MAX, HTTP_RETRY_STATUSES, HTTP_POOL_MAXSIZE
+
+
+class StubResponse:
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} error", response=self)
+
+
+def _integrator(monkeypatch, *outcomes):
+    """An integrator whose sends play back outcomes (status codes or exceptions) without sleeping."""
+    integrator = APIIntegrator()
+    outcomes = list(outcomes)
+    sends, backoffs = [], []
+
+    def send(provider, url, headers=None):
+        sends.append(url)
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return StubResponse(outcome)
+
+    def uniform(low, high):
+        backoffs.append((low, high))
+        return high / 2
+
+    integrator._send = send
+    monkeypatch.setattr(api_integrator.random, 'uniform', uniform)
+    monkeypatch.setattr(api_integrator, 'sleep', lambda seconds: None)
+    return integrator, sends, backoffs
+
+
+@pytest.mark.parametrize('status', HTTP_RETRY_STATUSES)
+def test_retryable_status_is_retried_with_jittered_backoff(monkeypatch, status):
+    integrator, sends, backoffs = _integrator(monkeypatch, status, 200)
+    try:
+        assert integrator._fetch('waqi', 'https://api.waqi.info/feed/delhi/').status_code == 200
+    finally:
+        integrator.close()
+
+    assert len(sends) == 2
+    assert backoffs == [(0, min(HTTP_BACKOFF_MAX, HTTP_BACKOFF_BASE))]
+
+
+@pytest.mark.parametrize('error', [requests.ConnectionError('reset'), requests.Timeout('slow')])
+def test_transport_errors_are_retried(monkeypatch, error):
+    integrator, sends, _ = _integrator(monkeypatch, error, 200)
+    try:
+        assert integrator._fetch('waqi', 'https://api.waqi.info/feed/delhi/').status_code == 200
+    finally:
+        integrator.close()
+
+    assert len(sends) == 2
+
+
+def test_gives_up_after_retry_budget_with_growing_backoff(monkeypatch):
+    attempts = HTTP_MAX_RETRIES + 1
+    integrator, sends, backoffs = _integrator(monkeypatch, *[503] * attempts)
+    try:
+        with pytest.raises(requests.HTTPError, match='503'):
+            integrator._fetch('waqi', 'https://api.waqi.info/feed/delhi/')
+    finally:
+        integrator.close()
+
+    assert len(sends) == attempts
+    assert backoffs == [(0, min(HTTP_BACKOFF_MAX, HTTP_BACKOFF_BASE * 2 ** attempt))
+                        for attempt in range(HTTP_MAX_RETRIES)]
+
+
+def test_last_transport_error_is_raised(monkeypatch):
+    integrator, sends, _ = _integrator(monkeypatch, *[requests.Timeout('slow')] * (HTTP_MAX_RETRIES + 1))
+    try:
+        with pytest.raises(requests.Timeout):
+            integrator._fetch('waqi', 'https://api.waqi.info/feed/delhi/')
+    finally:
+        integrator.close()
+
+    assert len(sends) == HTTP_MAX_RETRIES + 1
+
+
+def test_other_http_errors_are_not_retried(monkeypatch):
+    integrator, sends, backoffs = _integrator(monkeypatch, 404)
+    try:
+        with pytest.raises(requests.HTTPError, match='404'):
+            integrator._fetch('waqi', 'https://api.waqi.info/feed/delhi/')
+    finally:
+        integrator.close()
+
+    assert len(sends) == 1
+    assert backoffs == []
+
+
+def test_sessions_are_pooled_per_host():
+    integrator = APIIntegrator()
+    try:
+        first = integrator._get_session('https://api.waqi.info/feed/delhi/')
+        again = integrator._get_session('https://api.waqi.info/feed/mumbai/?token=x')
+        other = integrator._get_session('https://api.openaq.org/v3/locations')
+        adapter = first.get_adapter('https://api.waqi.info/')
+    finally:
+        integrator.close()
+
+    assert first is again
+    assert other is not first
+    # Retries are left to _fetch, and a busy host waits for a pooled connection
+    assert adapter.max_retries.total == 0
+    assert adapter._pool_block is True
+    assert adapter._pool_maxsize == HTTP_POOL_MAXSIZE
+
+
+if __name__ == "__main__":
+    test_sessions_are_pooled_per_host()
+    with pytest.MonkeyPatch.context() as patch:
+        test_gives_up_after_retry_budget_with_growing_backoff(patch)
+    print("✓ HTTP fetch tests passed")
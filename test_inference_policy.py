@@ -0,0 +1,49 @@
+"""
+Test script to verify the serving-side inference parallelism policy
+"""
+
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor
+from inference_policy import InferencePolicy
+
+
+def _model():
+    rng = np.random.default_rng(0)
+    X = rng.standard_normal((200, 5))
+    y = X[:, 0] * 3 + X[:, 1]
+    return RandomForestRegressor(n_estimators=10, max_depth=5, n_jobs=-1, random_state=0).fit(X, y)
+
+
+def test_training_parallelism_is_not_used_for_serving():
+    model = _model()
+    InferencePolicy(model)
+    assert model.n_jobs == 1
+
+
+def test_small_batches_run_serially():
+    policy = InferencePolicy(_model(), min_parallel_rows=64, max_threads=4)
+    assert policy.chunks_for(1) == 1
+    assert policy.chunks_for(63) == 1
+    assert policy.chunks_for(64) == 2
+    assert policy.chunks_for(10000) == 4
+    assert InferencePolicy(_model(), min_parallel_rows=64, max_threads=1).chunks_for(10000) == 1
+
+
+def test_chunked_predictions_match_serial_order():
+    model = _model()
+    policy = InferencePolicy(model, min_parallel_rows=16, max_threads=3)
+    X = np.random.default_rng(1).standard_normal((100, 5))
+    np.testing.assert_array_equal(policy.predict(X), model.predict(X))
+    policy.predict(X[:1])
+
+    stats = policy.get_stats()
+    assert stats['parallel_calls'] == 1
+    assert stats['chunks'] == 3
+    assert stats['serial_calls'] == 1
+
+
+if __name__ == "__main__":
+    test_training_parallelism_is_not_used_for_serving()
+    test_small_batches_run_serially()
+    test_chunked_predictions_match_serial_order()
+    print("✓ Inference policy tests passed")
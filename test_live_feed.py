@@ -0,0 +1,110 @@
+"""
+Test script to verify the live AQI feed fan-out
+"""
+
+import json
+from live_feed import LiveFeed, Subscription, format_sse
+
+
+def _feed(calls, aqi=80, interval=60):
+    def fetch_snapshot(city, lat, lon):
+        calls.append(city)
+        return {'air_quality': {'waqi': {'data': {'aqi': aqi}}}}
+
+    return LiveFeed(fetch_snapshot, lambda city, lat, lon: {'aqi': aqi, 'risk_level': 'Unhealthy'},
+                    interval=interval, alert_aqi=150)
+
+
+def _payload(message):
+    return json.loads(message.split('data: ', 1)[1])
+
+
+def test_one_event_per_city_fans_out_to_all_subscribers():
+    calls = []
+    feed = _feed(calls)
+    feed.start()
+    try:
+        subscriptions = [feed.subscribe('Delhi', 28.6139, 77.2090) for _ in range(5)]
+        events = [s.get(timeout=2) for s in subscriptions]
+    finally:
+        feed.stop()
+
+    assert calls == ['Delhi']
+    assert all(event == events[0] for event in events)
+    assert events[0].startswith('event: snapshot\n')
+    assert _payload(events[0])['prediction']['aqi'] == 80
+    assert feed.get_status()['messages_sent'] == 5
+
+
+def test_late_subscriber_gets_last_event_without_refetch():
+    calls = []
+    feed = _feed(calls)
+    topic = LiveFeed.topic('Delhi', 28.6139, 77.2090)
+    first = feed.subscribe('Delhi', 28.6139, 77.2090)
+    feed.publish(topic, 'Delhi', 28.6139, 77.2090)
+
+    late = feed.subscribe(' delhi ', 28.61390, 77.2090)
+    assert late.get(timeout=0) == first.get(timeout=0)
+    assert calls == ['Delhi']
+
+
+def test_alerts_raised_at_threshold():
+    feed = _feed([], aqi=180)
+    event = feed.build_event('Delhi', 28.6139, 77.2090)
+    assert [alert['type'] for alert in event['alerts']] == ['current', 'forecast']
+
+
+def test_forecast_is_pushed_with_the_event():
+    forecasts = []
+
+    def forecast(city, lat, lon):
+        forecasts.append(city)
+        return {'horizons': [{'hours': 6, 'aqi': 95}], 'method': 'calendar_shift'}
+
+    feed = LiveFeed(lambda city, lat, lon: {}, lambda city, lat, lon: {'aqi': 80}, forecast=forecast)
+    topic = LiveFeed.topic('Delhi', 28.6139, 77.2090)
+    subscriptions = [feed.subscribe('Delhi', 28.6139, 77.2090) for _ in range(3)]
+    feed.publish(topic, 'Delhi', 28.6139, 77.2090)
+
+    assert forecasts == ['Delhi']
+    assert all(_payload(s.get(timeout=0))['forecast']['horizons'][0]['aqi'] == 95 for s in subscriptions)
+
+
+def test_failed_forecast_still_publishes_prediction():
+    def forecast(city, lat, lon):
+        raise ValueError('model not ready')
+
+    feed = LiveFeed(lambda city, lat, lon: {}, lambda city, lat, lon: {'aqi': 80}, forecast=forecast)
+    event = feed.build_event('Delhi', 28.6139, 77.2090)
+    assert event['forecast'] is None
+    assert event['prediction'] == {'aqi': 80}
+
+
+def test_unsubscribed_city_is_dropped():
+    feed = _feed([])
+    subscription = feed.subscribe('Delhi', 28.6139, 77.2090)
+    feed.unsubscribe(subscription)
+    assert feed.get_status()['subscribers'] == {}
+
+
+def test_slow_subscriber_keeps_newest_events():
+    subscription = Subscription(('delhi', 0.0, 0.0), maxsize=2)
+    for i in range(5):
+        subscription.put(str(i))
+    assert [subscription.get(timeout=0) for _ in range(3)] == ['3', '4', None]
+
+
+def test_format_sse_prefixes_every_line():
+    assert format_sse('a\nb', event='snapshot') == 'event: snapshot\ndata: a\ndata: b\n\n'
+
+
+if __name__ == "__main__":
+    test_one_event_per_city_fans_out_to_all_subscribers()
+    test_late_subscriber_gets_last_event_without_refetch()
+    test_alerts_raised_at_threshold()
+    test_forecast_is_pushed_with_the_event()
+    test_failed_forecast_still_publishes_prediction()
+    test_unsubscribed_city_is_dropped()
+    test_slow_subscriber_keeps_newest_events()
+    test_format_sse_prefixes_every_line()
+    print("✓ Live feed tests passed")
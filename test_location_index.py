@@ -0,0 +1,82 @@
+"""
+Test script to verify the persistent location index
+"""
+
+import json
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from location_index import LocationIndex
+
+
+def test_geocodes_once_and_persists():
+    calls = []
+
+    def geocoder(city):
+        calls.append(city)
+        return {'lat': 19.076, 'lon': 72.8777, 'bbox': [18.89, 72.77, 19.27, 72.98]}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'locations.json')
+        index = LocationIndex(path, geocoder=geocoder)
+
+        assert index.resolve('Mumbai')['lat'] == 19.076
+        assert index.resolve('  mumbai ')['lon'] == 72.8777
+        assert calls == ['Mumbai']
+
+        # A new process reads the mapping back without geocoding
+        reloaded = LocationIndex(path, geocoder=geocoder)
+        assert reloaded.get('MUMBAI')['bbox'] == [18.89, 72.77, 19.27, 72.98]
+        assert calls == ['Mumbai']
+
+
+def test_seeded_locations_need_no_geocoder():
+    with tempfile.TemporaryDirectory() as tmp:
+        index = LocationIndex(os.path.join(tmp, 'locations.json'),
+                              seed=[{'city': 'Delhi', 'lat': 28.6139, 'lon': 77.2090}])
+        assert index.resolve('delhi')['lat'] == 28.6139
+        assert index.resolve('Atlantis') is None
+
+
+def test_concurrent_writers_keep_every_entry():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'locations.json')
+        # Two instances stand in for two worker processes sharing the file
+        first, second = LocationIndex(path), LocationIndex(path)
+        errors = []
+        first.logger.error = second.logger.error = errors.append
+
+        def add(i):
+            index = first if i % 2 else second
+            index.add(f'City {i}', i, i)
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(add, range(40)))
+
+        assert errors == []
+        with open(path, encoding='utf-8') as f:
+            assert len(json.load(f)) == 40
+        assert [name for name in os.listdir(tmp) if name.endswith('.tmp')] == []
+
+
+def test_index_size_is_capped_but_seeds_are_kept():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'locations.json')
+        index = LocationIndex(path, max_entries=5,
+                              seed=[{'city': 'Delhi', 'lat': 28.6139, 'lon': 77.2090}])
+        for i in range(10):
+            index.add(f'City {i}', i, i)
+
+        assert len(index) == 5
+        assert index.get('delhi') is not None
+        assert index.get('City 9') is not None
+        assert index.get('City 0') is None
+        assert len(LocationIndex(path, max_entries=5)) == 5
+
+
+if __name__ == "__main__":
+    test_geocodes_once_and_persists()
+    test_seeded_locations_need_no_geocoder()
+    test_concurrent_writers_keep_every_entry()
+    test_index_size_is_capped_but_seeds_are_kept()
+    print("✓ Location index tests passed")
@@ -0,0 +1,88 @@
+"""
+Test script to verify the metrics registry and Prometheus rendering
+"""
+
+import threading
+from metrics import MetricsRegistry, cache_collector
+
+
+def test_counter_sums_across_threads():
+    registry = MetricsRegistry()
+    counter = registry.counter('test_requests_total', 'Requests', ('route',))
+
+    def work():
+        for _ in range(1000):
+            counter.inc(route='predict')
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert counter.values() == {('predict',): 8000}
+    assert 'test_requests_total{route="predict"} 8000' in registry.render()
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = MetricsRegistry()
+    histogram = registry.histogram('test_latency_seconds', 'Latency', ('stage',), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 5.0):
+        histogram.observe(value, stage='inference')
+
+    text = registry.render()
+    assert '# TYPE test_latency_seconds histogram' in text
+    assert 'test_latency_seconds_bucket{stage="inference",le="0.1"} 1' in text
+    assert 'test_latency_seconds_bucket{stage="inference",le="1"} 3' in text
+    assert 'test_latency_seconds_bucket{stage="inference",le="+Inf"} 4' in text
+    assert 'test_latency_seconds_count{stage="inference"} 4' in text
+    assert 'test_latency_seconds_sum{stage="inference"} 6.05' in text
+
+
+def test_gauge_tracks_in_flight_blocks():
+    registry = MetricsRegistry()
+    gauge = registry.gauge('test_in_flight', 'In flight', ('route',))
+    with gauge.track(route='predict'):
+        assert gauge.values() == {('predict',): 1}
+    assert gauge.values() == {('predict',): 0}
+
+
+def test_cache_collectors_share_families():
+    registry = MetricsRegistry()
+    registry.register_collector(cache_collector('upstream', lambda: {
+        'memory': {'hits': 3, 'misses': 1, 'entries': 2},
+        'shared': {'hits': 1, 'misses': 0, 'entries': 5},
+        'single_flight': {'calls': 1, 'coalesced': 4}
+    }))
+    registry.register_collector(cache_collector('predictions', lambda: {'hits': 7, 'misses': 2}))
+
+    text = registry.render()
+    assert text.count('# TYPE aqi_cache_lookups_total counter') == 1
+    assert 'aqi_cache_lookups_total{cache="upstream_memory",result="hits"} 3' in text
+    assert 'aqi_cache_lookups_total{cache="upstream_shared",result="hits"} 1' in text
+    assert 'aqi_cache_lookups_total{cache="predictions",result="hits"} 7' in text
+    assert 'aqi_single_flight_calls_total{cache="upstream",outcome="coalesced"} 4' in text
+
+
+def test_cache_collector_skips_unknown_values():
+    registry = MetricsRegistry()
+    # The shared tier reports None occupancy when its database cannot be read
+    registry.register_collector(cache_collector('upstream', lambda: {
+        'memory': {'hits': 3, 'misses': 1, 'entries': 2, 'bytes': 100},
+        'shared': {'hits': 1, 'misses': 0, 'entries': None, 'bytes': None}
+    }))
+
+    text = registry.render()
+    assert 'None' not in text
+    assert 'aqi_cache_entries{cache="upstream_memory"} 2' in text
+    assert 'aqi_cache_entries{cache="upstream_shared"}' not in text
+    assert 'aqi_cache_lookups_total{cache="upstream_shared",result="hits"} 1' in text
+
+
+if __name__ == "__main__":
+    test_counter_sums_across_threads()
+    test_histogram_buckets_are_cumulative()
+    test_gauge_tracks_in_flight_blocks()
+    test_cache_collectors_share_families()
+    test_cache_collector_skips_unknown_values()
+    print("✓ Metrics tests passed")
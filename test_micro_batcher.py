@@ -0,0 +1,171 @@
+"""
+Test script to verify micro-batching of concurrent predictions
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from micro_batcher import MicroBatcher
+from predict import ModelNotReady
+
+
+class StubPredictor:
+    """Scores aqi = pm25 * 2 and records each batch it is given."""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.batches = []
+        self.singles = []
+        self._lock = threading.Lock()
+
+    def batch_predict(self, features_list, hours=1):
+        with self._lock:
+            self.batches.append([f['pm25'] for f in features_list])
+        time.sleep(self.delay)
+        if any(f['pm25'] < 0 for f in features_list):
+            raise ValueError('negative pm25')
+        return [{'aqi': f['pm25'] * 2, 'hours': hours} for f in features_list]
+
+    def predict(self, features, hours=1):
+        with self._lock:
+            self.singles.append(features['pm25'])
+        return self.batch_predict([features], hours=hours)[0]
+
+
+def _predict_concurrently(batcher, requests):
+    with ThreadPoolExecutor(max_workers=len(requests)) as pool:
+        futures = [pool.submit(batcher.predict, {'pm25': pm25}, hours) for pm25, hours in requests]
+        return [future.exception() or future.result() for future in futures]
+
+
+def test_concurrent_requests_share_batches_and_get_their_own_results():
+    predictor = StubPredictor(delay=0.02)
+    batcher = MicroBatcher(predictor, max_batch_size=8, max_wait_ms=50)
+    try:
+        results = _predict_concurrently(batcher, [(pm25, 1) for pm25 in range(1, 17)])
+    finally:
+        batcher.close()
+
+    assert [r['aqi'] for r in results] == [pm25 * 2 for pm25 in range(1, 17)]
+    assert sorted(p for batch in predictor.batches for p in batch) == list(range(1, 17))
+    assert max(len(batch) for batch in predictor.batches) > 1
+    assert all(len(batch) <= 8 for batch in predictor.batches)
+    assert batcher.stats()['requests'] == 16
+
+
+def test_lone_request_is_not_held_for_max_wait():
+    batcher = MicroBatcher(StubPredictor(), max_wait_ms=1000)
+    try:
+        started = time.monotonic()
+        assert batcher.predict({'pm25': 10}) == {'aqi': 20, 'hours': 1}
+        assert time.monotonic() - started < 0.5
+    finally:
+        batcher.close()
+
+
+def test_batch_flushes_after_max_wait():
+    predictor = StubPredictor()
+    batcher = MicroBatcher(predictor, max_batch_size=64, max_wait_ms=30)
+    # Two callers are counted as waiting but only one request is ever queued
+    with batcher._lock:
+        batcher._pending += 1
+    try:
+        started = time.monotonic()
+        assert batcher.predict({'pm25': 5})['aqi'] == 10
+        assert 0.02 <= time.monotonic() - started < 0.5
+    finally:
+        batcher.close()
+    assert predictor.batches == [[5]]
+
+
+def test_horizons_are_scored_separately():
+    predictor = StubPredictor(delay=0.02)
+    batcher = MicroBatcher(predictor, max_wait_ms=50)
+    try:
+        results = _predict_concurrently(batcher, [(1, 1), (2, 6), (3, 1), (4, 6)])
+    finally:
+        batcher.close()
+
+    assert [(r['aqi'], r['hours']) for r in results] == [(2, 1), (4, 6), (6, 1), (8, 6)]
+
+
+def test_one_bad_row_only_fails_its_own_caller():
+    predictor = StubPredictor(delay=0.02)
+    batcher = MicroBatcher(predictor, max_wait_ms=50)
+    try:
+        results = _predict_concurrently(batcher, [(1, 1), (-1, 1), (3, 1), (4, 1)])
+    finally:
+        batcher.close()
+
+    assert isinstance(results[1], ValueError)
+    assert [results[i]['aqi'] for i in (0, 2, 3)] == [2, 6, 8]
+    # The bad row was batched with others, which were then rescored one by one
+    assert any(-1 in batch and len(batch) > 1 for batch in predictor.batches)
+    assert -1 in predictor.singles
+    assert batcher.stats()['fallbacks'] >= 1
+
+
+class LoadingPredictor(StubPredictor):
+    """Fails every call as a predictor whose model cannot load."""
+
+    def batch_predict(self, features_list, hours=1):
+        with self._lock:
+            self.batches.append([f['pm25'] for f in features_list])
+        time.sleep(self.delay)
+        raise ModelNotReady('Model is still loading')
+
+
+def test_model_not_ready_fails_whole_batch_without_rescoring():
+    predictor = LoadingPredictor(delay=0.02)
+    batcher = MicroBatcher(predictor, max_wait_ms=50)
+    try:
+        results = _predict_concurrently(batcher, [(pm25, 1) for pm25 in range(1, 9)])
+    finally:
+        batcher.close()
+
+    assert all(isinstance(r, ModelNotReady) for r in results)
+    assert predictor.singles == []
+    assert batcher.stats()['fallbacks'] == 0
+    assert batcher.stats()['pending'] == 0
+
+
+def test_close_fails_queued_requests_and_refuses_new_ones():
+    entered, release = threading.Event(), threading.Event()
+
+    class BlockingPredictor(StubPredictor):
+        def batch_predict(self, features_list, hours=1):
+            entered.set()
+            release.wait(5)
+            return super().batch_predict(features_list, hours=hours)
+
+    batcher = MicroBatcher(BlockingPredictor())
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        running = pool.submit(batcher.predict, {'pm25': 1})
+        assert entered.wait(2)
+        queued = pool.submit(batcher.predict, {'pm25': 2})
+        while batcher.stats()['pending'] < 2:
+            time.sleep(0.01)
+
+        # The worker is stuck on the first request past the close timeout
+        batcher.close(timeout=0.1)
+        with pytest.raises(RuntimeError, match='closed'):
+            queued.result(timeout=1)
+        with pytest.raises(RuntimeError, match='closed'):
+            batcher.predict({'pm25': 3})
+
+        release.set()
+        assert running.result(timeout=2) == {'aqi': 2, 'hours': 1}
+    batcher._thread.join(timeout=2)
+    assert not batcher._thread.is_alive()
+
+
+if __name__ == "__main__":
+    test_concurrent_requests_share_batches_and_get_their_own_results()
+    test_lone_request_is_not_held_for_max_wait()
+    test_batch_flushes_after_max_wait()
+    test_horizons_are_scored_separately()
+    test_one_bad_row_only_fails_its_own_caller()
+    test_model_not_ready_fails_whole_batch_without_rescoring()
+    test_close_fails_queued_requests_and_refuses_new_ones()
+    print("✓ Micro-batcher tests passed")
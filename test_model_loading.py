@@ -0,0 +1,94 @@
+"""
+Test script to verify lazy and background model loading with readiness
+"""
+
+import os
+import joblib
+import pytest
+from config import MODEL_PATH, SCALER_PATH
+
+if not os.path.exists(MODEL_PATH):
+    pytest.skip("trained model not available", allow_module_level=True)
+
+import predict
+from predict import AQIPredictor, ModelNotReady
+from tree_engine import TreeEngine
+
+
+def test_lazy_predictor_loads_on_first_prediction():
+    predictor = AQIPredictor(load_mode='lazy')
+    assert not predictor.ready
+    assert predictor.model is None
+
+    result = predictor.predict({'pm25': 120, 'pm10': 180})
+    assert predictor.ready
+    assert 'aqi' in result
+    assert predictor.get_status()['load_seconds'] is not None
+
+
+def test_background_predictor_becomes_ready():
+    predictor = AQIPredictor(load_mode='background')
+    assert predictor._loaded.wait(30)
+    assert predictor.ready
+    assert predictor.get_status()['error'] is None
+
+
+def test_failed_load_raises_model_not_ready(monkeypatch):
+    def broken_load(self):
+        raise OSError('model file missing')
+
+    monkeypatch.setattr(AQIPredictor, '_load_scaler', broken_load)
+    predictor = AQIPredictor(load_mode='lazy')
+    with pytest.raises(ModelNotReady):
+        predictor.predict({'pm25': 120})
+    assert not predictor.ready
+    assert 'model file missing' in predictor.get_status()['error']
+
+
+def _saved_engine(directory, version):
+    model, scaler = joblib.load(MODEL_PATH), joblib.load(SCALER_PATH)
+    TreeEngine.compile(model, scaler.mean_, scaler.scale_, source_version=version).save(str(directory))
+
+
+def test_worker_with_current_engine_never_unpickles_forest(monkeypatch, tmp_path):
+    def forest_load(self):
+        raise AssertionError('forest should not be loaded')
+
+    _saved_engine(tmp_path, AQIPredictor(load_mode='lazy').model_version)
+    monkeypatch.setattr(predict, 'TREE_ENGINE_DIR', str(tmp_path))
+    monkeypatch.setattr(AQIPredictor, '_load_model', forest_load)
+    predictor = AQIPredictor(load_mode='eager')
+
+    assert predictor.model is None
+    assert predictor.engine is not None
+    assert predictor.get_status()['scorer'] == 'engine'
+    assert 'feature_importances' not in predictor.get_status()['engine']
+    assert sum(predictor.importances.values()) > 0.99
+    assert 'aqi' in predictor.predict({'pm25': 120, 'pm10': 180})
+    assert predictor.model is None
+
+
+def test_stale_engine_is_compiled_from_forest_and_forest_dropped(monkeypatch, tmp_path):
+    _saved_engine(tmp_path, 'stale')
+    monkeypatch.setattr(predict, 'TREE_ENGINE_DIR', str(tmp_path))
+    predictor = AQIPredictor(load_mode='eager')
+
+    assert predictor.engine is not None
+    assert predictor.engine.meta['source_version'] == predictor.model_version
+    assert predictor.model is None
+
+
+def test_forest_is_kept_when_engine_disabled(monkeypatch):
+    monkeypatch.setattr(predict, 'TREE_ENGINE_ENABLED', False)
+    predictor = AQIPredictor(load_mode='eager')
+
+    assert predictor.engine is None
+    assert predictor.model is not None
+    assert predictor.get_status()['scorer'] == 'sklearn'
+    assert 'aqi' in predictor.predict({'pm25': 120, 'pm10': 180})
+
+
+if __name__ == "__main__":
+    test_lazy_predictor_loads_on_first_prediction()
+    test_background_predictor_becomes_ready()
+    print("✓ Model loading tests passed")
@@ -0,0 +1,116 @@
+"""
+Test script to verify the prediction result cache
+"""
+
+import asyncio
+import threading
+import time
+from prediction_cache import PredictionCache
+
+
+def test_key_buckets_location_time_and_overrides():
+    cache = PredictionCache(window=300, coord_precision=2)
+    base = cache.key('Delhi', 28.6139, 77.2090, {'city': 'Delhi'}, 'v1', now=600)
+
+    # Same bucket: city spelling, nearby coordinates and time within the window
+    assert cache.key(' delhi ', 28.6121, 77.2088, {'city': 'delhi', 'lat': 28.61}, 'v1', now=899) == base
+    # Next window, other inputs or a new model all get their own entry
+    assert cache.key('Delhi', 28.6139, 77.2090, {}, 'v1', now=900) != base
+    assert cache.key('Delhi', 28.6139, 77.2090, {'season_type': 2}, 'v1', now=600) != base
+    assert cache.key('Delhi', 28.6139, 77.2090, {}, 'v2', now=600) != base
+    assert cache.key('Delhi', 28.70, 77.2090, {}, 'v1', now=600) != base
+
+
+def test_result_dropped_when_snapshot_changes():
+    cache = PredictionCache()
+    cache.set('k', {'aqi': 90}, snapshot_version=1.0)
+    assert cache.get('k', 1.0) == {'aqi': 90}
+
+    assert cache.get('k', 2.0) is None
+    assert cache.get('k', 1.0) is None
+    assert cache.stats()['snapshot_invalidations'] == 1
+
+
+def test_results_without_snapshot_are_not_cached():
+    cache = PredictionCache()
+    cache.set('k', {'aqi': 90}, snapshot_version=None)
+    assert cache.get('k', None) is None
+
+
+def test_entries_expire_with_the_window():
+    cache = PredictionCache(window=0.05)
+    cache.set('k', {'aqi': 90}, snapshot_version=1.0)
+    time.sleep(0.06)
+    assert cache.get('k', 1.0) is None
+
+
+def test_concurrent_viewers_share_one_prediction():
+    cache = PredictionCache()
+    calls = []
+    gate = threading.Event()
+
+    def compute():
+        calls.append(1)
+        gate.wait(1)
+        return {'aqi': 120}
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_compute('k', lambda: 1.0, compute)))
+               for _ in range(8)]
+    for t in threads:
+        t.start()
+    time.sleep(0.05)
+    gate.set()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert results == [{'aqi': 120}] * 8
+    assert cache.get_or_compute('k', lambda: 1.0, compute) == {'aqi': 120}
+    assert len(calls) == 1
+
+
+def test_concurrent_async_viewers_share_one_prediction():
+    cache = PredictionCache()
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return {'aqi': 120}
+
+    async def viewers():
+        return await asyncio.gather(*(cache.aget_or_compute('k', lambda: 1.0, compute) for _ in range(8)))
+
+    assert asyncio.run(viewers()) == [{'aqi': 120}] * 8
+    assert len(calls) == 1
+    assert cache.stats()['async_single_flight'] == {'calls': 1, 'coalesced': 7, 'in_flight': 0}
+    # Later requests in the window are served from the cache
+    assert asyncio.run(cache.aget_or_compute('k', lambda: 1.0, compute)) == {'aqi': 120}
+    assert len(calls) == 1
+
+
+def test_async_failure_reaches_every_waiter_and_is_not_cached():
+    cache = PredictionCache()
+
+    async def compute():
+        await asyncio.sleep(0.01)
+        raise RuntimeError('upstream down')
+
+    async def viewers():
+        return await asyncio.gather(*(cache.aget_or_compute('k', lambda: 1.0, compute) for _ in range(3)),
+                                    return_exceptions=True)
+
+    assert [str(e) for e in asyncio.run(viewers())] == ['upstream down'] * 3
+    assert cache.get('k', 1.0) is None
+
+
+if __name__ == "__main__":
+    test_key_buckets_location_time_and_overrides()
+    test_result_dropped_when_snapshot_changes()
+    test_results_without_snapshot_are_not_cached()
+    test_entries_expire_with_the_window()
+    test_concurrent_viewers_share_one_prediction()
+    test_concurrent_async_viewers_share_one_prediction()
+    test_async_failure_reaches_every_waiter_and_is_not_cached()
+    print("✓ Prediction cache tests passed")
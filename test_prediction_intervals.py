@@ -0,0 +1,56 @@
+"""
+Test script to verify prediction intervals from the per-tree spread
+"""
+
+import json
+import os
+import pytest
+from config import MODEL_PATH
+
+if not os.path.exists(MODEL_PATH):
+    pytest.skip("trained model not available", allow_module_level=True)
+
+import predict
+from predict import AQIPredictor
+
+
+def test_interval_brackets_prediction():
+    predictor = AQIPredictor()
+    results = [predictor.predict({'pm25': 300, 'pm10': 400})] + \
+        predictor.batch_predict([{'pm25': pm25} for pm25 in (10, 80, 250)])
+
+    for result in results:
+        interval = result['interval']
+        assert interval['lower'] <= result['aqi'] <= interval['upper']
+        assert 0.0 <= result['confidence'] <= 1.0
+        assert result['tree_spread'] >= 0
+
+
+def test_stored_calibration_is_used(tmp_path, monkeypatch):
+    predictor = AQIPredictor(load_mode='lazy')
+    path = tmp_path / 'calibration.json'
+    path.write_text(json.dumps({'level': 0.8, 'quantiles': [-0.5, 0.5], 'min_spread': 1.0,
+                                'source_version': predictor.model_version}))
+    monkeypatch.setattr(predict, 'CALIBRATION_PATH', str(path))
+
+    result = predictor.predict({'pm25': 150})
+    assert result['interval']['calibrated']
+    assert result['interval']['level'] == 0.8
+    width = result['interval']['upper'] - result['interval']['lower']
+    assert abs(width - result['tree_spread']) <= 1.5
+
+
+def test_calibration_for_other_model_is_ignored(tmp_path, monkeypatch):
+    path = tmp_path / 'calibration.json'
+    path.write_text(json.dumps({'level': 0.8, 'quantiles': [-0.5, 0.5], 'min_spread': 1.0,
+                                'source_version': 'stale'}))
+    monkeypatch.setattr(predict, 'CALIBRATION_PATH', str(path))
+
+    result = AQIPredictor().predict({'pm25': 150})
+    assert not result['interval']['calibrated']
+    assert result['interval']['level'] == 0.9
+
+
+if __name__ == "__main__":
+    test_interval_brackets_prediction()
+    print("✓ Prediction interval tests passed")
@@ -0,0 +1,62 @@
+"""
+Test script to verify the snapshot prefetcher stays bounded
+"""
+
+import prefetcher
+from prefetcher import SnapshotPrefetcher
+
+
+class StubIntegrator:
+    def get_aggregated_data(self, city, lat, lon):
+        return {'city': city, 'sources': {'waqi': {'status': 'ok'}}}
+
+
+def test_snapshots_are_evicted_least_recently_used_first():
+    hot = {'city': 'Delhi', 'lat': 28.6139, 'lon': 77.2090}
+    snapshots = SnapshotPrefetcher(StubIntegrator(), locations=[hot], max_snapshots=3)
+    for city in ('Delhi', 'Pune', 'Agra'):
+        snapshots.get_aggregated_data(city, 1, 1)
+    # Reading Delhi makes Pune the least recently used
+    snapshots.get_aggregated_data('Delhi', 1, 1)
+    snapshots.get_aggregated_data('Goa', 1, 1)
+
+    held = {city for city, _, _ in snapshots._snapshots}
+    assert held == {'delhi', 'agra', 'goa'}
+    snapshots.stop()
+
+
+def test_hot_snapshots_are_never_evicted_for_count():
+    hot = [{'city': 'Delhi', 'lat': 28.6139, 'lon': 77.2090},
+           {'city': 'Mumbai', 'lat': 19.0760, 'lon': 72.8777}]
+    snapshots = SnapshotPrefetcher(StubIntegrator(), locations=hot, max_snapshots=3)
+    for location in hot:
+        snapshots.refresh(location['city'], location['lat'], location['lon'])
+    # The hot snapshots are now the least recently used
+    for city in ('Pune', 'Agra', 'Goa'):
+        snapshots.get_aggregated_data(city, 1, 1)
+
+    held = {city for city, _, _ in snapshots._snapshots}
+    assert held == {'delhi', 'mumbai', 'goa'}
+    snapshots.stop()
+
+
+def test_refresh_drops_snapshots_past_hard_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(prefetcher, 'monotonic', lambda: now[0])
+    hot = {'city': 'Delhi', 'lat': 28.6139, 'lon': 77.2090}
+    snapshots = SnapshotPrefetcher(StubIntegrator(), locations=[hot], hard_ttl=60)
+    snapshots.refresh('Delhi', 28.6139, 77.2090)
+    snapshots.get_aggregated_data('Pune', 18.52, 73.85)
+
+    now[0] += 120
+    snapshots.refresh('Agra', 27.18, 78.01)
+    held = {city for city, _, _ in snapshots._snapshots}
+    # The hot location keeps its last good snapshot as an outage fallback
+    assert held == {'delhi', 'agra'}
+    snapshots.stop()
+
+
+if __name__ == "__main__":
+    test_snapshots_are_evicted_least_recently_used_first()
+    test_hot_snapshots_are_never_evicted_for_count()
+    print("✓ Prefetcher tests passed")
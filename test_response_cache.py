@@ -0,0 +1,128 @@
+"""
+Test script to verify the upstream response cache
+"""
+
+import os
+import tempfile
+import threading
+import time
+from response_cache import ResponseCache, SQLiteResponseCache, TieredResponseCache, SingleFlight
+from api_integrator import APIIntegrator
+
+
+def test_entries_expire_after_ttl():
+    cache = ResponseCache()
+    cache.set('waqi', {'aqi': 120}, ttl=0.05)
+    assert cache.get('waqi').value == {'aqi': 120}
+
+    time.sleep(0.06)
+    assert cache.get('waqi') is None
+    assert cache.stats()['expirations'] == 1
+
+
+def test_lru_eviction_by_count_and_bytes():
+    cache = ResponseCache(max_entries=2, max_bytes=100)
+    cache.set('a', 1, ttl=60, size=10)
+    cache.set('b', 2, ttl=60, size=10)
+    cache.get('a')
+    cache.set('c', 3, ttl=60, size=10)
+
+    assert cache.get('b') is None
+    assert cache.get('a').value == 1
+
+    cache.set('d', 4, ttl=60, size=95)
+    assert cache.get('a') is None
+    assert cache.get('c') is None
+    assert cache.stats()['evictions'] == 3
+
+
+def test_negative_entries_are_counted_separately():
+    cache = ResponseCache()
+    cache.set('tomtom', {}, ttl=60, negative=True)
+
+    entry = cache.get('tomtom')
+    assert entry.negative and entry.value == {}
+    cache.get('missing')
+
+    stats = cache.stats()
+    assert stats['negative_hits'] == 1
+    assert stats['misses'] == 1
+    assert stats['hit_rate'] == 0.5
+
+
+def test_sqlite_cache_survives_restart():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'cache.sqlite3')
+        SQLiteResponseCache(path).set('opencage', {'lat': 28.6}, ttl=60, size=20)
+
+        # A fresh process sees the entry through its memory tier
+        cache = TieredResponseCache(ResponseCache(), SQLiteResponseCache(path))
+        assert cache.get('opencage').value == {'lat': 28.6}
+        assert cache.memory.get('opencage').value == {'lat': 28.6}
+
+
+def test_sqlite_cache_evicts_least_recently_accessed():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = SQLiteResponseCache(os.path.join(tmp, 'cache.sqlite3'), max_entries=3)
+        cache.EVICT_EVERY = 1
+        for i in range(5):
+            cache.set(f'k{i}', i, ttl=60)
+            time.sleep(0.01)
+
+        assert cache.get('k0') is None
+        assert cache.get('k4').value == 4
+        assert cache.stats()['entries'] == 3
+
+
+def test_single_flight_shares_one_call():
+    flight = SingleFlight()
+    calls = []
+    results = []
+
+    def slow_fetch():
+        calls.append(1)
+        time.sleep(0.1)
+        return {'city': 'Delhi'}
+
+    threads = [threading.Thread(target=lambda: results.append(flight.do('delhi', slow_fetch)))
+               for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert results == [{'city': 'Delhi'}] * 8
+    assert flight.stats()['coalesced'] == 7
+
+
+def test_cached_request_rechecks_cache_inside_the_flight():
+    integrator = APIIntegrator()
+    integrator.cache = ResponseCache()
+    fetches = []
+    integrator._fetch_and_store = lambda *args: fetches.append(args) or {'fresh': True}
+    lookup = integrator.cache.get
+
+    def get_after_flight(key):
+        # A flight for the key finishes right after the caller's first lookup
+        entry = lookup(key)
+        integrator.cache.set(key, {'stored': True}, 60)
+        return entry
+
+    integrator.cache.get = get_after_flight
+    try:
+        assert integrator._cached_request('stub', 'http://stub/a') == {'stored': True}
+        assert fetches == []
+    finally:
+        integrator.close()
+
+
+if __name__ == "__main__":
+    test_entries_expire_after_ttl()
+    test_lru_eviction_by_count_and_bytes()
+    test_negative_entries_are_counted_separately()
+    test_sqlite_cache_survives_restart()
+    test_sqlite_cache_evicts_least_recently_accessed()
+    test_single_flight_shares_one_call()
+    test_cached_request_rechecks_cache_inside_the_flight()
+    print("✓ Response cache tests passed")
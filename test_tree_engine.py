@@ -0,0 +1,118 @@
+"""
+Test script to verify the flat-array tree engine matches sklearn
+"""
+
+import os
+import tempfile
+import warnings
+from datetime import datetime, timedelta
+import joblib
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.preprocessing import StandardScaler
+from config import MODEL_PATH, SCALER_PATH
+from feature_builder import time_features
+from tree_engine import TreeEngine, fold_thresholds
+
+
+def _fitted():
+    rng = np.random.default_rng(0)
+    raw = rng.normal([50, 20, 1000], [30, 8, 15], size=(400, 3))
+    y = raw[:, 0] * 2 + raw[:, 1] - raw[:, 2] * 0.1
+    scaler = StandardScaler().fit(raw)
+    model = RandomForestRegressor(n_estimators=12, max_depth=6, random_state=0).fit(scaler.transform(raw), y)
+    return model, scaler, raw
+
+
+def test_engine_matches_sklearn():
+    model, scaler, raw = _fitted()
+    scaled = scaler.transform(raw)
+
+    engine = TreeEngine.compile(model)
+    np.testing.assert_allclose(engine.predict(scaled), model.predict(scaled), rtol=0, atol=1e-9)
+    np.testing.assert_allclose(engine.tree_values(scaled).T,
+                               [tree.predict(scaled) for tree in model.estimators_], atol=1e-9)
+
+
+def test_scaler_folded_into_thresholds():
+    model, scaler, raw = _fitted()
+    engine = TreeEngine.compile(model, scaler.mean_, scaler.scale_)
+    assert engine.folded
+    np.testing.assert_allclose(engine.predict(raw), model.predict(scaler.transform(raw)), rtol=0, atol=1e-9)
+    assert engine.verify(model, scaler.mean_, scaler.scale_) < 1e-9
+
+
+def test_folding_matches_sklearn_on_integer_features():
+    # Whole-number calendar columns put raw values exactly on split boundaries
+    rng = np.random.default_rng(1)
+    raw = np.column_stack([rng.integers(1, 13, 2000), rng.integers(0, 24, 2000),
+                           rng.integers(0, 2, 2000), rng.normal(100, 40, 2000)]).astype(np.float64)
+    y = raw[:, 0] * 3 + np.sin(raw[:, 1]) * 5 + raw[:, 2] * 4 + raw[:, 3] * 0.5
+    scaler = StandardScaler().fit(raw)
+    model = RandomForestRegressor(n_estimators=20, random_state=0).fit(scaler.transform(raw), y)
+
+    engine = TreeEngine.compile(model, scaler.mean_, scaler.scale_)
+    grid = np.array([[m, h, w, 100.0] for m in range(-1, 15) for h in range(-1, 26) for w in (0, 1)])
+    np.testing.assert_allclose(engine.predict(grid), model.predict(scaler.transform(grid)), rtol=0, atol=1e-9)
+    assert engine.verify(model, scaler.mean_, scaler.scale_, rows=grid) < 1e-9
+
+
+def test_fold_thresholds_finds_last_raw_value_going_left():
+    mean, scale = np.array([6.5]), np.array([3.45])
+    threshold = np.array([np.float32((14.0 - 6.5) / 3.45)], dtype=np.float64)
+    folded = fold_thresholds(threshold, mean, scale)
+    assert np.float32((folded - mean) / scale) <= threshold
+    assert np.float32((np.nextafter(folded, np.inf) - mean) / scale) > threshold
+    assert folded[0] >= 14.0
+
+
+def test_live_engine_matches_model_on_calendar_rows():
+    if not os.path.exists(MODEL_PATH):
+        pytest.skip("trained model not available")
+    from predict import FeatureEncoder, MODEL_FEATURES
+    warnings.filterwarnings('ignore', message='X does not have valid feature names')
+    model, scaler = joblib.load(MODEL_PATH), joblib.load(SCALER_PATH)
+    engine = TreeEngine.compile(model, scaler.mean_, scaler.scale_)
+    encoder = FeatureEncoder(MODEL_FEATURES, scaler)
+
+    # A year of hourly /predict-style rows with fixed pollutants
+    start = datetime(2024, 1, 1)
+    raw = encoder.encode_batch([{'pm25': 150, 'pm10': 220, **time_features(start + timedelta(hours=h))}
+                                for h in range(0, 8760, 3)], scale=False)
+    expected = model.predict(encoder.transform(raw.copy()))
+    np.testing.assert_allclose(engine.predict(raw), expected, rtol=0, atol=1e-9)
+
+
+def test_contributions_add_up_to_prediction():
+    model, scaler, raw = _fitted()
+    engine = TreeEngine.compile(model, scaler.mean_, scaler.scale_)
+    predictions, spread, bias, contributions = engine.explain(raw[:50])
+
+    np.testing.assert_array_equal(predictions, engine.predict(raw[:50]))
+    np.testing.assert_allclose(spread, engine.tree_values(raw[:50]).std(axis=1))
+    np.testing.assert_allclose(bias + contributions.sum(axis=1), predictions, atol=1e-9)
+    # The target leans mostly on the first feature
+    assert np.abs(contributions[:, 0]).mean() > np.abs(contributions[:, 2]).mean()
+
+
+def test_saved_engine_is_memory_mapped():
+    model, scaler, raw = _fitted()
+    engine = TreeEngine.compile(model, scaler.mean_, scaler.scale_, source_version='abc')
+    with tempfile.TemporaryDirectory() as directory:
+        engine.save(directory)
+        loaded = TreeEngine.load(directory)
+        assert loaded.meta['source_version'] == 'abc'
+        assert isinstance(loaded.threshold.base, np.memmap)
+        np.testing.assert_array_equal(loaded.predict(raw[:5]), engine.predict(raw[:5]))
+        del loaded
+
+
+if __name__ == "__main__":
+    test_engine_matches_sklearn()
+    test_scaler_folded_into_thresholds()
+    test_folding_matches_sklearn_on_integer_features()
+    test_fold_thresholds_finds_last_raw_value_going_left()
+    test_contributions_add_up_to_prediction()
+    test_saved_engine_is_memory_mapped()
+    print("✓ Tree engine tests passed")
@@ -7,6 +7,7 @@ Last Updated: 2025-04-10 11:35:24
 
 import os
 import sys
+import json
 import logging
 import pandas as pd
 import numpy as np
@@ -25,6 +26,7 @@ sys.path.append(str(project_root))
 
 # Import config
 from ml_model.config import *
+from ml_model.tree_engine import TreeEngine, artifact_version
 
 # Setup logging
 logging.basicConfig(
@@ -40,6 +42,7 @@ class AQIModel:
         self.features = FEATURE_COLUMNS
         self.target = TARGET_COLUMN
         self.logger = logging.getLogger('AQIModel')
+        self.calibration = None
 
     def preprocess_data(self, df):
         """Preprocess the input data."""
@@ -202,6 +205,9 @@ class AQIModel:
             # Cross-validation score
             cv_rmse, cv_std = self.evaluate_model(X, y)
             
+            # Interval calibration from held-out residuals
+            self.calibrate_intervals(X_test, y_test)
+            
             # Feature importance
             importance = dict(zip(self.features, 
                                 self.model.feature_importances_))
@@ -233,6 +239,26 @@ class AQIModel:
             self.logger.error(f"Error in training: {str(e)}")
             raise
 
+    def calibrate_intervals(self, X, y):
+        """
+        Calibrate prediction intervals on held-out data.
+        
+        Residuals are divided by the spread of the individual tree outputs,
+        and the quantiles of that ratio at INTERVAL_LEVEL coverage are kept,
+        so serving can turn any prediction's tree spread into an interval.
+        """
+        values = TreeEngine.compile(self.model).tree_values(np.asarray(X, dtype=np.float64))
+        spread = np.maximum(values.std(axis=1), INTERVAL_MIN_SPREAD)
+        scores = (np.asarray(y, dtype=np.float64) - values.mean(axis=1)) / spread
+        alpha = (1 - INTERVAL_LEVEL) / 2
+        self.calibration = {
+            'level': INTERVAL_LEVEL,
+            'quantiles': [float(np.quantile(scores, alpha)), float(np.quantile(scores, 1 - alpha))],
+            'min_spread': INTERVAL_MIN_SPREAD,
+            'samples': int(len(scores))
+        }
+        self.logger.info(f"Interval quantiles: {self.calibration['quantiles']} over {len(scores)} samples")
+
     def save_model(self):
         """Save the trained model and scaler."""
         try:
@@ -243,6 +269,21 @@ class AQIModel:
             joblib.dump(self.model, MODEL_PATH)
             joblib.dump(self.scaler, SCALER_PATH)
             
+            # Compile the flat-array serving engine, keyed to the files just written
+            engine = TreeEngine.compile(self.model, self.scaler.mean_, self.scaler.scale_,
+                                        source_version=artifact_version([MODEL_PATH, SCALER_PATH]))
+            # Workers use a saved engine without the forest, so only save a verified one
+            error = engine.verify(self.model, self.scaler.mean_, self.scaler.scale_)
+            if error > TREE_ENGINE_TOLERANCE:
+                self.logger.warning(f"Tree engine differs from the model by {error}; not saved")
+            else:
+                engine.save(TREE_ENGINE_DIR)
+                self.logger.info(f"Tree engine saved to {TREE_ENGINE_DIR}")
+            
+            if self.calibration is not None:
+                with open(CALIBRATION_PATH, 'w') as f:
+                    json.dump({**self.calibration, 'source_version': engine.meta['source_version']}, f, indent=2)
+            
             self.logger.info(f"Model saved to {MODEL_PATH}")
             self.logger.info(f"Scaler saved to {SCALER_PATH}")
             
@@ -0,0 +1,277 @@
+"""
+Flat array inference engine for the Smart AQI Guardian RandomForest
+Compiles the trained forest into contiguous node arrays that can be
+memory-mapped and traversed for a whole batch with NumPy
+"""
+
+import hashlib
+import json
+import os
+import warnings
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+import logging
+
+import numpy as np
+
+ENGINE_ARRAYS = ('feature', 'threshold', 'children', 'value', 'roots')
+META_FILENAME = 'engine.json'
+# Bumped when the saved arrays or metadata change meaning; engines of another format are recompiled
+ENGINE_FORMAT = 3
+
+
+def artifact_version(paths: List[str]) -> str:
+    """Fingerprint model artifacts by path, size and mtime."""
+    stamp = []
+    for path in paths:
+        stat = Path(path).stat()
+        stamp.append(f"{path}:{stat.st_size}:{stat.st_mtime_ns}")
+    return hashlib.sha1('|'.join(stamp).encode('utf-8')).hexdigest()[:12]
+
+
+def _ordered(values: np.ndarray) -> np.ndarray:
+    """Map float64 values to int64 keys that sort in the same order."""
+    bits = values.view(np.int64)
+    return np.where(bits >= 0, bits, np.iinfo(np.int64).min - bits)
+
+
+def _unordered(keys: np.ndarray) -> np.ndarray:
+    """Inverse of _ordered."""
+    return np.where(keys >= 0, keys, np.iinfo(np.int64).min - keys).view(np.float64)
+
+
+def fold_thresholds(threshold: np.ndarray, mean: np.ndarray, scale: np.ndarray) -> np.ndarray:
+    """
+    Move split thresholds from scaled space onto raw feature values.
+
+    sklearn sends a row left when float32((x - mean) / scale) <= threshold,
+    so `threshold * scale + mean` is off by the float32 rounding and raw
+    values sitting on a boundary (whole-number calendar features, say)
+    can take the other branch. Instead, bisect over the ordered float64
+    values for the largest raw x that still goes left; the test is
+    monotonic in x, so `x <= folded` then matches sklearn exactly.
+    """
+    def goes_left(keys):
+        with np.errstate(over='ignore', invalid='ignore'):
+            scaled = ((_unordered(keys) - mean) / scale).astype(np.float32)
+        return scaled <= threshold
+
+    # -inf always goes left and +inf never does
+    lo = np.full(len(threshold), _ordered(np.array([-np.inf]))[0])
+    hi = np.full(len(threshold), _ordered(np.array([np.inf]))[0])
+    while True:
+        open_ = hi > lo + 1
+        if not open_.any():
+            return _unordered(lo)
+        # Floor of the midpoint without overflowing int64
+        mid = (lo >> 1) + (hi >> 1) + (lo & hi & 1)
+        left = goes_left(mid) & open_
+        lo = np.where(left, mid, lo)
+        hi = np.where(open_ & ~left, mid, hi)
+
+
+class TreeEngine:
+    """
+    A RandomForestRegressor compiled into flat arrays.
+
+    Every node of every tree lives in one set of arrays: split feature,
+    threshold, node value and children (interleaved, so node i's left and
+    right child sit at 2i and 2i + 1), plus the root of each tree. Leaves
+    point at themselves, so a batch is scored by stepping all (tree, row)
+    pairs forward `depth` times with a few vectorized gathers and
+    averaging the leaf values. When the scaler's mean and scale are
+    given, they are folded into the thresholds and the engine takes raw,
+    unscaled feature rows.
+
+    Saved engines are plain .npy files; loading them with mmap_mode='r'
+    lets every worker process share one copy through the page cache.
+    """
+
+    def __init__(self, arrays: Dict[str, np.ndarray], meta: Dict[str, Any]):
+        self.logger = logging.getLogger('TreeEngine')
+        # Plain ndarray views, so gathers on memory-mapped arrays stay cheap
+        self.feature = np.asarray(arrays['feature'])
+        self.threshold = np.asarray(arrays['threshold'])
+        self.children = np.asarray(arrays['children'])
+        self.value = np.asarray(arrays['value'])
+        self.roots = np.asarray(arrays['roots'])
+        self.meta = meta
+        self.depth = int(meta['depth'])
+        self.n_trees = int(meta['n_trees'])
+        self.n_features = int(meta['n_features'])
+        self.folded = bool(meta['folded'])
+
+    @classmethod
+    def compile(cls, model, mean: Optional[np.ndarray] = None, scale: Optional[np.ndarray] = None,
+                source_version: Optional[str] = None) -> 'TreeEngine':
+        """Flatten a fitted forest, folding (x - mean) / scale into the thresholds if given."""
+        trees = [estimator.tree_ for estimator in model.estimators_]
+        sizes = np.array([tree.node_count for tree in trees])
+        offsets = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+
+        feature = np.concatenate([tree.feature for tree in trees]).astype(np.int32)
+        threshold = np.concatenate([tree.threshold for tree in trees]).astype(np.float64)
+        children = np.stack([
+            np.concatenate([tree.children_left + offset for tree, offset in zip(trees, offsets)]),
+            np.concatenate([tree.children_right + offset for tree, offset in zip(trees, offsets)])
+        ], axis=1).astype(np.int32)
+        value = np.concatenate([tree.value[:, 0, 0] for tree in trees]).astype(np.float64)
+
+        # Leaves loop back to themselves so every row can take `depth` steps
+        leaf = feature < 0
+        nodes = np.arange(len(feature))
+        children[leaf] = nodes[leaf, None]
+        feature[leaf] = 0
+        threshold[leaf] = 0.0
+
+        folded = mean is not None and scale is not None
+        if folded:
+            split = ~leaf
+            threshold[split] = fold_thresholds(threshold[split], np.asarray(mean, dtype=np.float64)[feature[split]],
+                                               np.asarray(scale, dtype=np.float64)[feature[split]])
+
+        meta = {
+            'format': ENGINE_FORMAT,
+            'depth': int(max(tree.max_depth for tree in trees)),
+            'n_trees': len(trees),
+            'n_features': int(model.n_features_in_),
+            'n_nodes': int(len(feature)),
+            'folded': folded,
+            'source_version': source_version,
+            # Saved so serving workers can report global factors without unpickling the forest
+            'feature_importances': [float(v) for v in model.feature_importances_]
+        }
+        arrays = {'feature': feature, 'threshold': threshold, 'children': children.ravel(),
+                  'value': value, 'roots': offsets.astype(np.int32)}
+        return cls(arrays, meta)
+
+    def save(self, directory: str):
+        """Write the arrays and metadata; metadata goes last and marks the engine complete."""
+        os.makedirs(directory, exist_ok=True)
+        meta_path = os.path.join(directory, META_FILENAME)
+        if os.path.exists(meta_path):
+            os.remove(meta_path)
+        for name in ENGINE_ARRAYS:
+            path = os.path.join(directory, f'{name}.npy')
+            with open(path + '.tmp', 'wb') as f:
+                np.save(f, getattr(self, name))
+            os.replace(path + '.tmp', path)
+        with open(meta_path + '.tmp', 'w') as f:
+            json.dump(self.meta, f, indent=2)
+        os.replace(meta_path + '.tmp', meta_path)
+
+    @classmethod
+    def load(cls, directory: str, mmap_mode: Optional[str] = 'r') -> 'TreeEngine':
+        """Open a saved engine, memory-mapped by default."""
+        with open(os.path.join(directory, META_FILENAME)) as f:
+            meta = json.load(f)
+        arrays = {name: np.load(os.path.join(directory, f'{name}.npy'), mmap_mode=mmap_mode)
+                  for name in ENGINE_ARRAYS}
+        return cls(arrays, meta)
+
+    def _walk(self, matrix: np.ndarray):
+        """
+        Step every (tree, row) pair one level down per iteration, yielding
+        the flat (row, split feature) slots, the current nodes and their
+        chosen children as (n_trees, rows) arrays.
+        """
+        # Unfolded thresholds were learned on float32 inputs, as sklearn scores them
+        dtype = np.float64 if self.folded else np.float32
+        flat = np.ascontiguousarray(matrix, dtype=dtype).ravel()
+        # Tree-major order keeps each step's gathers within one tree's nodes
+        row_offsets = (np.arange(len(matrix), dtype=np.int32) * self.n_features)[None, :]
+        nodes = np.repeat(self.roots[:, None], len(matrix), axis=1)
+        for _ in range(self.depth):
+            slots = row_offsets + self.feature[nodes]
+            children = self.children[2 * nodes + (flat[slots] > self.threshold[nodes])]
+            yield slots, nodes, children
+            nodes = children
+        yield None, nodes, nodes
+
+    def leaves(self, matrix: np.ndarray) -> np.ndarray:
+        """Leaf node reached by each row in each tree, as a (rows, n_trees) array."""
+        for _, nodes, _ in self._walk(matrix):
+            pass
+        return nodes.T
+
+    def tree_values(self, matrix: np.ndarray) -> np.ndarray:
+        """Each tree's prediction for each row, as a (rows, n_trees) array."""
+        return self.value[self.leaves(matrix)]
+
+    def predict(self, matrix: np.ndarray) -> np.ndarray:
+        """Forest prediction for each row: the mean over trees."""
+        return self.tree_values(matrix).mean(axis=1)
+
+    def predict_with_spread(self, matrix: np.ndarray):
+        """Forest prediction and the standard deviation of the tree outputs for each row."""
+        values = self.tree_values(matrix)
+        return values.mean(axis=1), values.std(axis=1)
+
+    def explain(self, matrix: np.ndarray):
+        """
+        Predictions with per-feature contributions (Saabas decomposition).
+
+        Each split on a row's path moves the estimate from the node's value
+        to the chosen child's, and that change is credited to the split
+        feature. Averaged over trees, a row's prediction is the bias (the
+        mean root value) plus its contributions. Returns (predictions,
+        spread, bias, contributions): spread is the standard deviation of
+        the tree outputs and contributions are shaped (rows, n_features).
+        """
+        rows = len(matrix)
+        contributions = np.zeros(rows * self.n_features)
+        for slots, nodes, children in self._walk(matrix):
+            if slots is None:
+                break
+            # Leaves point at themselves, so finished paths add nothing
+            contributions += np.bincount(slots.ravel(), weights=(self.value[children] - self.value[nodes]).ravel(),
+                                         minlength=rows * self.n_features)
+        values = self.value[nodes]
+        bias = np.full(rows, self.value[self.roots].mean())
+        return (values.mean(axis=0), values.std(axis=0), bias,
+                contributions.reshape(rows, self.n_features) / self.n_trees)
+
+    def verify(self, model, mean: Optional[np.ndarray] = None, scale: Optional[np.ndarray] = None,
+               samples: int = 512, seed: int = 0, rows: Optional[np.ndarray] = None) -> float:
+        """
+        Largest absolute difference from sklearn's predictions.
+
+        Checks random rows plus the same rows rounded to whole numbers, so
+        integer features such as the calendar ones land exactly on split
+        boundaries; extra raw rows can be passed in as well.
+        """
+        scaled = np.random.default_rng(seed).normal(0.0, 2.0, size=(samples, self.n_features))
+        raw = scaled * scale + mean if self.folded else scaled
+        raw = np.vstack([raw, np.round(raw)] + ([np.asarray(rows, dtype=np.float64)] if rows is not None else []))
+        # Scale exactly as the serving encoder and StandardScaler.transform do
+        expected_input = (raw - mean) / scale if self.folded else raw
+        with warnings.catch_warnings():
+            # The forest was fitted on a DataFrame; plain arrays are fine here
+            warnings.simplefilter('ignore', UserWarning)
+            expected = model.predict(expected_input)
+        return float(np.max(np.abs(self.predict(raw) - expected)))
+
+
+def main():
+    """
+    Compile the engine for the saved model and scaler; run at deploy time
+    after training. Serving workers trust a saved engine of the current
+    version and format without loading the forest, so it is only written
+    once it matches the forest's predictions.
+    """
+    import joblib
+    from config import MODEL_PATH, SCALER_PATH, TREE_ENGINE_DIR, TREE_ENGINE_TOLERANCE
+
+    model = joblib.load(MODEL_PATH)
+    scaler = joblib.load(SCALER_PATH)
+    engine = TreeEngine.compile(model, scaler.mean_, scaler.scale_,
+                                source_version=artifact_version([MODEL_PATH, SCALER_PATH]))
+    error = engine.verify(model, scaler.mean_, scaler.scale_)
+    if error > TREE_ENGINE_TOLERANCE:
+        raise SystemExit(f"Tree engine differs from the model by {error}; not saved")
+    engine.save(TREE_ENGINE_DIR)
+    print(f"Tree engine ({engine.meta['n_nodes']} nodes) saved to {TREE_ENGINE_DIR}")
+
+
+if __name__ == "__main__":
+    main()
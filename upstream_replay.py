@@ -0,0 +1,154 @@
+"""
+Record/replay transport for the API Integration Layer
+Records real upstream responses to fixture files and replays them offline
+with synthetic latency and error injection for load testing
+"""
+
+import hashlib
+import json
+import os
+import random
+import tempfile
+from datetime import datetime
+from time import sleep
+from typing import Dict, Any, Optional
+from urllib.parse import urlsplit, parse_qsl, urlencode
+import logging
+
+import requests
+
+# Query parameters that carry credentials and must never reach a fixture
+SECRET_PARAMS = {'key', 'appid', 'token', 'apiKey', 'api_key'}
+
+
+def redact_url(url: str) -> str:
+    """Drop scheme, host and credential parameters from a URL."""
+    parts = urlsplit(url)
+    query = sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+                   if k not in SECRET_PARAMS)
+    return parts.path + ('?' + urlencode(query) if query else '')
+
+
+def fixture_key(provider: str, url: str) -> str:
+    """Stable fixture name for a request, independent of host and API keys."""
+    return hashlib.sha1(f"{provider} {redact_url(url)}".encode('utf-8')).hexdigest()
+
+
+class ReplayResponse:
+    """The subset of requests.Response used by APIIntegrator."""
+
+    def __init__(self, status_code: int, body: Any, url: str):
+        self.status_code = status_code
+        self.url = url
+        self._body = body
+        self.content = json.dumps(body).encode('utf-8')
+
+    def json(self) -> Any:
+        return self._body
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} replayed for {redact_url(self.url)}",
+                                     response=self)
+
+
+class FixtureStore:
+    """One JSON file per recorded request, grouped by provider."""
+
+    def __init__(self, root: str):
+        self.logger = logging.getLogger('FixtureStore')
+        self.root = root
+
+    def _path(self, provider: str, url: str) -> str:
+        return os.path.join(self.root, provider, f"{fixture_key(provider, url)}.json")
+
+    def save(self, provider: str, url: str, status_code: int, body: Any):
+        """Write a fixture atomically."""
+        path = self._path(provider, url)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fixture = {
+            'provider': provider,
+            'request': redact_url(url),
+            'status_code': status_code,
+            'body': body,
+            'recorded_at': datetime.utcnow().isoformat()
+        }
+        # A unique temp file per write, so concurrent recorders of one request never share it
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=os.path.basename(path) + '.',
+                                        suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(fixture, f)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+    def load(self, provider: str, url: str) -> Optional[Dict[str, Any]]:
+        """Load the fixture recorded for exactly this request."""
+        try:
+            with open(self._path(provider, url), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def load_any(self, provider: str) -> Optional[Dict[str, Any]]:
+        """Load some fixture for the provider, used when the exact request was never recorded."""
+        directory = os.path.join(self.root, provider)
+        try:
+            names = sorted(n for n in os.listdir(directory) if n.endswith('.json'))
+        except FileNotFoundError:
+            return None
+        if not names:
+            return None
+        with open(os.path.join(directory, names[0]), 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+
+class UpstreamRecorder:
+    """Saves every successful live response as a fixture."""
+
+    def __init__(self, store: FixtureStore):
+        self.logger = logging.getLogger('UpstreamRecorder')
+        self.store = store
+
+    def record(self, provider: str, url: str, response: requests.Response):
+        try:
+            self.store.save(provider, url, response.status_code, response.json())
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Could not record {provider} response: {str(e)}")
+
+
+class UpstreamReplayer:
+    """
+    Serves fixtures instead of calling upstreams.
+
+    Each call sleeps for latency_ms plus uniform jitter, and fails with a
+    connection error with probability error_rate, so retries, deadlines and
+    circuit breakers behave as they would against real providers. With
+    strict=False a provider's other fixture stands in for unrecorded requests.
+    """
+
+    def __init__(self, store: FixtureStore, latency_ms: float = 0.0, jitter_ms: float = 0.0,
+                 error_rate: float = 0.0, strict: bool = False):
+        self.logger = logging.getLogger('UpstreamReplayer')
+        self.store = store
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.strict = strict
+
+    def get(self, provider: str, url: str) -> ReplayResponse:
+        delay = self.latency_ms + random.uniform(0, self.jitter_ms)
+        if delay > 0:
+            sleep(delay / 1000)
+
+        if self.error_rate and random.random() < self.error_rate:
+            raise requests.ConnectionError(f"Injected failure for {provider}")
+
+        fixture = self.store.load(provider, url)
+        if fixture is None and not self.strict:
+            fixture = self.store.load_any(provider)
+        if fixture is None:
+            raise requests.ConnectionError(f"No fixture for {provider} {redact_url(url)}")
+        return ReplayResponse(fixture['status_code'], fixture['body'], url)